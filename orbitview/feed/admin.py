@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Subscription, Activity, ActivitySource, FeedEntry
+
+
+admin.site.register(Subscription)
+admin.site.register(Activity)
+admin.site.register(ActivitySource)
+admin.site.register(FeedEntry)
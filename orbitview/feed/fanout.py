@@ -0,0 +1,189 @@
+from itertools import islice
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils import timezone
+
+from jobs import queue
+from users.models import Connection
+from .models import Subscription, Activity, ActivitySource, FeedEntry
+
+
+FANOUT_BATCH_SIZE = 1000
+# targets followed by more users than this are not fanned out to; their
+# followers read them at request time (see timeline.py)
+PULL_THRESHOLD = 10000
+PULL_SOURCES_KEY = 'feed:pull-sources'
+
+# model -> (foreign keys, many-to-many fields) whose targets an item is
+# published under
+PUBLISHERS = {
+    'resources.Event': (['host'], ['category']),
+    'resources.Competition': (['organizer'], ['category', 'tags']),
+    'resources.Program': (['host'], ['category']),
+    'profiles.Opportunity': (['posted_by'], ['required_skills']),
+    'profiles.Project': (['user'], ['skills']),
+}
+
+
+def is_published(instance):
+    label = instance._meta.label
+    if label == 'profiles.Project':
+        return instance.visibility == 'PUBLIC'
+    if label == 'profiles.Opportunity':
+        return instance.is_active
+    return True
+
+
+def recipient_ids(content_type, object_id):
+    # followers of a user come from the connection graph, everything else
+    # from subscriptions
+    if content_type.model_class() is get_user_model():
+        return Connection.objects.filter(followed_id=object_id).values_list('follower_id', flat=True)
+    return Subscription.objects.filter(content_type=content_type, object_id=object_id).values_list('user_id', flat=True)
+
+
+def pull_sources():
+    """(content_type_id, object_id) of every target read on demand."""
+    sources = cache.get(PULL_SOURCES_KEY)
+    if sources is None:
+        sources = frozenset(
+            ActivitySource.objects.filter(pushed=False)
+            .values_list('content_type_id', 'object_id').order_by().distinct()
+        )
+        cache.set(PULL_SOURCES_KEY, sources, None)
+    return sources
+
+
+def publish(instance, sources):
+    """
+    Add `instance` to the feeds of everyone following one of `sources`
+    (model instances or (content_type, object_id) pairs). Safe to repeat:
+    a source an item was already published under is skipped.
+    """
+    activity, _ = Activity.objects.get_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        defaults={'created_at': timezone.now()},
+    )
+    for source in sources:
+        if isinstance(source, tuple):
+            content_type, object_id = source
+        else:
+            content_type, object_id = ContentType.objects.get_for_model(source), source.pk
+        fan_out(activity, content_type, object_id)
+    return activity
+
+
+def fan_out(activity, content_type, object_id):
+    source, created = ActivitySource.objects.get_or_create(
+        activity=activity, content_type=content_type, object_id=object_id,
+        defaults={'created_at': activity.created_at},
+    )
+    if not created:
+        return
+
+    recipients = recipient_ids(content_type, object_id)
+    if recipients.count() > PULL_THRESHOLD:
+        ActivitySource.objects.filter(pk=source.pk).update(pushed=False)
+        cache.delete(PULL_SOURCES_KEY)
+        return
+
+    # written in batches so a big audience never sits in memory at once;
+    # ignore_conflicts drops users already reached through another source
+    user_ids = recipients.order_by().iterator(chunk_size=FANOUT_BATCH_SIZE)
+    while batch := list(islice(user_ids, FANOUT_BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(user_id=user_id, activity=activity, created_at=activity.created_at) for user_id in batch],
+            ignore_conflicts=True,
+        )
+
+
+def unpublish(instance):
+    Activity.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk
+    ).delete()
+
+
+@queue.job('feed.publish', concurrency=4)
+def publish_job(label, pk, sources=None, many_to_many=False):
+    """
+    Fan an item out to `sources` ([content_type_id, object_id] pairs), or to
+    its publishing foreign keys (and many-to-many fields, if asked) when
+    None. Rechecks the item first: it may have been deleted or unpublished
+    since the job was queued.
+    """
+    model = apps.get_model(label)
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or not is_published(instance):
+        return
+    if sources is None:
+        foreign_keys, many_to_many_fields = PUBLISHERS[label]
+        targets = [getattr(instance, name) for name in foreign_keys]
+        if many_to_many:
+            targets += [target for name in many_to_many_fields for target in getattr(instance, name).all()]
+    else:
+        targets = [(ContentType.objects.get_for_id(content_type_id), object_id) for content_type_id, object_id in sources]
+    publish(instance, targets)
+
+
+def _item_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if not is_published(instance):
+        unpublish(instance)
+        return
+    # queued in the same transaction, so a rolled back write never reaches
+    # a feed, and the fan-out itself stays off the request
+    queue.enqueue('feed.publish', label=sender._meta.label, pk=instance.pk)
+
+
+def items_saved(model, instances):
+    """
+    _item_saved for rows written with bulk_create/bulk_update, which send no
+    signals. Their many-to-many rows are written the same way, so the jobs
+    publish under those fields too.
+    """
+    label = model._meta.label
+    if label not in PUBLISHERS:
+        return
+    published, unpublished = [], []
+    for instance in instances:
+        (published if is_published(instance) else unpublished).append(instance.pk)
+    if unpublished:
+        Activity.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=unpublished).delete()
+    queue.enqueue_many('feed.publish', [{'label': label, 'pk': pk, 'many_to_many': True} for pk in published])
+
+
+def _item_deleted(sender, instance, **kwargs):
+    unpublish(instance)
+
+
+def _sources_added(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # e.g. category.event_set.add(...): `instance` is the source
+        content_type = ContentType.objects.get_for_model(instance)
+        for pk in pk_set:
+            queue.enqueue('feed.publish', label=model._meta.label, pk=pk, sources=[[content_type.pk, instance.pk]])
+    elif is_published(instance):
+        content_type = ContentType.objects.get_for_model(model)
+        sources = [[content_type.pk, pk] for pk in sorted(pk_set)]
+        queue.enqueue('feed.publish', label=instance._meta.label, pk=instance.pk, sources=sources)
+
+
+def connect_signals():
+    for label, (_, many_to_many) in PUBLISHERS.items():
+        model = apps.get_model(label)
+        uid = f'feed-{label}'
+        post_save.connect(_item_saved, sender=model, dispatch_uid=f'{uid}-saved')
+        post_delete.connect(_item_deleted, sender=model, dispatch_uid=f'{uid}-deleted')
+        for name in many_to_many:
+            m2m_changed.connect(
+                _sources_added, sender=model._meta.get_field(name).remote_field.through,
+                dispatch_uid=f'{uid}-{name}',
+            )
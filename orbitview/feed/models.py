@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+
+class Subscription(models.Model):
+    # A user following an interest or organization: a Host, Category,
+    # SkillTag or Skill. Following people goes through users.Connection.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_subscriptions')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content_type', 'object_id'], name='unique_feed_subscription'),
+        ]
+        indexes = [
+            # fan-out: every subscriber of one target
+            models.Index(fields=['content_type', 'object_id', 'user'], name='subscription_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.content_type_id}:{self.object_id}"
+
+
+class Activity(models.Model):
+    # One row per published item (event, competition, program, opportunity or
+    # public project); what feeds point at.
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_feed_activity'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id}"
+
+
+class ActivitySource(models.Model):
+    # The targets an activity was published under. Targets with too many
+    # followers to fan out to are read from here instead (`pushed=False`).
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='sources')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    pushed = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['activity', 'content_type', 'object_id'], name='unique_activity_source'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['content_type', 'object_id', '-created_at', '-activity'], name='activity_source_pull_idx',
+                condition=models.Q(pushed=False),
+            ),
+        ]
+
+
+class FeedEntry(models.Model):
+    # Materialized timeline row: `activity` appears in `user`'s feed.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries')
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'activity'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            # a page of a feed is one range scan on this index
+            models.Index(fields=['user', '-created_at', '-activity'], name='feed_entry_timeline_idx'),
+        ]
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+
+from .models import Subscription
+
+
+SUBSCRIBABLE = {
+    'host': 'resources.Host',
+    'category': 'resources.Category',
+    'skill-tag': 'resources.SkillTag',
+    'skill': 'profiles.Skill',
+}
+
+
+class SubscriptionSerializer(serializers.ModelSerializer):
+    type = serializers.ChoiceField(choices=sorted(SUBSCRIBABLE), write_only=True)
+
+    class Meta:
+        model = Subscription
+        fields = ['id', 'type', 'object_id', 'created_at']
+        read_only_fields = ['created_at']
+
+    def validate(self, attrs):
+        model = apps.get_model(SUBSCRIBABLE[attrs.pop('type')])
+        if not model.objects.filter(pk=attrs['object_id']).exists():
+            raise serializers.ValidationError({'object_id': ["Not found."]})
+        attrs['content_type'] = ContentType.objects.get_for_model(model)
+        return attrs
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        label = ContentType.objects.get_for_id(instance.content_type_id).model_class()._meta.label
+        data['type'] = next(name for name, model in SUBSCRIBABLE.items() if model == label)
+        return data
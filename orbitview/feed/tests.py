@@ -0,0 +1,164 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from profiles import importer
+from profiles.models import Project
+from resources.models import Host, Category, Event
+from jobs import queue
+from users.models import Connection
+from . import fanout
+from .models import Subscription, Activity, ActivitySource, FeedEntry
+
+User = get_user_model()
+
+
+def create_user(username):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pass12345')
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = create_user('reader')
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        self.category = Category.objects.create(title='Tech')
+
+    def subscribe(self, user, target):
+        Subscription.objects.create(user=user, content_type=ContentType.objects.get_for_model(target), object_id=target.pk)
+
+    def create_event(self, title, categories=()):
+        start = timezone.now() + datetime.timedelta(days=1)
+        event = Event.objects.create(
+            title=title, description='-', host=self.host, url='https://orbitview.net',
+            start_time=start, end_time=start + datetime.timedelta(hours=2),
+            cover_image='media/events/cover_images/event.jpg',
+        )
+        event.category.set(categories)
+        queue.run_pending()
+        return event
+
+    def feed(self, url='/api/feed/'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_fans_out_to_host_and_interest_followers_once(self):
+        self.subscribe(self.reader, self.host)
+        self.subscribe(self.reader, self.category)
+        bystander = create_user('bystander')
+        self.create_event('Launch', categories=[self.category])
+
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 1)
+        self.assertFalse(FeedEntry.objects.filter(user=bystander).exists())
+        results = self.feed().data['results']
+        self.assertEqual([(item['type'], item['item']['title']) for item in results], [('event', 'Launch')])
+
+    def test_public_projects_reach_followers_of_the_owner(self):
+        owner = create_user('owner')
+        Connection.objects.create(follower=self.reader, followed=owner)
+        project = Project.objects.create(user=owner, title='Rover', description='-', start_date=datetime.date(2021, 1, 1))
+        Project.objects.create(user=owner, title='Secret', description='-', start_date=datetime.date(2021, 1, 1), visibility='PRIVATE')
+        queue.run_pending()
+        self.assertEqual([item['item']['title'] for item in self.feed().data['results']], ['Rover'])
+
+        project.visibility = 'PRIVATE'
+        project.save()
+        self.assertEqual(self.feed().data['results'], [])
+
+    def test_bulk_written_projects_are_published(self):
+        owner = create_user('owner')
+        Connection.objects.create(follower=self.reader, followed=owner)
+        client = APIClient()
+        client.force_authenticate(owner)
+        response = client.post('/api/profiles/projects/bulk/', [
+            {'title': 'Rover', 'description': '-', 'start_date': '2021-01-01'},
+            {'title': 'Secret', 'description': '-', 'start_date': '2021-01-01', 'visibility': 'PRIVATE'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        importer.ProfileImporter(user=owner).run(iter([
+            {'type': 'project', 'Title': 'Lander', 'Started On': '2022-05-01'},
+        ]))
+        queue.run_pending()
+        self.assertEqual(sorted(item['item']['title'] for item in self.feed().data['results']), ['Lander', 'Rover'])
+
+        rover = next(item for item in response.data if item['title'] == 'Rover')
+        client.patch('/api/profiles/projects/bulk/', [{'id': rover['id'], 'visibility': 'PRIVATE'}], format='json')
+        self.assertEqual([item['item']['title'] for item in self.feed().data['results']], ['Lander'])
+
+    def test_cursor_pagination(self):
+        self.subscribe(self.reader, self.host)
+        for i in range(5):
+            self.create_event(f'Event {i}')
+
+        titles, url = [], '/api/feed/?page_size=2'
+        while url:
+            response = self.feed(url)
+            titles += [item['item']['title'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, [f'Event {i}' for i in reversed(range(5))])
+        self.assertEqual(self.client.get('/api/feed/?cursor=nope').status_code, 400)
+
+    def test_large_hosts_are_read_on_demand(self):
+        others = [create_user(f'fan{i}') for i in range(3)]
+        for user in [self.reader, *others]:
+            self.subscribe(user, self.host)
+        with mock.patch.object(fanout, 'PULL_THRESHOLD', 2):
+            self.create_event('Keynote')
+
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertFalse(ActivitySource.objects.get().pushed)
+        self.assertEqual([item['item']['title'] for item in self.feed().data['results']], ['Keynote'])
+
+    def test_fan_out_is_batched(self):
+        for i in range(5):
+            self.subscribe(create_user(f'fan{i}'), self.host)
+        with mock.patch.object(fanout, 'FANOUT_BATCH_SIZE', 2), \
+                mock.patch.object(FeedEntry.objects, 'bulk_create', wraps=FeedEntry.objects.bulk_create) as bulk_create:
+            self.create_event('Launch')
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(FeedEntry.objects.count(), 5)
+
+    def test_feed_read_is_a_constant_number_of_queries(self):
+        self.subscribe(self.reader, self.host)
+        for i in range(10):
+            self.create_event(f'Event {i}')
+        self.feed()
+        # entries, activities, then events and their two prefetches; the
+        # pull-source set is cached
+        with self.assertNumQueries(5):
+            self.feed()
+
+    def test_deleting_an_item_removes_it(self):
+        self.subscribe(self.reader, self.host)
+        event = self.create_event('Launch')
+        event.delete()
+        self.assertFalse(Activity.objects.exists())
+        self.assertEqual(self.feed().data['results'], [])
+
+
+class SubscriptionTests(TestCase):
+    def setUp(self):
+        self.user = create_user('reader')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(title='Tech')
+
+    def test_subscribe_and_unsubscribe(self):
+        response = self.client.post('/api/feed/subscriptions/', {'type': 'category', 'object_id': self.category.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['type'], 'category')
+        again = self.client.post('/api/feed/subscriptions/', {'type': 'category', 'object_id': self.category.pk}, format='json')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(self.client.post('/api/feed/subscriptions/', {'type': 'host', 'object_id': 999}, format='json').status_code, 400)
+
+        self.assertEqual(self.client.delete(f"/api/feed/subscriptions/{response.data['id']}/").status_code, 204)
+        self.assertFalse(Subscription.objects.exists())
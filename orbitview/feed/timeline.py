@@ -0,0 +1,123 @@
+import base64
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from profiles.models import Opportunity, Project
+from profiles.serializers import OpportunitySerializer, ProjectSerializer
+from resources.models import Event, Competition, Program
+from resources.serializers import EventSerializer, CompetitionSerializer, ProgramSerializer
+from users.models import Connection
+from .fanout import pull_sources
+from .models import Subscription, Activity, ActivitySource, FeedEntry
+
+
+# model -> (type name in the response, serializer, queryset of showable rows)
+RENDERERS = {
+    Event: ('event', EventSerializer, lambda: Event.objects.with_status()),
+    Competition: ('competition', CompetitionSerializer, lambda: Competition.objects.with_status()),
+    Program: ('program', ProgramSerializer, lambda: Program.objects.all()),
+    Opportunity: ('opportunity', OpportunitySerializer, lambda: Opportunity.objects.live()),
+    Project: ('project', ProjectSerializer, lambda: Project.objects.filter(visibility='PUBLIC')),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position):
+    created_at, activity_id = position
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{activity_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, activity_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.datetime.fromisoformat(created_at), int(activity_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def _after(position):
+    # keyset condition for rows strictly older than `position`
+    if position is None:
+        return Q()
+    created_at, activity_id = position
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, activity_id__lt=activity_id)
+
+
+def followed_pull_sources(user):
+    """The pull-mode targets this user follows, grouped {content_type_id: ids}."""
+    pulled = pull_sources()
+    if not pulled:
+        return {}
+    user_type = ContentType.objects.get_for_model(get_user_model())
+    followed = set(Subscription.objects.filter(user=user).values_list('content_type_id', 'object_id'))
+    followed.update(
+        (user_type.pk, followed_id)
+        for followed_id in Connection.objects.filter(follower=user).values_list('followed_id', flat=True)
+    )
+    grouped = {}
+    for content_type_id, object_id in followed & pulled:
+        grouped.setdefault(content_type_id, []).append(object_id)
+    return grouped
+
+
+def read_page(user, position=None, limit=20):
+    """
+    One page of `user`'s feed, newest first: [(created_at, activity_id)]
+    plus the position to continue from (None on the last page).
+
+    Pushed items are a range scan over the user's FeedEntry rows; items from
+    pull-mode targets the user follows are read from their ActivitySource
+    rows and merged in.
+    """
+    rows = set(
+        FeedEntry.objects.filter(_after(position), user=user)
+        .order_by('-created_at', '-activity_id')
+        .values_list('created_at', 'activity_id')[:limit + 1]
+    )
+
+    grouped = followed_pull_sources(user)
+    if grouped:
+        sources = Q()
+        for content_type_id, object_ids in grouped.items():
+            sources |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+        rows.update(
+            ActivitySource.objects.filter(sources, _after(position), pushed=False)
+            .order_by('-created_at', '-activity_id')
+            .values_list('created_at', 'activity_id').distinct()[:limit + 1]
+        )
+
+    rows = sorted(rows, reverse=True)
+    page = rows[:limit]
+    return page, (page[-1] if len(rows) > limit else None)
+
+
+def render(page, context):
+    """Serialize the items behind a page, one query (plus prefetches) per type."""
+    activities = Activity.objects.in_bulk([activity_id for _, activity_id in page])
+    wanted = {}
+    for activity in activities.values():
+        wanted.setdefault(activity.content_type_id, []).append(activity.object_id)
+
+    rendered = {}
+    for content_type_id, object_ids in wanted.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        type_name, serializer_class, queryset = RENDERERS[model]
+        objects = serializer_class.optimize_queryset(queryset()).in_bulk(object_ids)
+        for object_id, obj in objects.items():
+            rendered[(content_type_id, object_id)] = (type_name, serializer_class(obj, context=context).data)
+
+    results = []
+    for created_at, activity_id in page:
+        activity = activities.get(activity_id)
+        item = activity and rendered.get((activity.content_type_id, activity.object_id))
+        # items that stopped being showable (expired, made private) drop out
+        if item:
+            type_name, data = item
+            results.append({'type': type_name, 'published_at': created_at, 'item': data})
+    return results
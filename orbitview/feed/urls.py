@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("", views.FeedView.as_view(), name="feed"),
+    path("subscriptions/", views.SubscriptionListCreateView.as_view(), name="subscription-list"),
+    path("subscriptions/<int:pk>/", views.SubscriptionDetailView.as_view(), name="subscription-detail"),
+]
@@ -0,0 +1,63 @@
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import timeline
+from .models import Subscription
+from .serializers import SubscriptionSerializer
+
+
+class FeedView(APIView):
+    # Newest first, keyset paginated: follow `next` (?cursor=...) for older items.
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('page_size', self.page_size)), self.max_page_size))
+        except ValueError:
+            limit = self.page_size
+        cursor = request.query_params.get('cursor')
+        try:
+            position = timeline.decode_cursor(cursor) if cursor else None
+        except timeline.InvalidCursor as exc:
+            raise ValidationError({'cursor': [str(exc)]})
+
+        page, next_position = timeline.read_page(request.user, position, limit)
+        next_link = None
+        if next_position is not None:
+            query = request.query_params.copy()
+            query['cursor'] = timeline.encode_cursor(next_position)
+            next_link = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+        return Response({
+            'next': next_link,
+            'results': timeline.render(page, {'request': request}),
+        })
+
+
+class SubscriptionListCreateView(generics.ListCreateAPIView):
+    serializer_class = SubscriptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        return Subscription.objects.filter(user=self.request.user).order_by('-created_at', '-id')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subscription, created = Subscription.objects.get_or_create(user=request.user, **serializer.validated_data)
+        return Response(
+            self.get_serializer(subscription).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class SubscriptionDetailView(generics.RetrieveDestroyAPIView):
+    serializer_class = SubscriptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Subscription.objects.filter(user=self.request.user)
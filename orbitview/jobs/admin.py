@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Job, JobSlot
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'job_type', 'status', 'attempts', 'run_at', 'locked_by')
+    list_filter = ('status', 'job_type')
+
+
+admin.site.register(JobSlot)
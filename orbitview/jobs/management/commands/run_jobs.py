@@ -0,0 +1,95 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the database queue. Each thread claims one "
+        "job at a time; with --processes, that many worker processes are "
+        "started, each with --threads threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="seconds to wait when the queue is empty")
+        parser.add_argument('--types', help="comma-separated job types to run (default: all)")
+        parser.add_argument('--burst', action='store_true', help="exit once no jobs are ready")
+
+    def handle(self, *args, **options):
+        if options['processes'] > 1:
+            return self.supervise(options)
+
+        self.stopping = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self.stopping.set())
+
+        types = options['types'].split(',') if options['types'] else None
+        requeued = queue.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        counts = [0] * options['threads']
+        threads = [
+            threading.Thread(target=self.work, args=(i, types, options, counts), name=f'jobs-{i}')
+            for i in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(self.style.SUCCESS(f"Ran {sum(counts)} jobs."))
+
+    def work(self, index, types, options, counts):
+        worker = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        try:
+            while not self.stopping.is_set():
+                try:
+                    jobs = queue.claim(worker, types=types)
+                    if not jobs:
+                        if options['burst']:
+                            return
+                        self.stopping.wait(options['poll_interval'])
+                        continue
+                    for job in jobs:
+                        queue.execute(job)
+                        counts[index] += 1
+                except DatabaseError as exc:
+                    # dropped connection, lock timeout (SQLite "database is
+                    # locked"): reconnect and go again. A job caught mid-run
+                    # is picked up by requeue_stale.
+                    self.stderr.write(f"{worker}: {exc}")
+                    connections.close_all()
+                    self.stopping.wait(options['poll_interval'])
+        finally:
+            connections.close_all()
+
+    def supervise(self, options):
+        # each child is this command with --processes 1, so it gets its own
+        # interpreter and database connections
+        argv = [sys.executable, sys.argv[0], 'run_jobs', '--processes', '1',
+                '--threads', str(options['threads']), '--poll-interval', str(options['poll_interval'])]
+        if options['types']:
+            argv += ['--types', options['types']]
+        if options['burst']:
+            argv.append('--burst')
+        children = [subprocess.Popen(argv) for _ in range(options['processes'])]
+
+        def forward(signum, frame):
+            for child in children:
+                child.send_signal(signum)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, forward)
+
+        while any(child.poll() is None for child in children):
+            time.sleep(0.5)
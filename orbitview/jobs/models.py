@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    # A unit of background work, run by `manage.py run_jobs` (see queue.py).
+    # Finished jobs are deleted; failed ones are kept with their last error.
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    job_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # what workers claim from: ready jobs, oldest first
+            models.Index(fields=['run_at', 'id'], condition=models.Q(status='queued'), name='job_ready_idx'),
+            # stale-lock sweeps
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} #{self.pk} ({self.status})"
+
+
+class JobSlot(models.Model):
+    # Running jobs per job type, for types with a concurrency limit. Slots
+    # are taken with a conditional F() update so the limit holds across
+    # workers; `requeue_stale` recounts them from the Job rows.
+    job_type = models.CharField(max_length=100, primary_key=True)
+    running = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.job_type}: {self.running} running"
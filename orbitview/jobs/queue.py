@@ -0,0 +1,180 @@
+import datetime
+import random
+import traceback
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job, JobSlot
+
+
+BACKOFF_BASE = 10  # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 60 * 60
+# running jobs whose worker hasn't finished them in this long are assumed
+# dead (killed worker, lost connection) and handed out again
+STALE_AFTER = datetime.timedelta(minutes=30)
+
+
+@dataclass
+class JobType:
+    name: str
+    function: Callable
+    concurrency: Optional[int] = None  # max running at once across all workers
+    max_attempts: int = 5
+
+
+REGISTRY = {}
+
+
+def job(name, concurrency=None, max_attempts=5):
+    """
+    Register a function as a job type. The function is unchanged; queue a
+    call with `enqueue(name, **payload)`, where the payload is JSON.
+    """
+    def decorator(function):
+        REGISTRY[name] = JobType(name, function, concurrency, max_attempts)
+        return function
+    return decorator
+
+
+def enqueue(name, run_at=None, **payload):
+    # written in the caller's transaction: the job exists iff the work
+    # that asked for it committed, and workers can't see it before then
+    return Job.objects.create(
+        job_type=name,
+        payload=payload,
+        max_attempts=REGISTRY[name].max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def enqueue_many(name, payloads, run_at=None):
+    # one INSERT for a batch of jobs, e.g. one per row of a bulk write
+    run_at = run_at or timezone.now()
+    max_attempts = REGISTRY[name].max_attempts
+    return Job.objects.bulk_create(
+        Job(job_type=name, payload=payload, max_attempts=max_attempts, run_at=run_at)
+        for payload in payloads
+    )
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return datetime.timedelta(seconds=delay * random.uniform(1, 1.25))
+
+
+def _take_slot(job_type):
+    if job_type.concurrency is None:
+        return True
+    JobSlot.objects.get_or_create(job_type=job_type.name)
+    # the row lock taken by this UPDATE is held until the claim commits, so
+    # a concurrent claim re-checks `running` after we're done
+    return JobSlot.objects.filter(
+        job_type=job_type.name, running__lt=job_type.concurrency,
+    ).update(running=F('running') + 1) == 1
+
+
+def _release_slot(name):
+    job_type = REGISTRY.get(name)
+    if job_type is not None and job_type.concurrency is not None:
+        JobSlot.objects.filter(job_type=name, running__gt=0).update(running=F('running') - 1)
+
+
+def claim(worker, limit=1, types=None):
+    """
+    Lock up to `limit` ready jobs for `worker`. SKIP LOCKED lets any number
+    of workers claim at once without waiting on each other's rows; types at
+    their concurrency limit are passed over.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ready = Job.objects.select_for_update(skip_locked=True).filter(status=Job.QUEUED, run_at__lte=now)
+        if types:
+            ready = ready.filter(job_type__in=types)
+        # look a little past `limit` so a full type doesn't starve the rest
+        claimed, full = [], set()
+        for job in ready.order_by('run_at', 'id')[:limit * 4]:
+            job_type = REGISTRY.get(job.job_type)
+            if job_type is None:
+                Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=f"Unknown job type {job.job_type!r}.")
+                continue
+            if job.job_type in full:
+                continue
+            if not _take_slot(job_type):
+                full.add(job.job_type)
+                continue
+            claimed.append(job)
+            if len(claimed) == limit:
+                break
+
+        Job.objects.filter(pk__in=[job.pk for job in claimed]).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+    for job in claimed:
+        job.status, job.locked_by, job.locked_at, job.attempts = Job.RUNNING, worker, now, job.attempts + 1
+    return claimed
+
+
+def execute(job):
+    """Run a claimed job, then delete it, schedule a retry or mark it failed."""
+    try:
+        REGISTRY[job.job_type].function(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        with transaction.atomic():
+            _release_slot(job.job_type)
+            if job.attempts < job.max_attempts:
+                Job.objects.filter(pk=job.pk).update(
+                    status=Job.QUEUED, run_at=timezone.now() + backoff(job.attempts),
+                    locked_by='', locked_at=None, last_error=error,
+                )
+            else:
+                Job.objects.filter(pk=job.pk).update(status=Job.FAILED, locked_at=None, last_error=error)
+        return False
+
+    with transaction.atomic():
+        _release_slot(job.job_type)
+        Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def run_pending(worker='inline', types=None):
+    """Claim and run ready jobs one at a time until none are left."""
+    ran = 0
+    while jobs := claim(worker, types=types):
+        for job in jobs:
+            execute(job)
+            ran += 1
+    return ran
+
+
+def requeue_stale():
+    """
+    Hand jobs abandoned by dead workers out again (or fail them once out of
+    attempts) and recount the concurrency slots from what is still running.
+    """
+    cutoff = timezone.now() - STALE_AFTER
+    with transaction.atomic():
+        stale = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.RUNNING, locked_at__lt=cutoff).values_list('pk', flat=True)
+        )
+        requeued = Job.objects.filter(pk__in=stale, attempts__lt=F('max_attempts')).update(
+            status=Job.QUEUED, locked_by='', locked_at=None, last_error="Worker stopped responding.",
+        )
+        Job.objects.filter(pk__in=stale, status=Job.RUNNING).update(
+            status=Job.FAILED, locked_at=None, last_error="Worker stopped responding.",
+        )
+
+        # lock the slots before counting so in-flight claims land first
+        slots = list(JobSlot.objects.select_for_update().values_list('job_type', flat=True))
+        running = dict(
+            Job.objects.filter(status=Job.RUNNING, job_type__in=slots).values('job_type')
+            .annotate(count=Count('id')).values_list('job_type', 'count')
+        )
+        for job_type in slots:
+            JobSlot.objects.filter(job_type=job_type).update(running=running.get(job_type, 0))
+    return requeued
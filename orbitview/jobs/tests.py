@@ -0,0 +1,105 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from . import queue
+from .models import Job, JobSlot
+
+
+calls = []
+
+
+def record(**payload):
+    calls.append(payload)
+
+
+def explode(**payload):
+    raise RuntimeError("boom")
+
+
+TEST_TYPES = {
+    'test.record': queue.JobType('test.record', record),
+    'test.limited': queue.JobType('test.limited', record, concurrency=1),
+    'test.explode': queue.JobType('test.explode', explode, max_attempts=2),
+}
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        patcher = mock.patch.dict(queue.REGISTRY, TEST_TYPES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_jobs_run_once_and_are_removed(self):
+        queue.enqueue('test.record', n=1)
+        queue.enqueue('test.record', n=2, run_at=timezone.now() + datetime.timedelta(hours=1))
+        self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(calls, [{'n': 1}])
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'n': 2}])
+
+    def test_failures_are_retried_with_backoff_then_failed(self):
+        job = queue.enqueue('test.explode')
+        self.assertEqual(queue.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreaterEqual(job.run_at, timezone.now() + datetime.timedelta(seconds=queue.BACKOFF_BASE - 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(queue.run_pending(), 0)
+
+    def test_backoff_grows_and_is_capped(self):
+        self.assertLess(queue.backoff(1), queue.backoff(4))
+        self.assertLessEqual(queue.backoff(50).total_seconds(), queue.BACKOFF_MAX * 1.25)
+
+    def test_concurrency_limit_holds_across_workers(self):
+        queue.enqueue('test.limited', n=1)
+        queue.enqueue('test.limited', n=2)
+        queue.enqueue('test.record', n=3)
+
+        first = queue.claim('worker-a')
+        second = queue.claim('worker-b')
+        self.assertEqual([job.job_type for job in first + second], ['test.limited', 'test.record'])
+        self.assertEqual(queue.claim('worker-c'), [])
+
+        queue.execute(first[0])
+        self.assertEqual([job.payload for job in queue.claim('worker-c')], [{'n': 2}])
+
+    def test_unknown_job_types_fail(self):
+        Job.objects.create(job_type='test.gone')
+        self.assertEqual(queue.run_pending(), 0)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_stale_jobs_are_requeued_and_slots_recounted(self):
+        queue.enqueue('test.limited')
+        [job] = queue.claim('dead-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - queue.STALE_AFTER * 2)
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+        self.assertEqual(JobSlot.objects.get(job_type='test.limited').running, 0)
+        self.assertEqual(queue.run_pending(), 1)
+
+
+class WorkerCommandTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+        patcher = mock.patch.dict(queue.REGISTRY, TEST_TYPES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_runs_everything_ready(self):
+        for n in range(5):
+            queue.enqueue('test.record', n=n)
+        out = StringIO()
+        call_command('run_jobs', threads=1, burst=True, stdout=out)
+        self.assertEqual(sorted(call['n'] for call in calls), list(range(5)))
+        self.assertFalse(Job.objects.exists())
+        self.assertIn('Ran 5 jobs.', out.getvalue())
@@ -0,0 +1,194 @@
+import bisect
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Count
+
+from . import caching
+
+
+# type -> (model, searched field, usage). Usage is a list of (model, m2m
+# field or None, column holding the id): every row found there counts once
+# towards the referenced object's rank.
+SOURCES = {
+    'skill': ('profiles.Skill', 'name', [
+        ('profiles.UserSkill', None, 'skill_id'),
+        ('profiles.Opportunity', 'required_skills', 'skill_id'),
+    ]),
+    'tag': ('resources.SkillTag', 'name', [
+        ('resources.Competition', 'tags', 'skilltag_id'),
+    ]),
+    'category': ('resources.Category', 'title', [
+        ('resources.Event', 'category', 'category_id'),
+        ('resources.Competition', 'category', 'category_id'),
+        ('resources.Program', 'category', 'category_id'),
+    ]),
+    'host': ('resources.Host', 'name', [
+        ('resources.Event', None, 'host_id'),
+        ('resources.Competition', None, 'organizer_id'),
+        ('resources.Program', None, 'host_id'),
+    ]),
+}
+
+MAX_LIMIT = 20
+# prefixes up to this long match the most names, so their results are
+# precomputed at build time
+SHORT_PREFIX = 3
+# names are rebuilt as soon as they change (see `_current`); usage counts,
+# which change on every profile edit, only need to be roughly current
+RANK_TTL = 10 * 60
+
+
+def normalize(text):
+    # case and accent insensitive, whitespace collapsed
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def word_starts(key):
+    # "machine learning" -> "machine learning", "learning"
+    for i, char in enumerate(key):
+        if char.isalnum() and (i == 0 or not key[i - 1].isalnum()):
+            yield key[i:]
+
+
+def _best(rows, limit=MAX_LIMIT):
+    # rows sort by rank after their key; a name shows up once even if
+    # several of its words matched
+    results, seen = [], set()
+    for _, rank, name_key, pk, name, usage in sorted(rows, key=lambda row: row[1:4]):
+        if pk not in seen:
+            seen.add(pk)
+            results.append({'id': pk, 'name': name, 'usage': usage})
+            if len(results) == limit:
+                break
+    return results
+
+
+class PrefixIndex:
+    """
+    Prefix lookups over the names of one type. Every word start of a name
+    is a key, so "lea" finds "Machine Learning". The keys are held in one
+    sorted list and searched with bisect.
+    """
+
+    def __init__(self, entries):
+        rows = []
+        for pk, name, usage in entries:
+            name_key = normalize(name)
+            rows.extend((key, -usage, name_key, pk, name, usage) for key in word_starts(name_key))
+        rows.sort()
+        self.keys = [row[0] for row in rows]
+        self.rows = rows
+
+        grouped = {}
+        for row in rows:
+            for length in range(1, min(len(row[0]), SHORT_PREFIX) + 1):
+                grouped.setdefault(row[0][:length], []).append(row)
+        self.top = {prefix: _best(matches) for prefix, matches in grouped.items()}
+
+    def search(self, query, limit):
+        key = normalize(query)
+        if not key:
+            return []
+        if len(key) <= SHORT_PREFIX:
+            return self.top.get(key, [])[:limit]
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_left(self.keys, key + '\U0010ffff', lo=start)
+        return _best(self.rows[start:end], limit)
+
+
+@dataclass
+class _Built:
+    index: PrefixIndex
+    generation: tuple
+    built_at: float
+
+
+class AutocompleteIndex:
+    """
+    In-process PrefixIndex per type. Each is rebuilt after its model's
+    response-cache generation changes (bumped by the signal handlers in
+    caching.watch) or after RANK_TTL, so a search reads one cache key per
+    type and never the database. A stale index keeps being served while a
+    background thread rebuilds it; only a type's first build is waited for.
+    """
+
+    def __init__(self):
+        # one lock per type, held for the whole of a build
+        self.locks = {type_name: threading.Lock() for type_name in SOURCES}
+        self.built = {}
+
+    def search(self, query, types=tuple(SOURCES), limit=10):
+        resources = {type_name: self._resource(type_name) for type_name in types}
+        generations = caching.get_generations(set(resources.values()))
+        return {
+            type_name: self._current(type_name, generations[resource]).search(query, limit)
+            for type_name, resource in resources.items()
+        }
+
+    def _resource(self, type_name):
+        return caching.resource_name(apps.get_model(SOURCES[type_name][0]))
+
+    def _is_stale(self, built, generation):
+        return built is None or built.generation != generation or time.monotonic() - built.built_at > RANK_TTL
+
+    def _current(self, type_name, generation):
+        built = self.built.get(type_name)
+        if not self._is_stale(built, generation):
+            return built.index
+        lock = self.locks[type_name]
+        if built is None or connection.in_atomic_block:
+            # nothing to serve yet, or rows written in the caller's
+            # transaction, which only its connection can see
+            with lock:
+                return self._build(type_name, generation).index
+        if lock.acquire(blocking=False):
+            thread = threading.Thread(
+                target=self._build_in_background, args=(type_name, generation),
+                name=f'autocomplete-{type_name}', daemon=True,
+            )
+            thread.start()
+        return built.index
+
+    def _build_in_background(self, type_name, generation):
+        try:
+            self._build(type_name, generation)
+        finally:
+            connection.close()
+            self.locks[type_name].release()
+
+    def _build(self, type_name, generation):
+        # called with the type's lock held; another caller may have built
+        # it while this one waited for the lock
+        built = self.built.get(type_name)
+        if self._is_stale(built, generation):
+            # `generation` was read before loading: a write landing
+            # mid-build leaves this stale and triggers another build
+            built = _Built(self._load(type_name), generation, time.monotonic())
+            self.built[type_name] = built
+        return built
+
+    def _load(self, type_name):
+        label, field, usage = SOURCES[type_name]
+        counts = Counter()
+        for usage_label, many_to_many, column in usage:
+            model = apps.get_model(usage_label)
+            if many_to_many:
+                model = model._meta.get_field(many_to_many).remote_field.through
+            counts.update(dict(
+                model.objects.values(column).annotate(count=Count('pk')).values_list(column, 'count').order_by()
+            ))
+        names = apps.get_model(label).objects.values_list('pk', field).iterator()
+        return PrefixIndex((pk, name, counts[pk]) for pk, name in names)
+
+    def clear(self):
+        self.built = {}
+
+
+index = AutocompleteIndex()
@@ -0,0 +1,128 @@
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+GENERATION_KEY = 'cache-generation:{resource}'
+RESPONSE_KEY = 'cached-response:{digest}'
+
+
+def resource_name(model):
+    return model._meta.model_name
+
+
+def get_generations(resources):
+    """
+    Current (version, last_modified) of each resource type. A missing entry
+    (first use or evicted) is started fresh, which orphans older responses.
+    """
+    keys = {GENERATION_KEY.format(resource=resource): resource for resource in resources}
+    found = cache.get_many(keys)
+    generations = {}
+    for key, resource in keys.items():
+        if key not in found:
+            found[key] = bump(resource)
+        generations[resource] = found[key]
+    return generations
+
+
+def bump(resource):
+    now = time.time()
+    generation = (time.time_ns(), now)
+    cache.set(GENERATION_KEY.format(resource=resource), generation, None)
+    return generation
+
+
+def bump_on_commit(resource):
+    # a reader between the write and its commit would cache the old rows
+    # under the new generation; bumping after the commit orphans them too.
+    # Outside a transaction this bumps right away.
+    transaction.on_commit(lambda: bump(resource))
+
+
+def _bump_sender(sender, **kwargs):
+    if not kwargs.get('raw'):
+        bump_on_commit(resource_name(sender))
+
+
+def watch(*models):
+    # any write to these models invalidates every cached response that
+    # declares them in `cache_resources`
+    for model in models:
+        uid = f'response-cache-{model._meta.label}'
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=f'{uid}-delete')
+        for field in model._meta.many_to_many:
+            m2m_changed.connect(
+                lambda sender, model=model, **kwargs: bump_on_commit(resource_name(model)),
+                sender=field.remote_field.through,
+                weak=False,
+                dispatch_uid=f'{uid}-{field.name}',
+            )
+
+
+class CachedResponseMixin:
+    """
+    Caches successful list/retrieve responses for views whose output does
+    not depend on the requesting user. The cache key and ETag are derived from
+    the request path and the generation of every resource in
+    `cache_resources`, so a write to any of them invalidates in O(1).
+    """
+    cache_resources = ()
+    cache_timeout = 60 * 60
+    # responses that depend on the current time (upcoming/ongoing/past) are
+    # keyed to the current minute as well
+    cache_time_windowed = False
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        generations = get_generations(self.cache_resources)
+        window = int(time.time() // 60) if self.cache_time_windowed else ''
+        digest = hashlib.md5(
+            f"{request.get_full_path()}|{sorted(generations.items())}|{window}".encode()
+        ).hexdigest()
+        etag = f'"{digest}"'
+        # rounded up, so a write later in the same second is not hidden by
+        # truncation
+        last_modified = math.ceil(max(modified for _, modified in generations.values()))
+        if self.cache_time_windowed:
+            # a new minute can move rows between upcoming/ongoing/past
+            last_modified = max(last_modified, window * 60)
+
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = RESPONSE_KEY.format(digest=digest)
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, self.cache_timeout)
+
+        response['ETag'] = etag
+        # until that second is over another write can still land in it, so
+        # only the ETag is safe to advertise
+        if last_modified < time.time():
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        return if_modified_since is not None and last_modified <= if_modified_since
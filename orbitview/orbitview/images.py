@@ -0,0 +1,194 @@
+import hashlib
+import io
+import logging
+import re
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from jobs import queue
+from . import caching
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ROOT = 'media/images'
+# variant -> (box, crop). Cropped variants are cut to exactly `box`; the
+# others are only scaled down to fit inside it.
+VARIANTS = {
+    'thumb': ((160, 160), True),
+    'card': ((640, 360), True),
+    'full': ((1920, 1920), False),
+}
+WEBP_QUALITY = 80
+# the cleaned original keeps its format when browsers can show it as-is
+ORIGINAL_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+PROCESSED_NAME = re.compile(rf'^{IMAGE_ROOT}/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})/original\.\w+$')
+
+# model -> image fields run through the pipeline (see `register`)
+REGISTERED = {}
+
+
+def image_directory(digest):
+    return f'{IMAGE_ROOT}/{digest[:2]}/{digest}'
+
+
+def variant_name(processed_name, variant):
+    digest = PROCESSED_NAME.match(processed_name)['digest']
+    return f'{image_directory(digest)}/{variant}.webp'
+
+
+def is_processed(name):
+    return bool(name and PROCESSED_NAME.match(name))
+
+
+def _without_metadata(image):
+    # apply the EXIF orientation before the EXIF block is dropped, then keep
+    # nothing but the pixels (no EXIF/GPS, ICC profile or text chunks)
+    image = ImageOps.exif_transpose(image)
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.info = {}
+    return image
+
+
+def _encode(image, format, **options):
+    buffer = io.BytesIO()
+    if format == 'JPEG' and image.mode == 'RGBA':
+        image = image.convert('RGB')
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+def render(data):
+    """
+    {file name: bytes} for an upload: the original with its metadata
+    stripped plus one WebP per entry in VARIANTS. Raises ValueError for
+    anything Pillow can't (or won't, e.g. decompression bombs) decode.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            format = source.format
+            image = _without_metadata(source)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        raise ValueError(f"Not a usable image: {exc}")
+
+    original_format = format if format in ORIGINAL_FORMATS else 'PNG'
+    files = {}
+    for variant, (box, crop) in VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, box, Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail(box, Image.Resampling.LANCZOS)
+        files[f'{variant}.webp'] = _encode(resized, 'WEBP', quality=WEBP_QUALITY, method=4)
+    files[f'original.{ORIGINAL_FORMATS[original_format]}'] = _encode(image, original_format, optimize=True)
+    return files
+
+
+def store(storage, data):
+    """
+    Write the processed files for `data` under its content hash and return
+    the name of the cleaned original. Identical uploads hash to the same
+    directory, so the second one writes nothing.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    directory = image_directory(digest)
+    existing = [name for name in _listdir(storage, directory) if name.startswith('original.')]
+    if existing:
+        return f'{directory}/{existing[0]}'
+
+    files = render(data)
+    # the original goes last: its presence marks the directory complete
+    original = next(name for name in files if name.startswith('original.'))
+    for name in sorted(files, key=lambda name: name == original):
+        path = f'{directory}/{name}'
+        if not storage.exists(path):
+            storage.save(path, ContentFile(files[name]))
+    return f'{directory}/{original}'
+
+
+def _listdir(storage, directory):
+    try:
+        return storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return []
+
+
+def process(model, pk, field_name):
+    """
+    Move one row's raw upload into content-addressed storage. The row is
+    only repointed if it still holds the upload that was processed, so a
+    newer upload that raced this one is left for its own run.
+    """
+    manager = model._default_manager
+    name = manager.filter(pk=pk).values_list(field_name, flat=True).first()
+    if not name or is_processed(name):
+        return None
+
+    storage = model._meta.get_field(field_name).storage
+    try:
+        with storage.open(name, 'rb') as upload:
+            data = upload.read()
+        processed = store(storage, data)
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not process %s %s.%s (%s): %s", model._meta.label, pk, field_name, name, exc)
+        return None
+
+    if manager.filter(pk=pk, **{field_name: name}).update(**{field_name: processed}):
+        # the image URL is embedded in cached catalog responses
+        caching.bump_on_commit(caching.resource_name(model))
+    if not manager.filter(**{field_name: name}).exists():
+        storage.delete(name)
+    return processed
+
+
+# decoding and resizing is CPU bound: keep it from taking over the workers
+@queue.job('images.process', concurrency=2, max_attempts=3)
+def process_job(model, pk, field_name):
+    process(apps.get_model(model), pk, field_name)
+
+
+def run_in_background(model, pk, field_name):
+    queue.enqueue('images.process', model=model._meta.label, pk=pk, field_name=field_name)
+
+
+def _image_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    for field_name in REGISTERED[sender]:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        field_file = getattr(instance, field_name)
+        # rows pointing at files that don't exist (fixtures, seeded data)
+        # have nothing to process
+        if not field_file or is_processed(field_file.name) or not field_file.storage.exists(field_file.name):
+            continue
+        run_in_background(sender, instance.pk, field_name)
+
+
+def register(model, *field_names):
+    REGISTERED[model] = field_names
+    post_save.connect(_image_saved, sender=model, dispatch_uid=f'images-{model._meta.label}')
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    {'thumb', 'card', 'full'} URLs for an image field. Until an upload has
+    been processed every entry points at the raw file, so clients can
+    always pick a size.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant in VARIANTS:
+            url = value.storage.url(variant_name(value.name, variant)) if is_processed(value.name) else value.url
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
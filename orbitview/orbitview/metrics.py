@@ -0,0 +1,112 @@
+import threading
+from bisect import bisect_left
+
+
+# Upper bounds of the histogram buckets; a final +Inf bucket is implied.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'buckets': dict(zip([*map(str, self.bounds), '+Inf'], self.counts)),
+        }
+
+
+class EndpointMetrics:
+    __slots__ = ('latency_ms', 'db_ms', 'app_ms', 'queries', 'over_budget')
+
+    def __init__(self):
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.db_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.app_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.over_budget = 0
+
+
+class MetricsRegistry:
+    """
+    In-process, per-endpoint histograms. Each worker process keeps its own
+    registry; scrape every worker (or sum the Prometheus output) for totals.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, method, latency_ms, db_ms, queries, over_budget):
+        key = (endpoint, method)
+        with self.lock:
+            metrics = self.endpoints.get(key)
+            if metrics is None:
+                metrics = self.endpoints[key] = EndpointMetrics()
+            metrics.latency_ms.observe(latency_ms)
+            metrics.db_ms.observe(db_ms)
+            metrics.app_ms.observe(max(latency_ms - db_ms, 0.0))
+            metrics.queries.observe(queries)
+            metrics.over_budget += over_budget
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                f'{method} {endpoint}': {
+                    'latency_ms': metrics.latency_ms.as_dict(),
+                    'db_ms': metrics.db_ms.as_dict(),
+                    'app_ms': metrics.app_ms.as_dict(),
+                    'queries': metrics.queries.as_dict(),
+                    'over_query_budget': metrics.over_budget,
+                }
+                for (endpoint, method), metrics in sorted(self.endpoints.items())
+            }
+
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            items = sorted(self.endpoints.items())
+            for name, attr, help_text in (
+                ('orbitview_request_latency_ms', 'latency_ms', 'Request latency in milliseconds.'),
+                ('orbitview_request_db_ms', 'db_ms', 'Time spent in database queries per request, in milliseconds.'),
+                ('orbitview_request_app_ms', 'app_ms', 'Request time outside the database, in milliseconds.'),
+                ('orbitview_request_queries', 'queries', 'Database queries per request.'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), metrics in items:
+                    histogram = getattr(metrics, attr)
+                    labels = f'endpoint="{endpoint}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip([*map(str, histogram.bounds), '+Inf'], histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.total:.3f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            lines.append('# HELP orbitview_request_over_query_budget_total Requests that exceeded METRICS_QUERY_BUDGET.')
+            lines.append('# TYPE orbitview_request_over_query_budget_total counter')
+            for (endpoint, method), metrics in items:
+                lines.append(
+                    f'orbitview_request_over_query_budget_total{{endpoint="{endpoint}",method="{method}"}} {metrics.over_budget}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,97 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    # installed with connection.execute_wrapper(), so it works with DEBUG off
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, query count and DB time for every request, keyed by the
+    resolved URL name (e.g. "event-list"), and warns when a request issues more
+    than settings.METRICS_QUERY_BUDGET queries.
+
+    Under ASGI, sync views, the async ORM and thread-sensitive sync_to_async
+    calls all run on the request's one sync thread, so the counter is
+    installed on that thread's connections.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'METRICS_QUERY_BUDGET', 50)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with self.count_queries(counter):
+            response = self.get_response(request)
+        self.record(request, counter, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        stack = await sync_to_async(self.count_queries)(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, counter, (time.perf_counter() - start) * 1000)
+        return response
+
+    def count_queries(self, counter):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        return stack
+
+    def record(self, request, counter, latency_ms):
+        endpoint = self.endpoint_name(request)
+        if endpoint is None:
+            return
+
+        over_budget = counter.count > self.query_budget
+        if over_budget:
+            logger.warning(
+                "%s %s ran %d queries (budget %d) in %.1f ms",
+                request.method, endpoint, counter.count, self.query_budget, latency_ms,
+            )
+        registry.record(endpoint, request.method, latency_ms, counter.seconds * 1000, counter.count, over_budget)
+
+    def endpoint_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # unresolved (404) paths are not recorded to keep the label set bounded
+            return None
+        return match.view_name or match.route
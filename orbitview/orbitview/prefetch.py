@@ -0,0 +1,30 @@
+class PrefetchPlanMixin:
+    """
+    Serializer-side declaration of the relations its representation reads,
+    so views can load them up front instead of once per row:
+
+        select_related = ('host',)
+        prefetch_related = ('category',)
+
+    Nested serializers are covered by listing their relations with the
+    nesting prefix, e.g. 'opportunity__required_skills'.
+    """
+    select_related = ()
+    prefetch_related = ()
+
+    @classmethod
+    def optimize_queryset(cls, queryset):
+        if cls.select_related:
+            queryset = queryset.select_related(*cls.select_related)
+        if cls.prefetch_related:
+            queryset = queryset.prefetch_related(*cls.prefetch_related)
+        return queryset
+
+
+class OptimizedQuerysetMixin:
+    # Applies the serializer's prefetch plan to every list/detail queryset.
+    # Hooked into filter_queryset so views that override get_queryset keep it.
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        optimize = getattr(self.get_serializer_class(), 'optimize_queryset', None)
+        return optimize(queryset) if optimize else queryset
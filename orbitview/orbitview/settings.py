@@ -41,16 +41,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    "debug_toolbar",
     'rest_framework',
     'corsheaders',
     'djoser',
     'users',
     'profiles',
     'resources',
+    'feed',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'orbitview.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -59,9 +61,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# debug_toolbar is a development aid only; it must not run in production
+if DEBUG:
+    INSTALLED_APPS += ["debug_toolbar"]
+    MIDDLEWARE += ["debug_toolbar.middleware.DebugToolbarMiddleware"]
+
+# RequestMetricsMiddleware logs a warning for requests above this many queries
+METRICS_QUERY_BUDGET = int(os.getenv("METRICS_QUERY_BUDGET", 50))
+
 ROOT_URLCONF = 'orbitview.urls'
 
 TEMPLATES = [
@@ -97,6 +106,25 @@ DATABASES = {
 }
 
 
+# Redis in production (shared across workers), per-process memory otherwise.
+# Run more than one worker process only with Redis: response-cache
+# generations, throttle counters and the opportunity index version all have
+# to be seen by every process.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 CORS_ALLOWed_ORIGINS = [
     "https://get-orbitview.vercel.app",
     "https://www.orbitview.net",
@@ -147,13 +175,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'resources.pagination.StandardResultsSetPagination',
+    'DEFAULT_THROTTLE_CLASSES': (
+        'orbitview.throttling.AnonRateThrottle',
+        'orbitview.throttling.UserRateThrottle',
+        'orbitview.throttling.ScopedRateThrottle',
+    ),
     'DEFAULT_THROTTLE_RATES': {
         'anon': '1000/day',  # Limit for unauthenticated users
         'user': '10000/day', # Limit for authenticated users
         'waitlist_user': '10/minute',  # Custom throttle for this endpoint
+        # per-view write limits (throttle_scope)
+        'login': '10/minute',
+        'apply': '30/hour',
+        'reaction': '120/minute',
+        'submission': '20/hour',
     },
 }
 
@@ -161,6 +199,8 @@ SIMPLE_JWT = {
    'AUTH_HEADER_TYPES': ('JWT',),
    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+   'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.TokenObtainPairSerializer',
+   'TOKEN_REFRESH_SERIALIZER': 'users.tokens.TokenRefreshSerializer',
 }
 
 AUTH_USER_MODEL = 'users.CustomUser'
@@ -0,0 +1,16 @@
+from django.core.cache import cache
+
+
+class QueryCountMixin:
+    """
+    For TestCases that pin the query count of every endpoint of an app.
+    Set up several related rows per item, so a missing entry in a
+    serializer's prefetch plan shows up as extra queries.
+    """
+
+    def assertQueries(self, url, count):
+        # a cached response would hide the queries
+        cache.clear()
+        with self.assertNumQueries(count):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
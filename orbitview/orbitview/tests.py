@@ -0,0 +1,183 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from profiles.models import Skill, UserSkill
+from resources.models import Category, Event, Host
+from . import autocomplete
+from .metrics import registry
+from .throttling import SlidingWindowRateThrottle
+
+User = get_user_model()
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass12345',
+    )
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+
+    def test_records_per_endpoint_metrics(self):
+        self.client.get('/api/resources/events/')
+        self.client.get('/api/resources/events/')
+        metrics = registry.snapshot()['GET event-list']
+        self.assertEqual(metrics['latency_ms']['count'], 2)
+        self.assertGreater(metrics['queries']['sum'], 0)
+
+    async def test_records_queries_under_asgi(self):
+        await AsyncClient().get('/api/resources/events/')
+        metrics = registry.snapshot()['GET event-list']
+        self.assertGreater(metrics['queries']['sum'], 0)
+
+    def test_query_budget_warning(self):
+        # the budget is read when the middleware chain is built, so use a new client
+        with self.settings(METRICS_QUERY_BUDGET=0), self.assertLogs('orbitview.middleware', 'WARNING'):
+            APIClient().get('/api/resources/events/')
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.get('/api/resources/events/')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+        admin = create_user('admin')
+        admin.is_staff = True
+        admin.save()
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/metrics/', {'format': 'prometheus'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('orbitview_request_latency_ms_bucket{endpoint="event-list",method="GET",le="+Inf"} 1', response.content.decode())
+
+
+class FourPerMinute(SlidingWindowRateThrottle):
+    rate = '4/min'
+
+    def get_cache_key(self, request, view):
+        return 'throttle_test'
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def check(self, now):
+        throttle = FourPerMinute()
+        throttle.timer = lambda: now
+        return throttle.allow_request(None, None), throttle.wait()
+
+    def test_sliding_window(self):
+        start = 60 * 1000
+        for _ in range(4):
+            self.assertTrue(self.check(start)[0])
+        # the window is full, and 4 * (1 - 15/60) + 1 first fits 15s into the next
+        self.assertEqual(self.check(start + 30), (False, 45))
+        self.assertFalse(self.check(start + 74)[0])
+        self.assertTrue(self.check(start + 75)[0])
+        self.assertFalse(self.check(start + 75)[0])
+
+    def test_login_is_throttled_with_retry_after(self):
+        create_user('orbit')
+        for _ in range(10):
+            self.client.post('/auth/jwt/create/', {'username': 'orbit', 'password': 'wrong'})
+        response = self.client.post('/auth/jwt/create/', {'username': 'orbit', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_reads_do_not_count_against_a_write_scope(self):
+        self.client.force_authenticate(create_user('orbit'))
+        for _ in range(130):
+            self.client.get('/api/resources/reaction/')
+        host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        start = timezone.now() + datetime.timedelta(days=1)
+        event = Event.objects.create(
+            title='Launch', description='-', host=host, url='https://orbitview.net',
+            start_time=start, end_time=start + datetime.timedelta(hours=2),
+            cover_image='media/events/cover_images/event.jpg',
+        )
+        response = self.client.post('/api/resources/reaction/', {'reaction': 'like', 'content_type': 'event', 'object_id': event.pk})
+        self.assertEqual(response.status_code, 201)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete.index.clear()
+        self.client = APIClient()
+        python = Skill.objects.create(name='Python', category='Programming')
+        Skill.objects.create(name='PyTorch', category='Programming')
+        Skill.objects.create(name='Machine Learning', category='AI')
+        for i in range(2):
+            UserSkill.objects.create(user=create_user(f'user{i}'), skill=python, proficiency=3)
+        Category.objects.create(title='Économie')
+        Host.objects.create(name='Python Software Foundation', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+
+    def search(self, q, **params):
+        response = self.client.get('/api/autocomplete/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return {type_name: [item['name'] for item in items] for type_name, items in response.data.items()}
+
+    def test_prefix_matches_are_ranked_by_usage(self):
+        results = self.search('py')
+        self.assertEqual(results['skill'], ['Python', 'PyTorch'])
+        self.assertEqual(results['host'], ['Python Software Foundation'])
+        self.assertEqual(self.search('pyth', type='skill'), {'skill': ['Python']})
+
+    def test_matches_word_starts_ignoring_case_and_accents(self):
+        self.assertEqual(self.search('LEARN', type='skill')['skill'], ['Machine Learning'])
+        self.assertEqual(self.search('econ', type='category')['category'], ['Économie'])
+        self.assertEqual(self.search('soft foun', type='host')['host'], [])
+        self.assertEqual(self.search('software f', type='host')['host'], ['Python Software Foundation'])
+
+    def test_warm_searches_do_not_query(self):
+        self.search('py')
+        with self.assertNumQueries(0):
+            self.search('pyt')
+
+    def test_writes_rebuild_the_index(self):
+        self.search('ru', type='skill')
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='Rust', category='Programming')
+        self.assertEqual(self.search('ru', type='skill'), {'skill': ['Rust']})
+
+    def test_unknown_type(self):
+        self.assertEqual(self.client.get('/api/autocomplete/', {'q': 'py', 'type': 'user'}).status_code, 400)
+
+
+class AutocompleteRebuildTests(TransactionTestCase):
+    # committed writes, so rebuilds run on a background thread
+    def setUp(self):
+        cache.clear()
+        autocomplete.index.clear()
+        Skill.objects.create(name='Python', category='Programming')
+
+    def test_stale_index_is_served_while_rebuilding(self):
+        self.assertEqual(autocomplete.index.search('ru', ['skill']), {'skill': []})
+        Skill.objects.create(name='Rust', category='Programming')
+
+        loading, release = threading.Event(), threading.Event()
+        load = autocomplete.index._load
+
+        def slow_load(type_name):
+            loading.set()
+            release.wait(5)
+            return load(type_name)
+        with mock.patch.object(autocomplete.index, '_load', slow_load):
+            self.assertEqual(autocomplete.index.search('ru', ['skill']), {'skill': []})
+            self.assertTrue(loading.wait(5))
+            # still the previous index, and no second rebuild is started
+            self.assertEqual(autocomplete.index.search('ru', ['skill']), {'skill': []})
+            release.set()
+            with autocomplete.index.locks['skill']:
+                pass
+        self.assertEqual(autocomplete.index.search('ru', ['skill'])['skill'][0]['name'], 'Rust')
@@ -0,0 +1,95 @@
+from rest_framework import throttling
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    """
+    SimpleRateThrottle with a sliding-window counter instead of a list of
+    request timestamps per key. Each key keeps two integers in the shared
+    cache, the counts for the current and the previous fixed window, and
+    the previous count is weighted by how much of that window the sliding
+    window still covers. A check costs a constant number of cache calls and
+    a key's memory doesn't grow with the rate, and since the counters live
+    in the shared cache every worker process enforces the same limit.
+    """
+    wait_seconds = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        window, elapsed = divmod(self.timer(), self.duration)
+        current_key = f'{self.key}:{int(window)}'
+        # counting before checking keeps concurrent requests from all
+        # slipping in under the limit
+        current = self.incr(current_key)
+        previous = self.cache.get(f'{self.key}:{int(window) - 1}', 0)
+        if previous * (1 - elapsed / self.duration) + current <= self.num_requests:
+            return True
+
+        # a rejected request doesn't use up any of the allowance
+        self.cache.decr(current_key)
+        self.wait_seconds = self.time_until_allowed(previous, current - 1, elapsed)
+        return False
+
+    def incr(self, key):
+        # add() only sets a missing key; incr() is atomic on Redis and locmem
+        self.cache.add(key, 0, self.duration * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # expired between the two calls
+            self.cache.set(key, 1, self.duration * 2)
+            return 1
+
+    def time_until_allowed(self, previous, current, elapsed):
+        # the next request fits once previous * weight + current + 1 <= limit
+        limit, duration = self.num_requests, self.duration
+        if current < limit and previous:
+            return max(duration * (1 - (limit - current - 1) / previous) - elapsed, 0)
+        # the current window is full: wait for it to become the previous one
+        # and decay far enough
+        decay = duration * (1 - (limit - 1) / current) if current else 0
+        return duration - elapsed + max(decay, 0)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonRateThrottle(SlidingWindowRateThrottle, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowRateThrottle, throttling.UserRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(SlidingWindowRateThrottle):
+    """
+    Per-view limit on writes: a view sets `throttle_scope` to a rate in
+    DEFAULT_THROTTLE_RATES (a viewset declaring `throttle_scope = None` can
+    pass it per @action). Reads only fall under the anon/user rates.
+    """
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # the rate depends on the view, so it is resolved per request
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope or request.method in SAFE_METHODS:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -2,16 +2,24 @@ from django.contrib import admin
 from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from debug_toolbar.toolbar import debug_toolbar_urls
+from users.views import LoginView
+from .views import MetricsView, AutocompleteView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # ahead of djoser's jwt urls so logins are throttled
+    re_path(r'^auth/jwt/create/?', LoginView.as_view(), name='jwt-create'),
     re_path(r'^auth/', include('djoser.urls')),
     re_path(r'^auth/', include('djoser.urls.jwt')),
     path("api/users/", include("users.urls")),
     path("api/resources/", include("resources.urls")),
     path('api/profiles/', include('profiles.urls')),
-] + debug_toolbar_urls()
+    path('api/feed/', include('feed.urls')),
+    path('api/autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+]
 
 if settings.DEBUG:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+    urlpatterns += debug_toolbar_urls()
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
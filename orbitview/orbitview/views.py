@@ -0,0 +1,49 @@
+from rest_framework import permissions, renderers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import autocomplete
+from .metrics import registry
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset) if isinstance(data, str) else b''
+
+
+# Per-endpoint request metrics collected by RequestMetricsMiddleware.
+# JSON by default, Prometheus text exposition with ?format=prometheus.
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [renderers.JSONRenderer, PrometheusRenderer]
+
+    def get(self, request):
+        if request.accepted_renderer.format == 'prometheus':
+            return Response(registry.prometheus())
+        return Response(registry.snapshot())
+
+
+# Typeahead over skill, skill tag, category and host names:
+# ?q=<prefix>[&type=skill,host][&limit=10]. Served from the in-process
+# index in autocomplete.py, grouped by type and ranked by usage.
+class AutocompleteView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        types = request.query_params.get('type')
+        types = types.split(',') if types else list(autocomplete.SOURCES)
+        unknown = [type_name for type_name in types if type_name not in autocomplete.SOURCES]
+        if unknown:
+            return Response(
+                {'detail': f"Unknown type: {', '.join(unknown)}. Choose from {', '.join(autocomplete.SOURCES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), autocomplete.MAX_LIMIT)
+        except ValueError:
+            limit = 10
+        return Response(autocomplete.index.search(request.query_params.get('q', ''), types, limit))
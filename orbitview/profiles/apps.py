@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ProfilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profiles'
+
+    def ready(self):
+        from orbitview import caching
+        from . import matching, models
+        from .models import Skill
+        matching.connect_signals()
+        models.connect_signals()
+        caching.watch(Skill)
@@ -0,0 +1,14 @@
+from orbitview.async_api import AsyncAPIView, AsyncListView, fetch_all, json_response
+from . import views
+
+
+class AsyncOpportunityListView(AsyncListView):
+    view_class = views.OpportunityViewSet
+
+
+class AsyncProfileDetailView(AsyncAPIView):
+    view_class = views.ProfileDetailView
+
+    async def respond(self, view, request):
+        sections = await fetch_all(*view.get_section_querysets(request.user))
+        return json_response(view.build_response_data(*sections))
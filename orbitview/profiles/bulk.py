@@ -0,0 +1,251 @@
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from feed import fanout
+
+
+DOES_NOT_EXIST = 'Invalid pk "{pk_value}" - object does not exist.'
+
+
+class BulkSerializerMixin:
+    """
+    Lets a model serializer be written in batches through `BulkListSerializer`.
+
+        bulk_many_to_many = {'skill_ids': 'skills'}
+        bulk_foreign_keys = ('skill',)
+
+    In bulk mode (`context['bulk']`) those fields take plain ids, which the
+    list serializer checks with one query per related model instead of one
+    per item.
+    """
+    bulk_many_to_many = {}
+    bulk_foreign_keys = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('bulk'):
+            for name in self.bulk_many_to_many:
+                fields[name] = serializers.ListField(
+                    child=serializers.IntegerField(), write_only=True, required=False
+                )
+            for name in self.bulk_foreign_keys:
+                fields[name] = serializers.IntegerField(source=f'{name}_id')
+        return fields
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Creates or updates a batch with one bulk_create/bulk_update on the model
+    and one bulk insert per many-to-many through table. Errors are reported
+    per item, as a list aligned with the input where valid items are `{}`.
+
+    For updates `instance` is an {id: object} mapping and every item carries
+    the `id` it applies to.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                'non_field_errors': [self.error_messages['not_a_list'].format(input_type=type(data).__name__)]
+            })
+        if not data:
+            raise serializers.ValidationError({'non_field_errors': [self.error_messages['empty']]})
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError({
+                'non_field_errors': [self.error_messages['max_length'].format(max_length=self.max_length)]
+            })
+
+        items, errors = [], []
+        seen = set()
+        for item in data:
+            try:
+                if self.instance is not None:
+                    self.child.instance = self.get_target(item, seen)
+                attrs = self.child.run_validation(item)
+                if self.instance is not None:
+                    attrs['id'] = self.child.instance.pk
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+            else:
+                items.append(attrs)
+                errors.append({})
+        self.child.instance = None
+
+        self.validate_references(items, errors)
+        self.validate_items(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def get_target(self, item, seen):
+        pk = item.get('id') if isinstance(item, dict) else None
+        if pk in seen:
+            raise serializers.ValidationError({'id': ['Duplicate id in this batch.']})
+        seen.add(pk)
+        try:
+            return self.instance[int(pk)]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError({'id': ['Not found.']})
+
+    def validate_references(self, items, errors):
+        model = self.child.Meta.model
+        references = [
+            (name, model._meta.get_field(relation).related_model, True)
+            for name, relation in self.child.bulk_many_to_many.items()
+        ] + [
+            (name, model._meta.get_field(name).related_model, False)
+            for name in self.child.bulk_foreign_keys
+        ]
+        for name, related_model, many in references:
+            key = name if many else f'{name}_id'
+            wanted = set()
+            for attrs in items:
+                if attrs and key in attrs:
+                    wanted.update(attrs[key] if many else [attrs[key]])
+            if not wanted:
+                continue
+            found = set(related_model._default_manager.filter(pk__in=wanted).values_list('pk', flat=True))
+            for attrs, item_errors in zip(items, errors):
+                if not attrs or key not in attrs:
+                    continue
+                missing = [pk for pk in (attrs[key] if many else [attrs[key]]) if pk not in found]
+                if missing:
+                    item_errors[name] = [DOES_NOT_EXIST.format(pk_value=pk) for pk in missing]
+
+    def validate_items(self, items, errors):
+        # hook for checks across the whole batch, e.g. uniqueness
+        pass
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        relations = [self.pop_relations(attrs) for attrs in validated_data]
+        with transaction.atomic():
+            objects = model.objects.bulk_create([model(**attrs) for attrs in validated_data])
+            self.write_relations(objects, relations)
+            fanout.items_saved(model, objects)
+        return objects
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        objects, fields = [], set()
+        relations = []
+        for attrs in validated_data:
+            relations.append(self.pop_relations(attrs))
+            obj = instance[attrs.pop('id')]
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+            fields.update(attrs)
+            objects.append(obj)
+        with transaction.atomic():
+            if fields:
+                model.objects.bulk_update(objects, sorted(fields))
+            self.write_relations(objects, relations, replace=True)
+            fanout.items_saved(model, objects)
+        return objects
+
+    def pop_relations(self, attrs):
+        return {
+            relation: attrs.pop(name)
+            for name, relation in self.child.bulk_many_to_many.items()
+            if name in attrs
+        }
+
+    def write_relations(self, objects, relations, replace=False):
+        model = self.child.Meta.model
+        for relation in self.child.bulk_many_to_many.values():
+            field = model._meta.get_field(relation)
+            through = field.remote_field.through
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+
+            changed = [(obj, values[relation]) for obj, values in zip(objects, relations) if relation in values]
+            if not changed:
+                continue
+            if replace:
+                through.objects.filter(**{f'{source}__in': [obj.pk for obj, _ in changed]}).delete()
+            through.objects.bulk_create([
+                through(**{source: obj.pk, target: pk})
+                for obj, pks in changed
+                for pk in dict.fromkeys(pks)
+            ])
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
+class BulkModelMixin:
+    """
+    Adds `<prefix>/bulk/` to an owner-scoped viewset:
+
+        POST    [{...}, ...]              create, 201
+        PATCH   [{"id": 1, ...}, ...]     partial update, 200
+        DELETE  {"ids": [1, 2, ...]}      delete, 204
+
+    Each request is all-or-nothing; a 400 carries one error entry per item.
+    """
+    bulk_max_size = 100
+
+    def get_bulk_queryset(self):
+        return self.get_serializer_class().Meta.model.objects.filter(user=self.request.user)
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        context = {**self.get_serializer_context(), 'bulk': True}
+        return self.get_serializer(*args, many=True, max_length=self.bulk_max_size, context=context, **kwargs)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_destroy(request)
+
+    def bulk_create(self, request):
+        serializer = self.get_bulk_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        objects = self.perform_bulk_create(serializer)
+        return Response(self.bulk_representation(objects), status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        items = request.data if isinstance(request.data, list) else []
+        ids = [item['id'] for item in items if isinstance(item, dict) and isinstance(item.get('id'), int)]
+        instances = self.get_bulk_queryset().in_bulk(ids)
+        serializer = self.get_bulk_serializer(instances, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        objects = self.perform_bulk_update(serializer)
+        return Response(self.bulk_representation(objects))
+
+    def bulk_destroy(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        queryset = self.get_bulk_queryset().filter(pk__in=ids)
+        found = set(queryset.values_list('pk', flat=True))
+        if len(found) != len(set(ids)):
+            return Response(
+                {'ids': [{} if pk in found else {'id': ['Not found.']} for pk in ids]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        self.perform_bulk_destroy(queryset)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_bulk_create(self, serializer):
+        return serializer.save(user=self.request.user)
+
+    def perform_bulk_update(self, serializer):
+        return serializer.save()
+
+    def perform_bulk_destroy(self, queryset):
+        with transaction.atomic():
+            queryset.delete()
+
+    def bulk_representation(self, objects):
+        # reload through the serializer's prefetch plan, keeping input order
+        serializer_class = self.get_serializer_class()
+        queryset = serializer_class.Meta.model.objects.filter(pk__in=[obj.pk for obj in objects])
+        loaded = serializer_class.optimize_queryset(queryset).in_bulk()
+        return self.get_serializer([loaded[obj.pk] for obj in objects], many=True).data
@@ -0,0 +1,16 @@
+import django_filters
+
+from .models import OpportunityApplication
+
+
+class ApplicationExportFilter(django_filters.FilterSet):
+    # ?status=PENDING&status=REVIEWING, ?applied_after=/?applied_before= are
+    # inclusive dates, ?opportunity= narrows to one posting
+    status = django_filters.MultipleChoiceFilter(choices=OpportunityApplication.STATUS_CHOICES)
+    applied_after = django_filters.DateFilter(field_name='applied_date', lookup_expr='date__gte')
+    applied_before = django_filters.DateFilter(field_name='applied_date', lookup_expr='date__lte')
+    opportunity = django_filters.NumberFilter(field_name='opportunity_id')
+
+    class Meta:
+        model = OpportunityApplication
+        fields = ['status', 'opportunity']
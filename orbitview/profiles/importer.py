@@ -0,0 +1,410 @@
+"""
+Streaming import of résumé / LinkedIn-export data into profile sections.
+
+Records are read lazily (CSV, NDJSON, or a JSON array decoded incrementally)
+and written in fixed-size batches, so memory stays bounded by the batch size
+however large the export is. Each record is one row of work history,
+education, skills, certifications or projects:
+
+    {"type": "position", "user": "ada@example.com", "company_name": "OrbitView",
+     "title": "Engineer", "started_on": "Jan 2020", "skills": "Python; Django"}
+
+Column names follow LinkedIn's export files (Positions.csv, Education.csv,
+Skills.csv, Certifications.csv, Projects.csv); plain names such as
+`organization` or `start_date` work too.
+"""
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from feed import fanout
+from orbitview import caching
+from . import matching
+from .models import Skill, UserSkill, Achievement, Project, CareerTimeline
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+USER_CACHE_SIZE = 10000
+IMPORTED_SKILL_CATEGORY = 'Other'
+
+SECTIONS = {
+    'position': 'position', 'positions': 'position', 'work': 'position', 'experience': 'position',
+    'education': 'education',
+    'skill': 'skill', 'skills': 'skill',
+    'certification': 'certification', 'certifications': 'certification',
+    'project': 'project', 'projects': 'project',
+}
+FORMATS = ('csv', 'json', 'ndjson')
+# columns that may hold a JSON list instead of a delimited string
+LIST_FIELDS = {'skills'}
+DATE_FORMATS = ('%Y-%m-%d', '%b %Y', '%B %Y', '%Y-%m', '%m/%Y', '%m/%d/%Y', '%Y')
+
+
+class ImportDataError(ValueError):
+    pass
+
+
+# Readers
+
+def iter_json_array(stream, chunk_size=64 * 1024):
+    """Yield the items of a top-level JSON array without reading it all."""
+    decoder = json.JSONDecoder()
+    buffer, started = '', False
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    break
+                if buffer[0] != '[':
+                    raise ImportDataError("Expected a JSON array of records.")
+                buffer, started = buffer[1:], True
+                continue
+            if buffer.startswith(','):
+                buffer = buffer[1:]
+                continue
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break  # incomplete item, read more
+            buffer = buffer[end:]
+            yield item
+        if not chunk:
+            raise ImportDataError("Malformed or truncated JSON array.")
+
+
+def iter_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ImportDataError(f"Invalid JSON line: {exc}")
+
+
+def read_records(stream, format):
+    # `stream` is text; see open_upload() for binary uploads
+    if format == 'csv':
+        return csv.DictReader(stream)
+    if format == 'ndjson':
+        return iter_ndjson(stream)
+    if format == 'json':
+        return iter_json_array(stream)
+    raise ImportDataError(f"Unsupported format {format!r}; use one of {', '.join(FORMATS)}.")
+
+
+def open_upload(upload):
+    return io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+
+
+def guess_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'jsonl': 'ndjson'}.get(extension, extension)
+
+
+# Field helpers
+
+def normalize(record):
+    # every value comes out as a stripped string (a list of them for
+    # LIST_FIELDS), so the builders never see JSON numbers or objects
+    if not isinstance(record, dict):
+        raise ImportDataError("Record is not an object.")
+    normalized = {}
+    for key, value in record.items():
+        key = str(key).strip().lower().replace(' ', '_').replace('-', '_')
+        if isinstance(value, list) and key in LIST_FIELDS:
+            value = [item for item in (scalar(item, key) for item in value) if item]
+        else:
+            value = scalar(value, key)
+        if value:
+            normalized[key] = value
+    return normalized
+
+
+def scalar(value, key):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        raise ImportDataError(f"{key}: expected a single value.")
+    return str(value).strip()
+
+
+def pick(record, *names, default=None):
+    for name in names:
+        if name in record:
+            return record[name]
+    return default
+
+
+def parse_url(value):
+    if value is not None and len(str(value)) > 200:
+        raise ImportDataError("URLs are limited to 200 characters.")
+    return value
+
+
+def parse_date(value, field):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = str(int(value))
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ImportDataError(f"{field}: unrecognised date {value!r}.")
+
+
+def parse_skill_names(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace(';', ',').split(',')
+    return [str(name).strip() for name in value if str(name).strip()]
+
+
+class SkillSlugCache:
+    """
+    slug -> Skill id, filled as an import goes. Unknown slugs are looked up
+    once per batch and created in one bulk insert if still missing.
+    `attempted` counts those inserts: ignore_conflicts doesn't say which
+    rows a concurrent import got to first, so it is not a count of rows
+    this import created.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.attempted = 0
+
+    def resolve(self, names):
+        wanted = {}
+        for name in names:
+            slug = slugify(name)[:50]
+            if slug and slug not in self.ids:
+                wanted.setdefault(slug, name[:100])
+        if not wanted:
+            return
+
+        self.ids.update(Skill.objects.filter(slug__in=wanted).values_list('slug', 'id'))
+        missing = [slug for slug in wanted if slug not in self.ids]
+        if missing:
+            # ignore_conflicts: a concurrent import (or a clashing name) may
+            # have created it meanwhile; the re-read below picks up the winner
+            Skill.objects.bulk_create(
+                [Skill(name=wanted[slug], slug=slug, category=IMPORTED_SKILL_CATEGORY) for slug in missing],
+                ignore_conflicts=True,
+            )
+            self.ids.update(Skill.objects.filter(slug__in=missing).values_list('slug', 'id'))
+            self.attempted += len(missing)
+
+    def ids_for(self, names):
+        ids = (self.ids.get(slugify(name)[:50]) for name in names)
+        return list(dict.fromkeys(skill_id for skill_id in ids if skill_id))
+
+
+class ProfileImporter:
+    def __init__(self, user=None, section=None, batch_size=BATCH_SIZE):
+        # `user` owns every record (the upload endpoint); otherwise each
+        # record names its owner by username or email in a `user` column
+        self.user = user
+        self.section = section
+        self.batch_size = batch_size
+        self.skills = SkillSlugCache()
+        self.users = {}
+        self.counts = {'position': 0, 'education': 0, 'skill': 0, 'certification': 0, 'project': 0}
+        self.processed = 0
+        self.errors = []
+        self.error_count = 0
+
+    def run(self, records):
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        if self.skills.attempted:
+            caching.bump_on_commit(caching.resource_name(Skill))
+        return self.summary()
+
+    def summary(self):
+        return {
+            'processed': self.processed,
+            'imported': self.counts,
+            'skills_attempted': self.skills.attempted,
+            'failed': self.error_count,
+            'errors': self.errors,
+        }
+
+    def error(self, index, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'record': index, 'error': message})
+
+    def import_batch(self, batch):
+        start = self.processed
+        self.processed += len(batch)
+
+        parsed = []
+        for offset, record in enumerate(batch):
+            try:
+                record = normalize(record)
+                section = SECTIONS.get(str(pick(record, 'type', 'section', default=self.section or '')).lower())
+                if section is None:
+                    raise ImportDataError("Unknown or missing record type.")
+                parsed.append((start + offset, section, record))
+            except ImportDataError as exc:
+                self.error(start + offset, str(exc))
+
+        owners = self.resolve_users([record for _, _, record in parsed])
+        self.skills.resolve(
+            name
+            for _, section, record in parsed
+            for name in ([pick(record, 'name', 'skill')] if section == 'skill' else parse_skill_names(record.get('skills')))
+            if name
+        )
+
+        rows = {model: [] for model in (CareerTimeline, Achievement, Project, UserSkill)}
+        for index, section, record in parsed:
+            try:
+                owner = self.user.pk if self.user else owners.get(str(record.get('user', '')).lower())
+                if owner is None:
+                    raise ImportDataError("Unknown user.")
+                instance, skill_ids = getattr(self, f'build_{section}')(record, owner)
+            except ImportDataError as exc:
+                self.error(index, str(exc))
+                continue
+            rows[type(instance)].append((section, instance, skill_ids))
+
+        with transaction.atomic():
+            for model, items in rows.items():
+                if items:
+                    self.write(model, items)
+
+        touched = {instance.user_id for _, instance, _ in rows[UserSkill]}
+        for user_id in touched:
+            matching.invalidate_user_vector(user_id)
+
+    def write(self, model, items):
+        if model is UserSkill:
+            # a user's existing skills are kept as they are
+            existing = set(UserSkill.objects.filter(
+                user_id__in={instance.user_id for _, instance, _ in items},
+                skill_id__in={instance.skill_id for _, instance, _ in items},
+            ).values_list('user_id', 'skill_id'))
+            new = {}
+            for _, instance, _ in items:
+                key = (instance.user_id, instance.skill_id)
+                if key not in existing:
+                    new.setdefault(key, instance)
+            UserSkill.objects.bulk_create(new.values(), ignore_conflicts=True)
+            self.counts['skill'] += len(new)
+            return
+
+        created = model.objects.bulk_create([instance for _, instance, _ in items])
+        for section, _, _ in items:
+            self.counts[section] += 1
+        through = model.skills.through
+        through.objects.bulk_create([
+            through(**{f'{model._meta.model_name}_id': instance.pk, 'skill_id': skill_id})
+            for instance, (_, _, skill_ids) in zip(created, items)
+            for skill_id in skill_ids
+        ])
+        fanout.items_saved(model, created)
+
+    def resolve_users(self, records):
+        keys = {str(record['user']).lower() for record in records if 'user' in record} - set(self.users)
+        if self.user or not keys:
+            return self.users
+        if len(self.users) > USER_CACHE_SIZE:
+            self.users.clear()
+        for pk, username, email in User.objects.filter(
+            Q(username__in=keys) | Q(email__in=keys)
+        ).values_list('pk', 'username', 'email'):
+            self.users[username.lower()] = pk
+            self.users[email.lower()] = pk
+        return self.users
+
+    # Builders: record -> (unsaved instance, skill ids)
+
+    def build_position(self, record, owner):
+        return self.timeline_entry(
+            record, owner, 'Work Experience',
+            title=pick(record, 'title', 'position', 'role'),
+            organization=pick(record, 'company_name', 'company', 'organization', 'employer'),
+        )
+
+    def build_education(self, record, owner):
+        school = pick(record, 'school_name', 'school', 'institution', 'organization')
+        return self.timeline_entry(
+            record, owner, 'Education',
+            title=pick(record, 'degree_name', 'degree', 'title', default=school),
+            organization=school,
+        )
+
+    def timeline_entry(self, record, owner, entry_type, title, organization):
+        if not title or not organization:
+            raise ImportDataError("A title and an organization are required.")
+        start_date = parse_date(pick(record, 'started_on', 'start_date', 'start'), 'start date')
+        if start_date is None:
+            raise ImportDataError("A start date is required.")
+        end_date = parse_date(pick(record, 'finished_on', 'end_date', 'end'), 'end date')
+        entry = CareerTimeline(
+            user_id=owner, title=title[:200], organization=organization[:200],
+            description=pick(record, 'description', 'notes', 'activities', default=''),
+            start_date=start_date, end_date=end_date, is_current=end_date is None,
+            entry_type=entry_type,
+        )
+        return entry, self.skills.ids_for(parse_skill_names(record.get('skills')))
+
+    def build_skill(self, record, owner):
+        name = pick(record, 'name', 'skill')
+        skill_ids = self.skills.ids_for([name]) if name else []
+        if not skill_ids:
+            raise ImportDataError("A skill name is required.")
+        try:
+            proficiency = min(max(int(pick(record, 'proficiency', default=2)), 1), 4)
+            years = Decimal(str(pick(record, 'years_experience', 'years', default=0))).quantize(Decimal('0.1'))
+        except (TypeError, ValueError, InvalidOperation):
+            raise ImportDataError("Proficiency and years of experience must be numbers.")
+        return UserSkill(user_id=owner, skill_id=skill_ids[0], proficiency=proficiency, years_experience=years), []
+
+    def build_certification(self, record, owner):
+        title = pick(record, 'name', 'title')
+        date = parse_date(pick(record, 'started_on', 'date_achieved', 'date', 'finished_on'), 'date')
+        if not title or date is None:
+            raise ImportDataError("A name and a date are required.")
+        achievement = Achievement(
+            user_id=owner, title=title[:200], achievement_type='CERT',
+            description=pick(record, 'description', 'license_number', default=''),
+            date_achieved=date, issuer=str(pick(record, 'authority', 'issuer', default=''))[:200],
+            verification_url=parse_url(pick(record, 'url', 'verification_url')),
+        )
+        return achievement, self.skills.ids_for(parse_skill_names(record.get('skills')))
+
+    def build_project(self, record, owner):
+        title = pick(record, 'title', 'name')
+        start_date = parse_date(pick(record, 'started_on', 'start_date', 'start'), 'start date')
+        if not title or start_date is None:
+            raise ImportDataError("A title and a start date are required.")
+        end_date = parse_date(pick(record, 'finished_on', 'end_date', 'end'), 'end date')
+        project = Project(
+            user_id=owner, title=title[:200], description=pick(record, 'description', default=''),
+            start_date=start_date, end_date=end_date, is_ongoing=end_date is None,
+            live_url=parse_url(pick(record, 'url', 'live_url')), github_url=parse_url(pick(record, 'github_url')),
+        )
+        return project, self.skills.ids_for(parse_skill_names(record.get('skills')))
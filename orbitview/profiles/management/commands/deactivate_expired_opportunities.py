@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from profiles import matching
+from profiles.models import Opportunity
+from resources import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate active opportunities whose deadline has passed, in batches. "
+        "Meant to run daily (cron or the job worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deactivated = 0
+        while True:
+            # each batch is a short UPDATE on ids read from the deadline index
+            ids = list(Opportunity.objects.expired().order_by('deadline').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deactivated += Opportunity.objects.filter(pk__in=ids, is_active=True).update(is_active=False)
+            search.remove_ids(Opportunity, ids)
+
+        if deactivated:
+            # update() skips post_save, so drop the recommendation index here
+            # (search documents are removed per batch above)
+            matching.opportunity_index.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Deactivated {deactivated} expired opportunities."))
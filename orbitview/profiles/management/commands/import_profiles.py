@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from profiles import importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a résumé / LinkedIn export (CSV, NDJSON or JSON array) into "
+        "profile sections in fixed-size batches. Records name their owner in a "
+        "`user` column (username or email) unless --user is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=importer.FORMATS, help="defaults to the file extension")
+        parser.add_argument('--type', choices=sorted(importer.SECTIONS), help="record type for files without a `type` column")
+        parser.add_argument('--user', help="username or email owning every record")
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(
+                Q(username=options['user']) | Q(email=options['user'])
+            ).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']!r}.")
+
+        format = options['format'] or importer.guess_format(options['path'])
+        profile_importer = importer.ProfileImporter(
+            user=user, section=options['type'], batch_size=options['batch_size']
+        )
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                summary = profile_importer.run(importer.read_records(stream, format))
+        except (OSError, importer.ImportDataError, UnicodeDecodeError) as exc:
+            raise CommandError(f"{exc} ({profile_importer.processed} records processed before the error)")
+
+        for error in summary['errors']:
+            self.stderr.write(f"record {error['record']}: {error['error']}")
+        imported = ', '.join(f"{count} {section}" for section, count in summary['imported'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {summary['processed']} records: imported {imported}; "
+            f"attempted to create {summary['skills_attempted']} new skills; {summary['failed']} failed."
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from profiles.models import OpportunityApplication, OpportunityStatusCount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized OpportunityStatusCount table from the raw application rows."
+
+    def handle(self, *args, **options):
+        totals = (
+            OpportunityApplication.objects
+            .values('opportunity_id')
+            .annotate(**{
+                field: Count('id', filter=Q(status=status))
+                for status, field in OpportunityStatusCount.STATUS_FIELDS.items()
+            })
+            .order_by()
+        )
+
+        with transaction.atomic():
+            OpportunityStatusCount.objects.all().delete()
+            created = OpportunityStatusCount.objects.bulk_create(
+                (OpportunityStatusCount(**row) for row in totals.iterator()),
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt application counts for {len(created)} opportunities."))
@@ -0,0 +1,240 @@
+import heapq
+import threading
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .models import UserSkill, Opportunity
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - scoring falls back to pure Python
+    np = None
+
+
+USER_VECTOR_KEY = 'profiles:skill-vector:{user_id}'
+INDEX_VERSION_KEY = 'profiles:opportunity-skill-index:version'
+USER_VECTOR_TIMEOUT = 60 * 60
+
+MAX_YEARS = 10
+VERIFIED_BONUS = 1.25
+
+
+def skill_weight(proficiency, years_experience, is_verified):
+    # proficiency dominates, experience adds up to +50%, verification +25%
+    years = min(float(years_experience or Decimal(0)), MAX_YEARS)
+    weight = (proficiency / 4) * (1 + 0.5 * years / MAX_YEARS)
+    return weight * VERIFIED_BONUS if is_verified else weight
+
+
+def get_user_vector(user_id):
+    """
+    Sparse {skill_id: weight} vector for a user, cached until one of their
+    UserSkill rows changes.
+    """
+    key = USER_VECTOR_KEY.format(user_id=user_id)
+    vector = cache.get(key)
+    if vector is None:
+        rows = UserSkill.objects.filter(user_id=user_id).values_list(
+            'skill_id', 'proficiency', 'years_experience', 'is_verified'
+        )
+        vector = {skill_id: skill_weight(*rest) for skill_id, *rest in rows}
+        cache.set(key, vector, USER_VECTOR_TIMEOUT)
+    return vector
+
+
+def invalidate_user_vector(user_id):
+    cache.delete(USER_VECTOR_KEY.format(user_id=user_id))
+
+
+class OpportunitySkillIndex:
+    """
+    In-process index of the required skills of every active opportunity.
+
+    Opportunities are kept as sparse rows keyed by Skill id and packed into
+    flat arrays (CSR layout) for scoring. Signal handlers update rows in place;
+    a version number in the shared cache tells other processes to reload.
+    That needs a cache shared by every worker process (REDIS_URL): with the
+    per-process LocMemCache fallback, a write in one process never reaches
+    the others' indexes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = None
+        self.version = None
+        self.packed = None
+
+    def _load(self):
+        rows = {}
+        through = Opportunity.required_skills.through.objects.filter(opportunity__in=Opportunity.objects.live())
+        for opportunity_id, skill_id in through.values_list('opportunity_id', 'skill_id').iterator():
+            rows.setdefault(opportunity_id, []).append(skill_id)
+        return rows
+
+    def _ensure_loaded(self):
+        if not self._is_current():
+            self.version = cache.get(INDEX_VERSION_KEY)
+            self.rows = self._load()
+            self.packed = None
+
+    def _bump_version(self):
+        cache.add(INDEX_VERSION_KEY, 0, None)
+        try:
+            return cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            # evicted between the two calls
+            cache.set(INDEX_VERSION_KEY, 1, None)
+            return 1
+
+    def _is_current(self):
+        return self.rows is not None and cache.get(INDEX_VERSION_KEY) == self.version
+
+    def _patch(self, change):
+        # the rows are only patched if the bump lands right after the
+        # version they were loaded at; otherwise another process changed
+        # the index too, and its change is only picked up by a reload
+        with self.lock:
+            version = self._bump_version()
+            if self.rows is None or self.version is None or version != self.version + 1:
+                self.rows = None
+            else:
+                change(self.rows)
+                self.version = version
+            self.packed = None
+
+    def update(self, opportunity_id):
+        # same rule as _load(): a passed deadline takes it out too
+        skill_ids = list(
+            Opportunity.required_skills.through.objects
+            .filter(opportunity__in=Opportunity.objects.live().filter(pk=opportunity_id))
+            .values_list('skill_id', flat=True)
+        )
+
+        def change(rows):
+            rows.pop(opportunity_id, None)
+            if skill_ids:
+                rows[opportunity_id] = skill_ids
+        self._patch(change)
+
+    def remove(self, opportunity_id):
+        self._patch(lambda rows: rows.pop(opportunity_id, None))
+
+    def invalidate(self):
+        with self.lock:
+            self.rows = None
+            self.packed = None
+            self._bump_version()
+
+    def _pack(self):
+        opportunity_ids, offsets, skill_ids = [], [0], []
+        for opportunity_id, skills in self.rows.items():
+            opportunity_ids.append(opportunity_id)
+            skill_ids.extend(skills)
+            offsets.append(len(skill_ids))
+        if np is not None:
+            return np.array(opportunity_ids, dtype=np.int64), np.array(offsets, dtype=np.int64), np.array(skill_ids, dtype=np.int64)
+        return opportunity_ids, offsets, skill_ids
+
+    def top_k(self, user_vector, k=20, exclude=()):
+        """
+        Return [(opportunity_id, score)] for the k best matches. The score is
+        the mean user weight over an opportunity's required skills.
+        """
+        with self.lock:
+            self._ensure_loaded()
+            if self.packed is None:
+                self.packed = self._pack()
+            opportunity_ids, offsets, skill_ids = self.packed
+
+        if not user_vector or len(opportunity_ids) == 0:
+            return []
+        if np is not None:
+            return self._top_k_numpy(user_vector, k, exclude, opportunity_ids, offsets, skill_ids)
+        return self._top_k_python(user_vector, k, exclude, opportunity_ids, offsets, skill_ids)
+
+    def _top_k_numpy(self, user_vector, k, exclude, opportunity_ids, offsets, skill_ids):
+        # densify the user's handful of skills over the index's skill ids
+        user_skill_ids = np.fromiter(user_vector.keys(), dtype=np.int64)
+        user_weights = np.fromiter(user_vector.values(), dtype=np.float64)
+        order = np.argsort(user_skill_ids)
+        user_skill_ids, user_weights = user_skill_ids[order], user_weights[order]
+
+        positions = np.searchsorted(user_skill_ids, skill_ids)
+        positions = np.minimum(positions, len(user_skill_ids) - 1)
+        matched = user_skill_ids[positions] == skill_ids
+        weights = np.where(matched, user_weights[positions], 0.0)
+
+        scores = np.add.reduceat(weights, offsets[:-1]) / np.diff(offsets)
+        if exclude:
+            scores[np.isin(opportunity_ids, list(exclude))] = 0.0
+
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [
+            (int(opportunity_ids[i]), float(scores[i]))
+            for i in best if scores[i] > 0
+        ]
+
+    def _top_k_python(self, user_vector, k, exclude, opportunity_ids, offsets, skill_ids):
+        scored = []
+        for i, opportunity_id in enumerate(opportunity_ids):
+            if opportunity_id in exclude:
+                continue
+            required = skill_ids[offsets[i]:offsets[i + 1]]
+            score = sum(user_vector.get(skill_id, 0.0) for skill_id in required) / len(required)
+            if score > 0:
+                scored.append((score, -i, opportunity_id))
+        return [(opportunity_id, score) for score, _, opportunity_id in heapq.nlargest(k, scored)]
+
+
+opportunity_index = OpportunitySkillIndex()
+
+
+def recommend(user, k=20):
+    applied = set(user.applications.values_list('opportunity_id', flat=True))
+    return opportunity_index.top_k(get_user_vector(user.pk), k=k, exclude=applied)
+
+
+def _user_skill_changed(sender, instance, **kwargs):
+    invalidate_user_vector(instance.user_id)
+
+
+# The index is shared with other requests and processes, so it only takes
+# changes once they are committed; a rollback leaves it untouched.
+
+def _opportunity_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        opportunity_id = instance.pk
+        transaction.on_commit(lambda: opportunity_index.update(opportunity_id))
+
+
+def _opportunity_deleted(sender, instance, **kwargs):
+    opportunity_id = instance.pk
+    transaction.on_commit(lambda: opportunity_index.remove(opportunity_id))
+
+
+def _required_skills_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # edited from the Skill side; rare enough to just reload everything
+        transaction.on_commit(opportunity_index.invalidate)
+    else:
+        opportunity_id = instance.pk
+        transaction.on_commit(lambda: opportunity_index.update(opportunity_id))
+
+
+def connect_signals():
+    post_save.connect(_user_skill_changed, sender=UserSkill, dispatch_uid='matching-user-skill-saved')
+    post_delete.connect(_user_skill_changed, sender=UserSkill, dispatch_uid='matching-user-skill-deleted')
+    post_save.connect(_opportunity_saved, sender=Opportunity, dispatch_uid='matching-opportunity-saved')
+    post_delete.connect(_opportunity_deleted, sender=Opportunity, dispatch_uid='matching-opportunity-deleted')
+    m2m_changed.connect(
+        _required_skills_changed,
+        sender=Opportunity.required_skills.through,
+        dispatch_uid='matching-required-skills-changed',
+    )
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counts(apps, schema_editor):
+    OpportunityApplication = apps.get_model('profiles', 'OpportunityApplication')
+    OpportunityStatusCount = apps.get_model('profiles', 'OpportunityStatusCount')
+    statuses = ['PENDING', 'REVIEWING', 'SHORTLISTED', 'REJECTED', 'ACCEPTED']
+    totals = (
+        OpportunityApplication.objects.values('opportunity_id')
+        .annotate(**{status.lower(): Count('id', filter=Q(status=status)) for status in statuses})
+        .order_by()
+    )
+    OpportunityStatusCount.objects.bulk_create(
+        (OpportunityStatusCount(**row) for row in totals.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_opportunity_posted_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpportunityStatusCount',
+            fields=[
+                ('opportunity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='status_counts', serialize=False, to='profiles.opportunity')),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('reviewing', models.PositiveIntegerField(default=0)),
+                ('shortlisted', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
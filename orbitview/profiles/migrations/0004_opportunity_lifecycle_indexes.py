@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_opportunitystatuscount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='opportunity',
+            name='opportunity_posted_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-posted_date', '-id'], name='opportunity_live_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=models.Index(condition=models.Q(('deadline__isnull', False), ('is_active', True)), fields=['deadline'], name='opportunity_deadline_idx'),
+        ),
+    ]
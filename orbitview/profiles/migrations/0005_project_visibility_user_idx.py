@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_opportunity_lifecycle_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['visibility', 'user'], name='project_visibility_user_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Greatest
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 
+from users.graph import connection_ids
+
 
 class Skill(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -38,6 +42,25 @@ class Achievement(models.Model):
     def __str__(self):
         return f"{self.title} - {self.issuer}"
 
+class ProjectQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # Own projects, public ones, and CONNECTIONS ones whose owner is a
+        # mutual connection (or that list the user as a collaborator). The
+        # collaborator ids are read first off the through table's user index,
+        # so every branch below is an index lookup on this table alone and the
+        # OR is planned as a union of index scans, with no join or DISTINCT.
+        collaborators = self.model.collaborators
+        collaborated = list(
+            collaborators.through.objects.filter(**{collaborators.field.m2m_reverse_field_name(): user.pk})
+            .values_list('project_id', flat=True)
+        )
+        return self.filter(
+            models.Q(user_id=user.pk)
+            | models.Q(visibility='PUBLIC')
+            | models.Q(visibility='CONNECTIONS', user_id__in=connection_ids(user.pk))
+            | models.Q(visibility='CONNECTIONS', id__in=collaborated)
+        )
+
 class Project(models.Model):
     VISIBILITY_CHOICES = [
         ('PUBLIC', 'Public'),
@@ -56,6 +79,13 @@ class Project(models.Model):
     live_url = models.URLField(blank=True, null=True)
     skills = models.ManyToManyField(Skill, related_name='projects')
     collaborators = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='collaborated_projects', blank=True)
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['visibility', 'user'], name='project_visibility_user_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.user.get_full_name()}"
@@ -99,6 +129,18 @@ class UserSkill(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.skill.name} ({self.get_proficiency_display()})"
 
+class OpportunityQuerySet(models.QuerySet):
+    # A posting is live while it is active and its deadline (inclusive) has
+    # not passed; `manage.py deactivate_expired_opportunities` flips
+    # is_active on the rest so the partial indexes stay small.
+    def live(self):
+        return self.filter(is_active=True).filter(
+            models.Q(deadline__isnull=True) | models.Q(deadline__gte=timezone.localdate())
+        )
+
+    def expired(self):
+        return self.filter(is_active=True, deadline__lt=timezone.localdate())
+
 class Opportunity(models.Model):
     OPPORTUNITY_TYPES = [
         ('JOB', 'Job'),
@@ -119,6 +161,22 @@ class Opportunity(models.Model):
     posted_date = models.DateTimeField(auto_now_add=True)
     deadline = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+
+    objects = OpportunityQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # listing order over the active working set only
+            models.Index(
+                fields=['-posted_date', '-id'], name='opportunity_live_posted_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # the expiry sweep: active postings that have a deadline
+            models.Index(
+                fields=['deadline'], name='opportunity_deadline_idx',
+                condition=models.Q(is_active=True, deadline__isnull=False),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} at {self.organization}"
@@ -143,3 +201,114 @@ class OpportunityApplication(models.Model):
     
     def __str__(self):
         return f"{self.applicant.get_full_name()} - {self.opportunity.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the (opportunity, status) the status counts hold for this row;
+        # unknown (None) if either was deferred
+        loaded = instance.__dict__
+        if 'opportunity_id' in loaded and 'status' in loaded:
+            instance._counted = (loaded['opportunity_id'], loaded['status'])
+        return instance
+
+    @classmethod
+    def submit(cls, opportunity, applicant, notes=''):
+        # Insert-or-return-existing on the (opportunity, applicant) constraint:
+        # no exists() pre-check, and a concurrent double submit loses the
+        # insert instead of raising. Returns (application, created).
+        try:
+            with transaction.atomic():
+                application = cls.objects.create(opportunity=opportunity, applicant=applicant, notes=notes)
+            return application, True
+        except IntegrityError:
+            application = cls.objects.get(opportunity=opportunity, applicant=applicant)
+            application.opportunity = opportunity
+            return application, False
+
+class OpportunityStatusCount(models.Model):
+    # Denormalized application totals per opportunity and status, kept in
+    # sync by the OpportunityApplication signal handlers below with F()
+    # updates (see `adjust`), so admin, shell and cascade writes count too.
+    # bulk_create/update() skip signals: rebuild from the raw rows with
+    # `manage.py rebuild_application_stats`.
+    STATUS_FIELDS = {
+        'PENDING': 'pending',
+        'REVIEWING': 'reviewing',
+        'SHORTLISTED': 'shortlisted',
+        'REJECTED': 'rejected',
+        'ACCEPTED': 'accepted',
+    }
+
+    opportunity = models.OneToOneField(Opportunity, on_delete=models.CASCADE, primary_key=True, related_name='status_counts')
+    pending = models.PositiveIntegerField(default=0)
+    reviewing = models.PositiveIntegerField(default=0)
+    shortlisted = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.opportunity_id}: {self.as_dict()}"
+
+    @classmethod
+    def adjust(cls, opportunity_id, changes):
+        # changes: {status: delta}, applied in a single UPDATE; clamped so a
+        # row the counts never saw can't take them below zero
+        updates = {
+            cls.STATUS_FIELDS[status]: Greatest(models.F(cls.STATUS_FIELDS[status]) + delta, 0)
+            for status, delta in changes.items() if delta
+        }
+        if not updates or cls.objects.filter(opportunity_id=opportunity_id).update(**updates):
+            return
+        # first application for this opportunity. Nothing to create for a
+        # pure decrement, which is also how a cascade from a deleted
+        # opportunity arrives
+        if any(delta > 0 for delta in changes.values()):
+            cls.objects.get_or_create(opportunity_id=opportunity_id)
+            cls.objects.filter(opportunity_id=opportunity_id).update(**updates)
+
+    @classmethod
+    def record_transition(cls, old, new):
+        # old/new: (opportunity_id, status) of an application, either None
+        if old == new:
+            return
+        if old and new and old[0] == new[0]:
+            cls.adjust(old[0], {old[1]: -1, new[1]: 1})
+            return
+        if old:
+            cls.adjust(old[0], {old[1]: -1})
+        if new:
+            cls.adjust(new[0], {new[1]: 1})
+
+    def as_dict(self):
+        counts = {status: getattr(self, field) for status, field in self.STATUS_FIELDS.items()}
+        counts['total'] = sum(counts.values())
+        return counts
+
+
+def _application_pre_save(sender, instance, raw=False, **kwargs):
+    # a row saved from an instance that wasn't loaded with its status
+    if raw or instance.pk is None or getattr(instance, '_counted', None) is not None:
+        return
+    instance._counted = sender.objects.filter(pk=instance.pk).values_list('opportunity_id', 'status').first()
+
+
+def _application_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'opportunity', 'opportunity_id', 'status'} & set(update_fields):
+        return
+    new = (instance.opportunity_id, instance.status)
+    OpportunityStatusCount.record_transition(None if created else getattr(instance, '_counted', None), new)
+    instance._counted = new
+
+
+def _application_deleted(sender, instance, **kwargs):
+    counted = getattr(instance, '_counted', None) or (instance.opportunity_id, instance.status)
+    OpportunityStatusCount.record_transition(counted, None)
+
+
+def connect_signals():
+    models.signals.pre_save.connect(_application_pre_save, sender=OpportunityApplication, dispatch_uid='status-count-pre-save')
+    models.signals.post_save.connect(_application_saved, sender=OpportunityApplication, dispatch_uid='status-count-saved')
+    models.signals.post_delete.connect(_application_deleted, sender=OpportunityApplication, dispatch_uid='status-count-deleted')
@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from orbitview.prefetch import PrefetchPlanMixin
+from .bulk import BulkSerializerMixin, BulkListSerializer
+from .importer import SECTIONS, FORMATS
 from .models import (
     Skill, Achievement, Project, CareerTimeline,
-    UserSkill, Opportunity, OpportunityApplication
+    UserSkill, Opportunity, OpportunityApplication, OpportunityStatusCount
 )
 
 User = get_user_model()
@@ -13,8 +16,30 @@ class SkillSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'category', 'slug']
         read_only_fields = ['slug']
 
-class UserSkillSerializer(serializers.ModelSerializer):
+class UserSkillListSerializer(BulkListSerializer):
+    def validate_items(self, items, errors):
+        # (user, skill) is unique: check the batch against itself and the
+        # rows the user already has, in one query
+        instances = self.instance or {}
+        updated = [attrs['id'] for attrs in items if attrs and 'id' in attrs]
+        taken = dict(
+            UserSkill.objects.filter(user=self.context['request'].user)
+            .exclude(pk__in=updated)
+            .values_list('skill_id', 'pk')
+        )
+        for attrs, item_errors in zip(items, errors):
+            if not attrs or item_errors:
+                continue
+            skill_id = attrs.get('skill_id', getattr(instances.get(attrs.get('id')), 'skill_id', None))
+            if skill_id in taken:
+                item_errors['skill'] = ['You already have this skill.']
+            taken[skill_id] = attrs.get('id')
+
+class UserSkillSerializer(BulkSerializerMixin, PrefetchPlanMixin, serializers.ModelSerializer):
     skill_details = SkillSerializer(source='skill', read_only=True)
+
+    select_related = ('skill',)
+    bulk_foreign_keys = ('skill',)
     
     class Meta:
         model = UserSkill
@@ -23,8 +48,9 @@ class UserSkillSerializer(serializers.ModelSerializer):
             'years_experience', 'is_verified', 'verified_by'
         ]
         read_only_fields = ['is_verified', 'verified_by']
+        list_serializer_class = UserSkillListSerializer
 
-class AchievementSerializer(serializers.ModelSerializer):
+class AchievementSerializer(BulkSerializerMixin, PrefetchPlanMixin, serializers.ModelSerializer):
     skills = SkillSerializer(many=True, read_only=True)
     skill_ids = serializers.PrimaryKeyRelatedField(
         queryset=Skill.objects.all(),
@@ -32,9 +58,13 @@ class AchievementSerializer(serializers.ModelSerializer):
         many=True,
         required=False
     )
+
+    prefetch_related = ('skills',)
+    bulk_many_to_many = {'skill_ids': 'skills'}
     
     class Meta:
         model = Achievement
+        list_serializer_class = BulkListSerializer
         fields = [
             'id', 'title', 'description', 'achievement_type',
             'date_achieved', 'issuer', 'verification_url',
@@ -57,7 +87,7 @@ class AchievementSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(BulkSerializerMixin, PrefetchPlanMixin, serializers.ModelSerializer):
     skills = SkillSerializer(many=True, read_only=True)
     skill_ids = serializers.PrimaryKeyRelatedField(
         queryset=Skill.objects.all(),
@@ -70,9 +100,13 @@ class ProjectSerializer(serializers.ModelSerializer):
         many=True,
         required=False
     )
+
+    prefetch_related = ('skills', 'collaborators')
+    bulk_many_to_many = {'skill_ids': 'skills', 'collaborators': 'collaborators'}
     
     class Meta:
         model = Project
+        list_serializer_class = BulkListSerializer
         fields = [
             'id', 'title', 'description', 'start_date', 'end_date',
             'is_ongoing', 'visibility', 'github_url', 'live_url',
@@ -101,7 +135,7 @@ class ProjectSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class CareerTimelineSerializer(serializers.ModelSerializer):
+class CareerTimelineSerializer(BulkSerializerMixin, PrefetchPlanMixin, serializers.ModelSerializer):
     skills = SkillSerializer(many=True, read_only=True)
     skill_ids = serializers.PrimaryKeyRelatedField(
         queryset=Skill.objects.all(),
@@ -109,9 +143,13 @@ class CareerTimelineSerializer(serializers.ModelSerializer):
         many=True,
         required=False
     )
+
+    prefetch_related = ('skills',)
+    bulk_many_to_many = {'skill_ids': 'skills'}
     
     class Meta:
         model = CareerTimeline
+        list_serializer_class = BulkListSerializer
         fields = [
             'id', 'title', 'organization', 'description',
             'start_date', 'end_date', 'is_current', 'entry_type',
@@ -134,7 +172,7 @@ class CareerTimelineSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class OpportunitySerializer(serializers.ModelSerializer):
+class OpportunitySerializer(PrefetchPlanMixin, serializers.ModelSerializer):
     required_skills = SkillSerializer(many=True, read_only=True)
     skill_ids = serializers.PrimaryKeyRelatedField(
         queryset=Skill.objects.all(),
@@ -143,6 +181,9 @@ class OpportunitySerializer(serializers.ModelSerializer):
         required=False
     )
     posted_by_details = serializers.SerializerMethodField()
+
+    select_related = ('posted_by',)
+    prefetch_related = ('required_skills',)
     
     class Meta:
         model = Opportunity
@@ -179,9 +220,12 @@ class OpportunitySerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class OpportunityApplicationSerializer(serializers.ModelSerializer):
+class OpportunityApplicationSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
     opportunity_details = OpportunitySerializer(source='opportunity', read_only=True)
     applicant_details = serializers.SerializerMethodField()
+
+    select_related = ('applicant', 'opportunity__posted_by')
+    prefetch_related = ('opportunity__required_skills',)
     
     class Meta:
         model = OpportunityApplication
@@ -201,4 +245,25 @@ class OpportunityApplicationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data['applicant'] = self.context['request'].user
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data) 
+
+class OpportunityStatsSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
+    applications = serializers.SerializerMethodField()
+
+    select_related = ('status_counts',)
+
+    class Meta:
+        model = Opportunity
+        fields = ['id', 'title', 'is_active', 'posted_date', 'deadline', 'applications']
+
+    def get_applications(self, obj):
+        try:
+            counts = obj.status_counts
+        except OpportunityStatusCount.DoesNotExist:
+            counts = OpportunityStatusCount(opportunity=obj)
+        return counts.as_dict()
+
+class ProfileImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    type = serializers.ChoiceField(choices=sorted(SECTIONS), required=False)
+    format = serializers.ChoiceField(choices=FORMATS, required=False)
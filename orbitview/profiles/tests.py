@@ -1,3 +1,795 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orbitview import async_api, throttling
+from orbitview.testing import QueryCountMixin
+from users.models import Connection
+from . import matching, importer
+from .models import (
+    Skill, Achievement, Project, CareerTimeline,
+    UserSkill, Opportunity, OpportunityApplication, OpportunityStatusCount
+)
+
+User = get_user_model()
+
+
+class ProfileDetailViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='orbit', email='orbit@example.com', password='pass12345',
+            first_name='Orbit', last_name='View',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_profile(self, rows):
+        skills = [
+            Skill.objects.create(name=f'Skill {i}', category='Programming')
+            for i in range(rows)
+        ]
+        for i, skill in enumerate(skills):
+            UserSkill.objects.create(user=self.user, skill=skill, proficiency=1 + i % 4)
+            entry = CareerTimeline.objects.create(
+                user=self.user, title=f'Role {i}', organization='OrbitView',
+                description='-', start_date=datetime.date(2020, 1, 1),
+                entry_type='Work Experience',
+            )
+            entry.skills.set(skills[:3])
+            project = Project.objects.create(
+                user=self.user, title=f'Project {i}', description='-',
+                start_date=datetime.date(2021, 1, 1),
+            )
+            project.skills.set(skills[:3])
+            achievement = Achievement.objects.create(
+                user=self.user, title=f'Award {i}', description='-',
+                achievement_type='AWARD', date_achieved=datetime.date(2022, 1, 1),
+                issuer='OrbitView',
+            )
+            achievement.skills.set(skills[:3])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.create_profile(20)
+        with self.assertNumQueries(8):
+            response = self.client.get('/api/profiles/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['projects'], 20)
+        self.assertEqual(response.data['stats']['profile_completion'], 100)
+
+    def test_empty_profile(self):
+        response = self.client.get('/api/profiles/me/')
+        self.assertEqual(response.data['stats']['timeline_entries'], 0)
+        self.assertEqual(response.data['stats']['profile_completion'], 0)
+
+
+class RecommendedOpportunityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        matching.opportunity_index.invalidate()
+        self.user = User.objects.create_user(username='seeker', email='seeker@example.com', password='pass12345')
+        self.poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.python = Skill.objects.create(name='Python', category='Programming')
+        self.django = Skill.objects.create(name='Django', category='Programming')
+        self.figma = Skill.objects.create(name='Figma', category='Design')
+        UserSkill.objects.create(user=self.user, skill=self.python, proficiency=4, years_experience=5)
+        UserSkill.objects.create(user=self.user, skill=self.django, proficiency=2)
+
+    def create_opportunity(self, title, skills):
+        with self.captureOnCommitCallbacks(execute=True):
+            opportunity = Opportunity.objects.create(
+                title=title, organization='OrbitView', description='-',
+                opportunity_type='JOB', location='Remote', posted_by=self.poster,
+            )
+            opportunity.required_skills.set(skills)
+        return opportunity
+
+    def recommended(self):
+        response = self.client.get('/api/profiles/opportunities/recommended/')
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.data]
+
+    def test_ranks_by_skill_match(self):
+        self.create_opportunity('Designer', [self.figma])
+        self.create_opportunity('Backend', [self.python, self.django])
+        self.create_opportunity('Python dev', [self.python])
+        self.assertEqual(self.recommended(), ['Python dev', 'Backend'])
+
+    def test_index_follows_changes(self):
+        designer = self.create_opportunity('Designer', [self.figma])
+        self.assertEqual(self.recommended(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            designer.required_skills.add(self.python)
+        self.assertEqual(self.recommended(), ['Designer'])
+        designer.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            designer.save()
+        self.assertEqual(self.recommended(), [])
+
+    def test_index_respects_the_deadline(self):
+        developer = self.create_opportunity('Python dev', [self.python])
+        self.assertEqual(self.recommended(), ['Python dev'])
+        developer.deadline = timezone.localdate() - datetime.timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            developer.save()
+        self.assertEqual(self.recommended(), [])
+        vector = matching.get_user_vector(self.user.pk)
+        self.assertEqual(matching.opportunity_index.top_k(vector), [])
+
+    def test_index_only_takes_committed_changes(self):
+        self.create_opportunity('Python dev', [self.python])
+        self.assertEqual(self.recommended(), ['Python dev'])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            backend = Opportunity.objects.create(
+                title='Backend', organization='OrbitView', description='-',
+                opportunity_type='JOB', location='Remote', posted_by=self.poster,
+            )
+            backend.required_skills.set([self.python])
+        self.assertEqual(len(callbacks), 2)
+        # nothing reached the index before the commit
+        self.assertEqual(self.recommended(), ['Python dev'])
+
+    def test_concurrent_change_elsewhere_forces_a_reload(self):
+        designer = self.create_opportunity('Designer', [self.figma])
+        self.assertEqual(self.recommended(), [])
+        # another process adds a posting, and its bump lands just before
+        # this one's
+        other, = Opportunity.objects.bulk_create([Opportunity(
+            title='Remote dev', organization='OrbitView', description='-',
+            opportunity_type='JOB', location='Remote', posted_by=self.poster,
+        )])
+        Opportunity.required_skills.through.objects.create(opportunity=other, skill=self.python)
+        incr = cache.incr
+
+        def racing_incr(key, *args, **kwargs):
+            incr(key)
+            return incr(key, *args, **kwargs)
+        with mock.patch.object(matching.cache, 'incr', racing_incr), self.captureOnCommitCallbacks(execute=True):
+            designer.required_skills.add(self.django)
+        self.assertEqual(self.recommended(), ['Remote dev', 'Designer'])
+
+    def test_user_vector_follows_user_skill_changes(self):
+        self.create_opportunity('Designer', [self.figma])
+        UserSkill.objects.create(user=self.user, skill=self.figma, proficiency=1)
+        self.assertEqual(self.recommended(), ['Designer'])
+
+
+class QueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        matching.opportunity_index.invalidate()
+        self.user = User.objects.create_user(username='orbit', email='orbit@example.com', password='pass12345')
+        poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        skills = [Skill.objects.create(name=f'Skill {i}', category='Programming') for i in range(3)]
+        for i, skill in enumerate(skills):
+            self.user_skill = UserSkill.objects.create(user=self.user, skill=skill, proficiency=2)
+            self.achievement = Achievement.objects.create(
+                user=self.user, title=f'Award {i}', description='-', achievement_type='AWARD',
+                date_achieved=datetime.date(2022, 1, 1), issuer='OrbitView',
+            )
+            self.achievement.skills.set(skills)
+            self.project = Project.objects.create(
+                user=self.user, title=f'Project {i}', description='-', start_date=datetime.date(2021, 1, 1),
+            )
+            self.project.skills.set(skills)
+            self.project.collaborators.set([poster])
+            self.entry = CareerTimeline.objects.create(
+                user=self.user, title=f'Role {i}', organization='OrbitView', description='-',
+                start_date=datetime.date(2020, 1, 1), entry_type='Work Experience',
+            )
+            self.entry.skills.set(skills)
+            self.opportunity = Opportunity.objects.create(
+                title=f'Job {i}', organization='OrbitView', description='-', opportunity_type='JOB',
+                location='Remote', posted_by=poster,
+            )
+            self.opportunity.required_skills.set(skills)
+            self.application = OpportunityApplication.objects.create(opportunity=self.opportunity, applicant=self.user)
+
+    def test_list_endpoints(self):
+        self.assertQueries('/api/profiles/skills/', 2)
+        self.assertQueries('/api/profiles/user-skills/', 2)
+        # count + rows + one query per prefetched relation
+        self.assertQueries('/api/profiles/achievements/', 3)
+        # plus the (cold-cache) connection ids and the collaborated ids
+        self.assertQueries('/api/profiles/projects/', 6)
+        self.assertQueries('/api/profiles/timeline/', 3)
+        self.assertQueries('/api/profiles/opportunities/', 3)
+        self.assertQueries('/api/profiles/applications/', 3)
+
+    def test_detail_endpoints(self):
+        self.assertQueries('/api/profiles/skills/skill-0/', 1)
+        self.assertQueries(f'/api/profiles/user-skills/{self.user_skill.pk}/', 1)
+        self.assertQueries(f'/api/profiles/achievements/{self.achievement.pk}/', 2)
+        self.assertQueries(f'/api/profiles/projects/{self.project.pk}/', 5)
+        self.assertQueries(f'/api/profiles/timeline/{self.entry.pk}/', 2)
+        self.assertQueries(f'/api/profiles/opportunities/{self.opportunity.pk}/', 2)
+        self.assertQueries(f'/api/profiles/applications/{self.application.pk}/', 2)
+
+
+class AsyncReadPathTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='orbit', email='orbit@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        skill = Skill.objects.create(name='Python', category='Programming')
+        UserSkill.objects.create(user=self.user, skill=skill, proficiency=3)
+        project = Project.objects.create(user=self.user, title='Rover', description='-', start_date=datetime.date(2021, 1, 1))
+        project.skills.set([skill])
+        Opportunity.objects.create(
+            title='Job', organization='OrbitView', description='-', opportunity_type='JOB',
+            location='Remote', posted_by=self.user,
+        )
+
+    def test_profile_matches_sync_view(self):
+        sync = self.client.get('/api/profiles/me/').json()
+        async_ = self.client.get('/api/profiles/async/me/').json()
+        self.assertEqual(async_, sync)
+        self.assertEqual(async_['stats']['profile_completion'], 50)
+
+    def test_opportunity_list_matches_sync_view(self):
+        sync = self.client.get('/api/profiles/opportunities/').json()
+        async_ = self.client.get('/api/profiles/async/opportunities/').json()
+        self.assertEqual(async_['results'], sync['results'])
+
+    def test_opportunity_list_invalid_page(self):
+        response = self.client.get('/api/profiles/async/opportunities/', {'page': 'abc'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Invalid page.'})
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/profiles/async/me/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    def test_throttled_with_retry_after(self):
+        with mock.patch.object(throttling.UserRateThrottle, 'rate', '1/min', create=True):
+            self.client.get('/api/profiles/async/me/')
+            response = self.client.get('/api/profiles/async/me/')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+
+class ConcurrentFetchTests(TransactionTestCase):
+    # committed rows, so the sections can be read on other connections
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='orbit', email='orbit@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        skill = Skill.objects.create(name='Python', category='Programming')
+        UserSkill.objects.create(user=self.user, skill=skill, proficiency=3)
+        project = Project.objects.create(user=self.user, title='Rover', description='-', start_date=datetime.date(2021, 1, 1))
+        project.skills.set([skill])
+
+    def test_sections_are_fetched_on_pooled_threads(self):
+        threads = set()
+        evaluate = async_api._evaluate
+
+        def recording(queryset):
+            threads.add(threading.current_thread().name)
+            return evaluate(queryset)
+        with mock.patch.object(async_api, '_evaluate', recording):
+            async_ = self.client.get('/api/profiles/async/me/').json()
+        self.assertEqual(async_, self.client.get('/api/profiles/me/').json())
+        self.assertEqual(async_['stats']['profile_completion'], 50)
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('fetch-all') for name in threads), threads)
+
+
+class BulkWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='orbit', email='orbit@example.com', password='pass12345')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.skills = [Skill.objects.create(name=f'Skill {i}', category='Programming') for i in range(3)]
+
+    def achievement(self, i, **extra):
+        return {
+            'title': f'Award {i}', 'description': '-', 'achievement_type': 'AWARD',
+            'date_achieved': '2022-01-01', 'issuer': 'OrbitView',
+            'skill_ids': [skill.pk for skill in self.skills], **extra,
+        }
+
+    def test_create_batch_in_constant_queries(self):
+        # reference check, insert, through insert, reload + prefetch, savepoints
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                '/api/profiles/achievements/bulk/', [self.achievement(i) for i in range(30)], format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['title'] for item in response.data], [f'Award {i}' for i in range(30)])
+        self.assertEqual(len(response.data[0]['skills']), 3)
+        self.assertEqual(Achievement.objects.filter(user=self.user).count(), 30)
+        self.assertEqual(Achievement.skills.through.objects.count(), 90)
+
+    def test_errors_are_reported_per_item_and_nothing_is_written(self):
+        response = self.client.post('/api/profiles/achievements/bulk/', [
+            self.achievement(0),
+            self.achievement(1, title=''),
+            self.achievement(2, skill_ids=[9999]),
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('title', response.data[1])
+        self.assertEqual(response.data[2]['skill_ids'], ['Invalid pk "9999" - object does not exist.'])
+        self.assertFalse(Achievement.objects.exists())
+
+    def test_update_batch(self):
+        projects = [
+            Project.objects.create(user=self.user, title=f'Project {i}', description='-', start_date=datetime.date(2021, 1, 1))
+            for i in range(2)
+        ]
+        projects[0].skills.set(self.skills)
+        response = self.client.patch('/api/profiles/projects/bulk/', [
+            {'id': projects[0].pk, 'skill_ids': [self.skills[0].pk]},
+            {'id': projects[1].pk, 'title': 'Renamed', 'collaborators': [self.other.pk]},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(projects[0].skills.all()), [self.skills[0]])
+        projects[1].refresh_from_db()
+        self.assertEqual(projects[1].title, 'Renamed')
+        self.assertEqual(list(projects[1].collaborators.all()), [self.other])
+
+    def test_cannot_update_or_delete_other_users_rows(self):
+        foreign = Project.objects.create(user=self.other, title='Theirs', description='-', start_date=datetime.date(2021, 1, 1))
+        response = self.client.patch('/api/profiles/projects/bulk/', [{'id': foreign.pk, 'title': 'Mine'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {'id': ['Not found.']})
+        response = self.client.delete('/api/profiles/projects/bulk/', {'ids': [foreign.pk]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Project.objects.filter(pk=foreign.pk).exists())
+
+    def test_delete_batch(self):
+        entries = [
+            CareerTimeline.objects.create(
+                user=self.user, title=f'Role {i}', organization='OrbitView', description='-',
+                start_date=datetime.date(2020, 1, 1), entry_type='Work Experience',
+            )
+            for i in range(3)
+        ]
+        response = self.client.delete(
+            '/api/profiles/timeline/bulk/', {'ids': [entry.pk for entry in entries[:2]]}, format='json'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(CareerTimeline.objects.all()), [entries[2]])
+
+    def test_user_skills_stay_unique(self):
+        UserSkill.objects.create(user=self.user, skill=self.skills[0], proficiency=2)
+        response = self.client.post('/api/profiles/user-skills/bulk/', [
+            {'skill': self.skills[0].pk, 'proficiency': 3},
+            {'skill': self.skills[1].pk, 'proficiency': 3},
+            {'skill': self.skills[1].pk, 'proficiency': 4},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {'skill': ['You already have this skill.']})
+        self.assertEqual(response.data[1], {})
+        self.assertEqual(response.data[2], {'skill': ['You already have this skill.']})
+
+        response = self.client.post('/api/profiles/user-skills/bulk/', [
+            {'skill': self.skills[1].pk, 'proficiency': 3},
+            {'skill': self.skills[2].pk, 'proficiency': 4},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(matching.get_user_vector(self.user.pk)), {skill.pk for skill in self.skills})
+
+
+class ProfileImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='ada', email='ada@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Skill.objects.create(name='Python', category='Programming')
+
+    def test_streams_json_array_in_chunks(self):
+        stream = io.StringIO(json.dumps([{'n': i, 'text': 'x' * 50} for i in range(100)]))
+        records = list(importer.iter_json_array(stream, chunk_size=7))
+        self.assertEqual([record['n'] for record in records], list(range(100)))
+        with self.assertRaises(importer.ImportDataError):
+            list(importer.iter_json_array(io.StringIO('[{"n": 1}, {"n"')))
+
+    def test_non_string_values_are_record_errors(self):
+        records = [
+            {'type': 'project', 'title': 123, 'started_on': 2021},
+            {'type': 'skill', 'name': 5},
+            {'type': 'position', 'company': 'OrbitView', 'title': 'Engineer', 'started_on': ['2020']},
+            {'type': 'certification', 'name': {'en': 'AWS'}, 'date': '2021'},
+            {'type': 'project', 'title': 'Rover', 'started_on': '2021', 'skills': ['Python', 7, None]},
+        ]
+        summary = importer.ProfileImporter(user=self.user).run(iter(records))
+
+        self.assertEqual(summary['imported']['project'], 2)
+        self.assertEqual(summary['imported']['skill'], 1)
+        self.assertEqual([error['record'] for error in summary['errors']], [2, 3])
+        self.assertEqual(Project.objects.get(title='123').start_date, datetime.date(2021, 1, 1))
+        self.assertEqual(
+            sorted(Project.objects.get(title='Rover').skills.values_list('name', flat=True)), ['7', 'Python'],
+        )
+
+    def test_imports_sections_in_batches(self):
+        records = [
+            {'type': 'position', 'user': 'ada@example.com', 'Company Name': 'OrbitView', 'Title': 'Engineer',
+             'Started On': 'Jan 2020', 'skills': 'Python; Rust'},
+            {'type': 'education', 'user': 'ada', 'School Name': 'MIT', 'Degree Name': 'BSc', 'Start Date': '2015'},
+            {'type': 'skill', 'user': 'ada', 'Name': 'Python', 'proficiency': 4},
+            {'type': 'skill', 'user': 'ada', 'Name': 'python'},
+            {'type': 'certification', 'user': 'ada', 'Name': 'AWS SA', 'Authority': 'AWS', 'Started On': 'Mar 2021'},
+            {'type': 'project', 'user': 'ada', 'Title': 'Rover', 'Started On': '2021-05-01', 'skills': ['Rust']},
+            {'type': 'position', 'user': 'nobody', 'Company Name': 'X', 'Title': 'Y', 'Started On': '2020'},
+            {'type': 'position', 'user': 'ada', 'Company Name': 'X', 'Title': 'Y', 'Started On': 'someday'},
+        ]
+        summary = importer.ProfileImporter(batch_size=3).run(iter(records))
+
+        self.assertEqual(summary['processed'], 8)
+        self.assertEqual(summary['imported'], {'position': 1, 'education': 1, 'skill': 1, 'certification': 1, 'project': 1})
+        self.assertEqual(summary['skills_attempted'], 1)
+        self.assertEqual([error['record'] for error in summary['errors']], [6, 7])
+
+        work = CareerTimeline.objects.get(entry_type='Work Experience')
+        self.assertEqual(work.start_date, datetime.date(2020, 1, 1))
+        self.assertTrue(work.is_current)
+        self.assertEqual(sorted(work.skills.values_list('slug', flat=True)), ['python', 'rust'])
+        self.assertEqual(CareerTimeline.objects.get(entry_type='Education').title, 'BSc')
+        self.assertEqual(UserSkill.objects.get(user=self.user).proficiency, 4)
+        self.assertEqual(Achievement.objects.get().issuer, 'AWS')
+        self.assertEqual(list(Project.objects.get().skills.values_list('name', flat=True)), ['Rust'])
+
+    def test_skill_lookups_do_not_grow_with_records(self):
+        records = [
+            {'user': 'ada', 'Company Name': 'OrbitView', 'Title': f'Role {i}', 'Started On': '2020', 'skills': 'Python'}
+            for i in range(50)
+        ]
+        # per batch: user lookup, skill lookup, savepoints, entries, through rows
+        with self.assertNumQueries(6):
+            summary = importer.ProfileImporter(section='position', batch_size=50).run(records)
+        self.assertEqual(summary['imported']['position'], 50)
+        self.assertEqual(CareerTimeline.skills.through.objects.count(), 50)
+
+    def test_upload_endpoint(self):
+        upload = SimpleUploadedFile(
+            'Skills.csv', b'Name\nPython\nDjango\n', content_type='text/csv'
+        )
+        response = self.client.post('/api/profiles/import/', {'file': upload, 'type': 'skills'}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported']['skill'], 2)
+        self.assertEqual(UserSkill.objects.filter(user=self.user).count(), 2)
+
+        upload = SimpleUploadedFile('broken.json', b'{"not": "an array"}')
+        response = self.client.post('/api/profiles/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+
+class ApplicationExportTests(TestCase):
+    def setUp(self):
+        self.poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.poster)
+        self.opportunity = Opportunity.objects.create(
+            title='Job', organization='OrbitView', description='-', opportunity_type='JOB',
+            location='Remote', posted_by=self.poster,
+        )
+        other = Opportunity.objects.create(
+            title='Elsewhere', organization='Other', description='-', opportunity_type='JOB',
+            location='Remote', posted_by=User.objects.create_user(username='x', email='x@example.com', password='pass12345'),
+        )
+        for i in range(5):
+            applicant = User.objects.create_user(username=f'applicant{i}', email=f'a{i}@example.com', password='pass12345')
+            OpportunityApplication.objects.create(
+                opportunity=self.opportunity, applicant=applicant,
+                status='REJECTED' if i % 2 else 'PENDING', notes='=HYPERLINK("x")' if i == 0 else '',
+            )
+            OpportunityApplication.objects.create(opportunity=other, applicant=applicant)
+
+    def export(self, query=''):
+        response = self.client.get(f'/api/profiles/applications/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_in_one_query(self):
+        response = self.client.get('/api/profiles/applications/export/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        with self.assertNumQueries(1):
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'opportunity_id', 'opportunity'])
+        self.assertEqual(len(lines), 6)
+        self.assertIn(''''=HYPERLINK''', lines[1])
+
+    def test_ndjson_export_with_filters(self):
+        today = datetime.date.today().isoformat()
+        rows = [
+            json.loads(line) for line in
+            self.export(f'?export_format=ndjson&status=REJECTED&applied_after={today}&applied_before={today}').splitlines()
+        ]
+        self.assertEqual([row['applicant_username'] for row in rows], ['applicant1', 'applicant3'])
+        self.assertEqual({row['opportunity'] for row in rows}, {'Job'})
+        self.assertEqual(self.export('?applied_after=2999-01-01').count('\n'), 1)
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/profiles/applications/export/?export_format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/profiles/applications/export/?status=NOPE').status_code, 400)
+
+
+class ApplicationStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.applicant = User.objects.create_user(username='applicant', email='applicant@example.com', password='pass12345')
+        self.client = APIClient()
+        self.opportunities = [
+            Opportunity.objects.create(
+                title=f'Job {i}', organization='OrbitView', description='-', opportunity_type='JOB',
+                location='Remote', posted_by=self.poster,
+            )
+            for i in range(3)
+        ]
+
+    def stats(self, opportunity):
+        self.client.force_authenticate(self.poster)
+        response = self.client.get(f'/api/profiles/opportunities/{opportunity.pk}/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['applications']
+
+    def test_counts_follow_applications(self):
+        opportunity = self.opportunities[0]
+        self.client.force_authenticate(self.applicant)
+        self.client.post(f'/api/profiles/opportunities/{opportunity.pk}/apply/', {}, format='json')
+        self.assertEqual(self.stats(opportunity)['PENDING'], 1)
+
+        application = OpportunityApplication.objects.get()
+        response = self.client.patch(f'/api/profiles/applications/{application.pk}/', {'status': 'SHORTLISTED'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        counts = self.stats(opportunity)
+        self.assertEqual((counts['PENDING'], counts['SHORTLISTED'], counts['total']), (0, 1, 1))
+
+        self.client.delete(f'/api/profiles/applications/{application.pk}/')
+        self.assertEqual(self.stats(opportunity)['total'], 0)
+
+    def test_counts_follow_writes_outside_the_api(self):
+        opportunity = self.opportunities[0]
+        application = OpportunityApplication.objects.create(opportunity=opportunity, applicant=self.applicant)
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        OpportunityApplication.objects.create(opportunity=opportunity, applicant=other, status='REVIEWING')
+        self.assertEqual(self.stats(opportunity)['total'], 2)
+
+        # admin-style save of a freshly loaded row
+        application = OpportunityApplication.objects.get(pk=application.pk)
+        application.status = 'REJECTED'
+        application.save()
+        # the applicant's account going away cascades
+        other.delete()
+        counts = self.stats(opportunity)
+        self.assertEqual((counts['PENDING'], counts['REJECTED'], counts['REVIEWING'], counts['total']), (0, 1, 0, 1))
+
+        response = self.client.delete(f'/api/profiles/applications/{application.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.stats(opportunity)['total'], 0)
+
+        OpportunityApplication.objects.create(opportunity=opportunity, applicant=self.applicant)
+        opportunity.delete()
+        self.assertFalse(OpportunityStatusCount.objects.exists())
+
+    def test_counts_never_go_below_zero(self):
+        application = OpportunityApplication.objects.create(opportunity=self.opportunities[0], applicant=self.applicant)
+        # e.g. rows that predate the counts table
+        OpportunityStatusCount.objects.all().delete()
+        self.client.force_authenticate(self.poster)
+        response = self.client.patch(f'/api/profiles/applications/{application.pk}/', {'status': 'ACCEPTED'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/profiles/applications/{application.pk}/').status_code, 204)
+        self.assertEqual(self.stats(self.opportunities[0])['total'], 0)
+
+    def test_only_poster_can_change_status_or_see_stats(self):
+        application = OpportunityApplication.objects.create(opportunity=self.opportunities[0], applicant=self.applicant)
+        self.client.force_authenticate(self.applicant)
+        response = self.client.patch(f'/api/profiles/applications/{application.pk}/', {'status': 'ACCEPTED'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'/api/profiles/opportunities/{self.opportunities[0].pk}/stats/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_dashboard_reads_one_row_per_opportunity(self):
+        for i, status in enumerate(['PENDING', 'REJECTED', 'ACCEPTED'] * 4):
+            OpportunityStatusCount.adjust(self.opportunities[i % 2].pk, {status: 1})
+        self.client.force_authenticate(self.poster)
+        # count, page, totals
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/profiles/opportunities/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        by_title = {item['title']: item['applications'] for item in response.data['results']}
+        self.assertEqual(by_title['Job 0']['total'], 6)
+        self.assertEqual(by_title['Job 2']['total'], 0)
+        self.assertEqual(response.data['totals']['ACCEPTED'], 4)
+        self.assertEqual(response.data['totals']['total'], 12)
+
+    def test_rebuild_command(self):
+        OpportunityApplication.objects.create(opportunity=self.opportunities[1], applicant=self.applicant, status='REVIEWING')
+        call_command('rebuild_application_stats', stdout=io.StringIO())
+        self.assertEqual(OpportunityStatusCount.objects.get(pk=self.opportunities[1].pk).reviewing, 1)
+
+
+class ApplyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.applicant = User.objects.create_user(username='applicant', email='applicant@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+        self.opportunities = [
+            Opportunity.objects.create(
+                title=f'Job {i}', organization='OrbitView', description='-', opportunity_type='JOB',
+                location='Remote', posted_by=self.poster,
+            )
+            for i in range(2)
+        ]
+
+    def apply(self, opportunity, **headers):
+        return self.client.post(f'/api/profiles/opportunities/{opportunity.pk}/apply/', {'notes': 'hi'}, format='json', headers=headers)
+
+    def test_second_apply_returns_existing_application(self):
+        first = self.apply(self.opportunities[0])
+        self.assertEqual(first.status_code, 201)
+        second = self.apply(self.opportunities[0])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(OpportunityStatusCount.objects.get(pk=self.opportunities[0].pk).pending, 1)
+
+    def test_idempotency_key_replays_and_is_bound_to_one_opportunity(self):
+        first = self.apply(self.opportunities[0], **{'Idempotency-Key': 'abc'})
+        retry = self.apply(self.opportunities[0], **{'Idempotency-Key': 'abc'})
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(self.apply(self.opportunities[1], **{'Idempotency-Key': 'abc'}).status_code, 422)
+        self.assertEqual(self.apply(self.opportunities[0], **{'Idempotency-Key': 'other'}).status_code, 200)
+
+
+class ConcurrentApplyTests(TransactionTestCase):
+    # real concurrent transactions, so no wrapping TestCase transaction
+    def setUp(self):
+        cache.clear()
+        poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.applicant = User.objects.create_user(username='applicant', email='applicant@example.com', password='pass12345')
+        self.opportunity = Opportunity.objects.create(
+            title='Job', organization='OrbitView', description='-', opportunity_type='JOB',
+            location='Remote', posted_by=poster,
+        )
+
+    def test_parallel_applies_create_one_row(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("needs a database that allows concurrent writers")
+        barrier = threading.Barrier(8)
+        statuses = []
+
+        def apply():
+            client = APIClient()
+            client.force_authenticate(self.applicant)
+            barrier.wait()
+            try:
+                statuses.append(client.post(f'/api/profiles/opportunities/{self.opportunity.pk}/apply/').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=apply) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200] * 7 + [201])
+        self.assertEqual(OpportunityApplication.objects.count(), 1)
+        self.assertEqual(OpportunityStatusCount.objects.get(pk=self.opportunity.pk).pending, 1)
+
+
+class OpportunityLifecycleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        matching.opportunity_index.invalidate()
+        self.poster = User.objects.create_user(username='poster', email='poster@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.poster)
+        today = datetime.date.today()
+        self.open = self.create('Open', deadline=None)
+        self.closing = self.create('Closing today', deadline=today)
+        self.expired = [self.create(f'Expired {i}', deadline=today - datetime.timedelta(days=i + 1)) for i in range(3)]
+
+    def create(self, title, deadline):
+        return Opportunity.objects.create(
+            title=title, organization='OrbitView', description='-', opportunity_type='JOB',
+            location='Remote', posted_by=self.poster, deadline=deadline,
+        )
+
+    def test_listing_leaves_out_expired_postings(self):
+        response = self.client.get('/api/profiles/opportunities/')
+        self.assertEqual({item['title'] for item in response.data['results']}, {'Open', 'Closing today'})
+        response = self.client.post(f'/api/profiles/opportunities/{self.expired[0].pk}/apply/')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(f'/api/profiles/opportunities/{self.expired[0].pk}/stats/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_poster_can_extend_or_delete_an_expired_posting(self):
+        url = f'/api/profiles/opportunities/{self.expired[0].pk}/'
+        deadline = datetime.date.today() + datetime.timedelta(days=7)
+        response = self.client.patch(url, {'deadline': deadline.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(self.client.delete(f'/api/profiles/opportunities/{self.expired[1].pk}/').status_code, 204)
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.delete(f'/api/profiles/opportunities/{self.expired[2].pk}/').status_code, 404)
+
+    def test_deactivation_command_runs_in_batches(self):
+        out = io.StringIO()
+        call_command('deactivate_expired_opportunities', batch_size=2, stdout=out)
+        self.assertIn('Deactivated 3', out.getvalue())
+        self.assertEqual(
+            set(Opportunity.objects.filter(is_active=True).values_list('title', flat=True)),
+            {'Open', 'Closing today'},
+        )
+
+
+class ProjectVisibilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='pass12345')
+        self.friend = User.objects.create_user(username='friend', email='friend@example.com', password='pass12345')
+        self.stranger = User.objects.create_user(username='stranger', email='stranger@example.com', password='pass12345')
+        Connection.objects.create(follower=self.viewer, followed=self.friend)
+        Connection.objects.create(follower=self.friend, followed=self.viewer)
+        # one-way follow is not a connection
+        Connection.objects.create(follower=self.viewer, followed=self.stranger)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def create(self, user, title, visibility, collaborators=()):
+        project = Project.objects.create(
+            user=user, title=title, description='-', start_date=datetime.date(2021, 1, 1), visibility=visibility,
+        )
+        project.collaborators.set(collaborators)
+        return project
+
+    def test_visibility_rules(self):
+        self.create(self.viewer, 'Mine', 'PRIVATE')
+        self.create(self.friend, 'Friend public', 'PUBLIC', collaborators=[self.viewer, self.stranger])
+        self.create(self.friend, 'Friend connections', 'CONNECTIONS')
+        self.create(self.friend, 'Friend private', 'PRIVATE')
+        self.create(self.stranger, 'Stranger connections', 'CONNECTIONS')
+        self.create(self.stranger, 'Collaborated', 'CONNECTIONS', collaborators=[self.viewer])
+
+        response = self.client.get('/api/profiles/projects/?page_size=50')
+        self.assertEqual(
+            sorted(item['title'] for item in response.data['results']),
+            ['Collaborated', 'Friend connections', 'Friend public', 'Mine'],
+        )
+        self.assertEqual(response.data['count'], 4)
+
+    def test_query_has_no_join_or_distinct(self):
+        sql = str(Project.objects.visible_to(self.viewer).query).upper()
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('JOIN', sql.split('WHERE')[0])
+
+    def test_every_branch_is_an_index_search(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('plan output is backend specific')
+        self.create(self.stranger, 'Collaborated', 'CONNECTIONS', collaborators=[self.viewer])
+        plan = Project.objects.visible_to(self.viewer).explain()
+        self.assertIn('MULTI-INDEX OR', plan)
+        self.assertEqual(plan.count('SEARCH profiles_project USING'), 4)
+        self.assertNotIn('SCAN', plan)
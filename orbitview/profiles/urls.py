@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, async_views
 
 router = DefaultRouter()
 router.register(r'skills', views.SkillViewSet)
@@ -13,5 +13,8 @@ router.register(r'applications', views.OpportunityApplicationViewSet, basename='
 
 urlpatterns = [
     path('', include(router.urls)),
-    path("me/", views.ProfileDetailView.as_view()),
+    path("me/", views.ProfileDetailView.as_view(), name="profile-detail"),
+    path("import/", views.ProfileImportView.as_view(), name="profile-import"),
+    path("async/opportunities/", async_views.AsyncOpportunityListView.as_view(), name="async-opportunity-list"),
+    path("async/me/", async_views.AsyncProfileDetailView.as_view(), name="async-profile-detail"),
 ] 
\ No newline at end of file
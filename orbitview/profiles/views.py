@@ -1,23 +1,36 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from .models import Project, Skill, Achievement
-from django.db.models import Q
+from django.db.models import Q, Sum
 from .models import (
     Skill, Achievement, Project, CareerTimeline,
-    UserSkill, Opportunity, OpportunityApplication
+    UserSkill, Opportunity, OpportunityApplication, OpportunityStatusCount
 )
+from orbitview.caching import CachedResponseMixin
+from orbitview.prefetch import OptimizedQuerysetMixin
+from . import matching, importer
+from .exports import APPLICATION_COLUMNS, EXPORT_FORMATS, stream_queryset
+from .filters import ApplicationExportFilter
+from .bulk import BulkModelMixin
 from .serializers import (
     SkillSerializer, AchievementSerializer, ProjectSerializer,
     CareerTimelineSerializer, UserSkillSerializer,
-    OpportunitySerializer, OpportunityApplicationSerializer
+    OpportunitySerializer, OpportunityApplicationSerializer,
+    OpportunityStatsSerializer, ProfileImportSerializer
 )
 
+APPLY_IDEMPOTENCY_KEY = 'profiles:apply-idempotency:{user_id}:{key}'
+APPLY_IDEMPOTENCY_TIMEOUT = 60 * 60 * 24
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
@@ -30,11 +43,17 @@ class IsOwnerOrPoster(permissions.BasePermission):
             return True
         return obj.posted_by == request.user
 
-class SkillViewSet(viewsets.ModelViewSet):
+class IsApplicantOrPoster(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return request.user in (obj.applicant, obj.opportunity.posted_by)
+
+class SkillViewSet(CachedResponseMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('skill',)
     lookup_field = 'slug'
+    cursor_ordering = 'id'
     
     def get_queryset(self):
         queryset = Skill.objects.all()
@@ -43,9 +62,10 @@ class SkillViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(category=category)
         return queryset
 
-class UserSkillViewSet(viewsets.ModelViewSet):
+class UserSkillViewSet(BulkModelMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = UserSkillSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    cursor_ordering = 'id'
     
     def get_queryset(self):
         return UserSkill.objects.filter(user=self.request.user)
@@ -63,9 +83,21 @@ class UserSkillViewSet(viewsets.ModelViewSet):
         user_skill.save()
         return Response(self.get_serializer(user_skill).data)
 
-class AchievementViewSet(viewsets.ModelViewSet):
+    # bulk writes skip post_save, so drop the cached skill vector here
+    def perform_bulk_create(self, serializer):
+        objects = super().perform_bulk_create(serializer)
+        matching.invalidate_user_vector(self.request.user.pk)
+        return objects
+
+    def perform_bulk_update(self, serializer):
+        objects = super().perform_bulk_update(serializer)
+        matching.invalidate_user_vector(self.request.user.pk)
+        return objects
+
+class AchievementViewSet(BulkModelMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = AchievementSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    cursor_ordering = ('-date_achieved', '-id')
     
     def get_queryset(self):
         return Achievement.objects.filter(user=self.request.user)
@@ -73,24 +105,21 @@ class AchievementViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(BulkModelMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    cursor_ordering = ('-start_date', '-id')
     
     def get_queryset(self):
-        user = self.request.user
-        return Project.objects.filter(
-            Q(user=user) | 
-            Q(visibility='PUBLIC') |
-            (Q(visibility='CONNECTIONS') & Q(collaborators=user))
-        ).distinct()
+        return Project.objects.visible_to(self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class CareerTimelineViewSet(viewsets.ModelViewSet):
+class CareerTimelineViewSet(BulkModelMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = CareerTimelineSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    cursor_ordering = ('-start_date', '-id')
     
     def get_queryset(self):
         return CareerTimeline.objects.filter(user=self.request.user)
@@ -98,12 +127,22 @@ class CareerTimelineViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class OpportunityViewSet(viewsets.ModelViewSet):
+class OpportunityViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = OpportunitySerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrPoster]
+    cursor_ordering = ('-posted_date', '-id')
+    throttle_scope = None  # set per action (see `apply`)
     
     def get_queryset(self):
-        queryset = Opportunity.objects.filter(is_active=True)
+        # expired and deactivated postings are left out in SQL; a poster can
+        # still read the stats of their own, and edit or delete them (e.g. to
+        # extend a deadline that has passed)
+        if self.action == 'stats':
+            queryset = Opportunity.objects.all()
+        elif self.action in ('update', 'partial_update', 'destroy'):
+            queryset = Opportunity.objects.filter(posted_by=self.request.user)
+        else:
+            queryset = Opportunity.objects.live()
         
         # Filter by skills
         skills = self.request.query_params.getlist('skills', [])
@@ -124,36 +163,90 @@ class OpportunityViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(posted_by=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            limit = 20
+        matches = matching.recommend(request.user, k=max(limit, 1))
+        opportunities = self.filter_queryset(self.get_queryset()).in_bulk(
+            [opportunity_id for opportunity_id, _ in matches]
+        )
+
+        results = []
+        for opportunity_id, score in matches:
+            if opportunity_id in opportunities:
+                data = self.get_serializer(opportunities[opportunity_id]).data
+                data['match_score'] = round(score, 4)
+                results.append(data)
+        return Response(results)
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        opportunity = self.get_object()
+        if opportunity.posted_by != request.user:
+            raise PermissionDenied("Only the opportunity poster can see its application stats.")
+        counts = OpportunityStatusCount.objects.filter(pk=opportunity.pk).first()
+        return Response({
+            'opportunity': opportunity.pk,
+            'applications': (counts or OpportunityStatusCount(opportunity=opportunity)).as_dict(),
+        })
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        # Every posting of the requester (inactive ones too) with its status
+        # counts, read from the materialized totals: one row per opportunity.
+        queryset = OpportunityStatsSerializer.optimize_queryset(
+            Opportunity.objects.filter(posted_by=request.user).order_by('-posted_date', '-id')
+        )
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(OpportunityStatsSerializer(page, many=True).data)
+
+        totals = OpportunityStatusCount.objects.filter(opportunity__posted_by=request.user).aggregate(
+            **{status: Sum(field) for status, field in OpportunityStatusCount.STATUS_FIELDS.items()}
+        )
+        totals = {status: count or 0 for status, count in totals.items()}
+        totals['total'] = sum(totals.values())
+        response.data['totals'] = totals
+        return response
+
+    # anyone signed in may apply; IsOwnerOrPoster would limit it to the poster
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], throttle_scope='apply')
     def apply(self, request, pk=None):
+        # 201 with the new application, or 200 with the existing one if this
+        # user already applied. A retry carrying the same Idempotency-Key
+        # replays the original 201.
         opportunity = self.get_object()
-        
-        # Check if already applied
-        if OpportunityApplication.objects.filter(
-            opportunity=opportunity,
-            applicant=request.user
-        ).exists():
-            return Response(
-                {"detail": "You have already applied for this opportunity."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Create application
-        application = OpportunityApplication.objects.create(
-            opportunity=opportunity,
-            applicant=request.user,
-            notes=request.data.get('notes', '')
+        key = request.headers.get('Idempotency-Key')
+        cache_key = APPLY_IDEMPOTENCY_KEY.format(user_id=request.user.pk, key=key) if key else None
+        if cache_key:
+            seen = cache.get(cache_key)
+            if seen is not None and seen[0] != opportunity.pk:
+                return Response(
+                    {"detail": "This Idempotency-Key was already used for another opportunity."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+
+        application, created = OpportunityApplication.submit(
+            opportunity, request.user, notes=request.data.get('notes', '')
         )
-        
+        if cache_key:
+            if created:
+                cache.set(cache_key, (opportunity.pk, application.pk), APPLY_IDEMPOTENCY_TIMEOUT)
+            elif cache.get(cache_key) == (opportunity.pk, application.pk):
+                created = True
+
         return Response(
             OpportunityApplicationSerializer(application).data,
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
-class OpportunityApplicationViewSet(viewsets.ModelViewSet):
+class OpportunityApplicationViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = OpportunityApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-applied_date', '-id')
     
     def get_queryset(self):
         user = self.request.user
@@ -163,45 +256,70 @@ class OpportunityApplicationViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
-            return [permissions.IsAuthenticated(), IsOwnerOrPoster()]
+            return [permissions.IsAuthenticated(), IsApplicantOrPoster()]
         return [permissions.IsAuthenticated()]
     
     def perform_update(self, serializer):
         # Only allow status updates by the opportunity poster
         if 'status' in serializer.validated_data:
             if serializer.instance.opportunity.posted_by != self.request.user:
-                raise permissions.PermissionDenied(
+                raise PermissionDenied(
                     "Only the opportunity poster can update the application status."
                 )
         serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # Streams applications to the requester's own postings as CSV or
+        # NDJSON (?export_format=; `format` is taken by DRF's renderer switch).
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'export_format': [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]})
+
+        queryset = OpportunityApplication.objects.filter(opportunity__posted_by=request.user)
+        filterset = ApplicationExportFilter(request.query_params, queryset=queryset)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return stream_queryset(
+            filterset.qs.order_by('applied_date', 'id'),
+            APPLICATION_COLUMNS, export_format, 'applications',
+        )
+
 
 User = get_user_model()
 
 
 class ProfileDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
-    
+
+    def get_section_querysets(self, user):
+        # Every section is loaded with a fixed number of queries: one per
+        # section plus one per relation in its serializer's prefetch plan.
+        return (
+            CareerTimelineSerializer.optimize_queryset(
+                CareerTimeline.objects.filter(user=user).order_by('-start_date')
+            ),
+            ProjectSerializer.optimize_queryset(
+                Project.objects.filter(user=user).order_by('-start_date')
+            ),
+            UserSkillSerializer.optimize_queryset(
+                UserSkill.objects.filter(user=user).order_by('-proficiency')
+            ),
+            AchievementSerializer.optimize_queryset(
+                Achievement.objects.filter(user=user).order_by('-date_achieved')
+            ),
+        )
+
     def get(self, request, *args, **kwargs):
-        # Get the user's profile
-        # profile = get_object_or_404(User, pk=request.user.pk)
-        
-        # Get all related data
-        timeline_entries = CareerTimeline.objects.filter(user=request.user).order_by('-start_date')
-        projects = Project.objects.filter(user=request.user).order_by('-start_date')
-        skills = UserSkill.objects.filter(user=request.user) #.order_by('-proficiency')
-        achievements = Achievement.objects.filter(user=request.user).order_by('-date_achieved')
-        
-        # Calculate profile completion
-        total_fields = 4  # timeline, projects, skills, achievements
-        completed_fields = sum([
-            timeline_entries.exists(),
-            projects.exists(),
-            skills.exists(),
-            achievements.exists(),
-        ])
-        profile_completion = (completed_fields / total_fields) * 100
-        
+        sections = [list(queryset) for queryset in self.get_section_querysets(request.user)]
+        return Response(self.build_response_data(*sections))
+
+    def build_response_data(self, timeline_entries, projects, skills, achievements):
+        # Calculate profile completion from the rows already in memory
+        sections = [timeline_entries, projects, skills, achievements]
+        completed_fields = sum(1 for section in sections if section)
+        profile_completion = (completed_fields / len(sections)) * 100
+
         # Prepare the response data
         response_data = {
             'timeline_entries': CareerTimelineSerializer(timeline_entries, many=True).data,
@@ -209,12 +327,38 @@ class ProfileDetailView(generics.RetrieveAPIView):
             'skills': UserSkillSerializer(skills, many=True).data,
             'achievements': AchievementSerializer(achievements, many=True).data,
             'stats': {
-                'timeline_entries': timeline_entries.count(),
-                'projects': projects.count(),
-                'skills': skills.count(),
-                'achievements': achievements.count(),
+                'timeline_entries': len(timeline_entries),
+                'projects': len(projects),
+                'skills': len(skills),
+                'achievements': len(achievements),
                 'profile_completion': profile_completion,
             }
         }
-        
-        return Response(response_data) 
\ No newline at end of file
+
+        return response_data
+
+
+class ProfileImportView(generics.GenericAPIView):
+    # Streams an uploaded export (CSV, NDJSON or JSON array) into the
+    # requesting user's profile in batches; see profiles/importer.py.
+    serializer_class = ProfileImportSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        format = serializer.validated_data.get('format') or importer.guess_format(upload.name)
+
+        profile_importer = importer.ProfileImporter(user=request.user, section=serializer.validated_data.get('type'))
+        try:
+            records = importer.read_records(importer.open_upload(upload), format)
+            summary = profile_importer.run(records)
+        except (importer.ImportDataError, UnicodeDecodeError) as exc:
+            # batches before the bad input are already committed
+            return Response(
+                {'detail': str(exc), **profile_importer.summary()},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(summary)
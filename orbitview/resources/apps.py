@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ResourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resources'
+
+    def ready(self):
+        from orbitview import caching, images
+        from . import search
+        from .models import Category, SkillTag, Host, Event, Competition, Program, ChallengeSubmission
+        search.connect_signals()
+        caching.watch(Category, SkillTag, Host, Event, Competition, Program)
+        for model in (Host, Event, Competition, Program, ChallengeSubmission):
+            images.register(model, 'cover_image')
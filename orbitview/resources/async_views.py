@@ -0,0 +1,16 @@
+from orbitview.async_api import AsyncListView
+from . import views
+
+
+# Async (ASGI) read path for the hot catalog lists; same filters, prefetch
+# plans and response shape as the sync views they wrap.
+class AsyncEventListView(AsyncListView):
+    view_class = views.EventListCreateView
+
+
+class AsyncCompetitionListView(AsyncListView):
+    view_class = views.CompetitionListCreateView
+
+
+class AsyncProgramListView(AsyncListView):
+    view_class = views.ProgramListCreateView
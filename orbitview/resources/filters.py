@@ -0,0 +1,43 @@
+import django_filters
+
+from .models import Event, Competition
+
+
+class TimeWindowFilterSet(django_filters.FilterSet):
+    # ?when=upcoming|ongoing|past, plus ?after=/?before= for everything that
+    # overlaps a date range (e.g. a calendar month)
+    WHEN_CHOICES = [
+        ('upcoming', 'Upcoming'),
+        ('ongoing', 'Ongoing'),
+        ('past', 'Past'),
+    ]
+
+    when = django_filters.ChoiceFilter(choices=WHEN_CHOICES, method='filter_when')
+    after = django_filters.IsoDateTimeFilter(method='filter_after')
+    before = django_filters.IsoDateTimeFilter(method='filter_before')
+
+    def filter_when(self, queryset, name, value):
+        start, end = queryset.start_field, queryset.end_field
+        if value == 'upcoming':
+            return queryset.upcoming().order_by(start, 'id')
+        if value == 'ongoing':
+            return queryset.ongoing().order_by(end, 'id')
+        return queryset.past().order_by(f'-{end}', '-id')
+
+    def filter_after(self, queryset, name, value):
+        return queryset.overlapping(after=value)
+
+    def filter_before(self, queryset, name, value):
+        return queryset.overlapping(before=value)
+
+
+class EventFilter(TimeWindowFilterSet):
+    class Meta:
+        model = Event
+        fields = ['host']
+
+
+class CompetitionFilter(TimeWindowFilterSet):
+    class Meta:
+        model = Competition
+        fields = ['organizer', 'difficulty_level']
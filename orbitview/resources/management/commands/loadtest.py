@@ -0,0 +1,70 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+# (sync path, async path) pairs served by the same worker budget, e.g.
+#   gunicorn orbitview.wsgi -w 4            (sync baseline)
+#   gunicorn orbitview.asgi -w 4 -k uvicorn.workers.UvicornWorker
+ENDPOINTS = [
+    ('/api/resources/events/', '/api/resources/async/events/'),
+    ('/api/resources/competitions/', '/api/resources/async/competitions/'),
+    ('/api/resources/programs/', '/api/resources/async/programs/'),
+    ('/api/profiles/opportunities/', '/api/profiles/async/opportunities/'),
+    ('/api/profiles/me/', '/api/profiles/async/me/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent GETs at the sync and async read endpoints of a running "
+        "server and compare throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help="e.g. http://127.0.0.1:8000")
+        parser.add_argument('--requests', type=int, default=500, help="requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--token', help="JWT access token for the authenticated endpoints")
+        parser.add_argument('--only', choices=['sync', 'async'], help="run just one side")
+
+    def handle(self, *args, **options):
+        headers = {'Authorization': f"JWT {options['token']}"} if options['token'] else {}
+        for sync_path, async_path in ENDPOINTS:
+            for label, path in (('sync', sync_path), ('async', async_path)):
+                if options['only'] and options['only'] != label:
+                    continue
+                result = self.run(options['base_url'].rstrip('/') + path, headers, options['requests'], options['concurrency'])
+                self.stdout.write(
+                    f"{label:<5} {path:<40} {result['rps']:>8.1f} req/s  "
+                    f"p50 {result['p50']:>7.1f} ms  p95 {result['p95']:>7.1f} ms  errors {result['errors']}"
+                )
+
+    def run(self, url, headers, total, concurrency):
+        def fetch(_):
+            request = urllib.request.Request(url, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, TimeoutError):
+                ok = False
+            return (time.perf_counter() - start) * 1000, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for latency, _ in samples)
+        return {
+            'rps': total / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': sum(1 for _, ok in samples if not ok),
+        }
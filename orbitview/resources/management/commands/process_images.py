@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from orbitview import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Run every image upload that is not yet in content-addressed storage "
+        "through the image pipeline (uploads from before it existed, or whose "
+        "background run failed)."
+    )
+
+    def handle(self, *args, **options):
+        processed = skipped = 0
+        for model, field_names in images.REGISTERED.items():
+            for field_name in field_names:
+                pending = (
+                    model._default_manager.exclude(**{f'{field_name}__startswith': f'{images.IMAGE_ROOT}/'})
+                    .exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                    .values_list('pk', flat=True).iterator()
+                )
+                for pk in pending:
+                    if images.process(model, pk, field_name):
+                        processed += 1
+                    else:
+                        skipped += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} images; {skipped} could not be processed."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from resources.models import Reaction, ReactionCount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized ReactionCount table from the raw Reaction rows."
+
+    def handle(self, *args, **options):
+        totals = (
+            Reaction.objects
+            .values('content_type_id', 'object_id')
+            .annotate(
+                like_count=Count('id', filter=Q(reaction='like')),
+                dislike_count=Count('id', filter=Q(reaction='dislike')),
+            )
+            .order_by()
+        )
+
+        with transaction.atomic():
+            ReactionCount.objects.all().delete()
+            created = ReactionCount.objects.bulk_create(
+                (ReactionCount(**row) for row in totals.iterator()),
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt reaction counts for {len(created)} objects."))
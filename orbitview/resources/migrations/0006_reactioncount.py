@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counts(apps, schema_editor):
+    Reaction = apps.get_model('resources', 'Reaction')
+    ReactionCount = apps.get_model('resources', 'ReactionCount')
+    totals = (
+        Reaction.objects.values('content_type_id', 'object_id')
+        .annotate(
+            like_count=Count('id', filter=Q(reaction='like')),
+            dislike_count=Count('id', filter=Q(reaction='dislike')),
+        )
+        .order_by()
+    )
+    ReactionCount.objects.bulk_create(
+        (ReactionCount(**row) for row in totals.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('resources', '0005_reaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('dislike_count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
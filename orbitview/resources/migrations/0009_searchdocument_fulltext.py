@@ -0,0 +1,77 @@
+# Backend-specific full-text index for SearchDocument.
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE resources_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX resources_searchdocument_vector_idx ON resources_searchdocument USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS resources_searchdocument_vector_idx",
+    "ALTER TABLE resources_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE resources_searchdocument_fts USING fts5(
+        title, body,
+        content='resources_searchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER resources_searchdocument_ai AFTER INSERT ON resources_searchdocument BEGIN
+        INSERT INTO resources_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER resources_searchdocument_ad AFTER DELETE ON resources_searchdocument BEGIN
+        INSERT INTO resources_searchdocument_fts(resources_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER resources_searchdocument_au AFTER UPDATE ON resources_searchdocument BEGIN
+        INSERT INTO resources_searchdocument_fts(resources_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO resources_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS resources_searchdocument_ai",
+    "DROP TRIGGER IF EXISTS resources_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS resources_searchdocument_au",
+    "DROP TABLE IF EXISTS resources_searchdocument_fts",
+]
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        # other backends fall back to a LIKE scan in resources.search
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0008_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,32 @@
+import secrets
+
+from django.db import migrations, models
+
+
+def populate_references(apps, schema_editor):
+    ChallengeSubmission = apps.get_model('resources', 'ChallengeSubmission')
+    submissions = list(ChallengeSubmission.objects.filter(reference__isnull=True).only('pk'))
+    for submission in submissions:
+        submission.reference = secrets.token_urlsafe(16)
+    ChallengeSubmission.objects.bulk_update(submissions, ['reference'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0009_searchdocument_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengesubmission',
+            name='reference',
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(populate_references, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='challengesubmission',
+            name='reference',
+            field=models.CharField(editable=False, max_length=32, unique=True),
+        ),
+    ]
@@ -3,10 +3,12 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.db.models.functions import Greatest, Now
+from django.db import IntegrityError, transaction
 from datetime import datetime
-import string
-import random
+from orbitview import caching
+import secrets
 
 
 class Category(models.Model):
@@ -52,12 +54,106 @@ class Reaction(models.Model):
         return f"{self.user.username} - {self.reaction} - {self.content_object}"
     
     def get_likes_count(self):
-        return Reaction.objects.filter(
-            content_type=ContentType.objects.get_for_model(self),
-            object_id=self.id,
-            reaction='like'
-        ).count()
+        # likes on the reacted-to object, read from the denormalized counter
+        counts = ReactionCount.objects.filter(
+            content_type_id=self.content_type_id,
+            object_id=self.object_id,
+        ).first()
+        return counts.like_count if counts else 0
+
+
+class ReactionCount(models.Model):
+    # Denormalized like/dislike totals per reacted-to object, kept in sync by
+    # the reaction views with F() updates (see `adjust`). Rebuild from the raw
+    # Reaction rows with `manage.py rebuild_reaction_counts`.
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    like_count = models.PositiveIntegerField(default=0)
+    dislike_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return f"{self.content_object}: {self.like_count} likes, {self.dislike_count} dislikes"
+
+    @classmethod
+    def adjust(cls, content_type_id, object_id, reaction, delta):
+        counts, _ = cls.objects.get_or_create(content_type_id=content_type_id, object_id=object_id)
+        field = f"{reaction}_count"
+        # clamped so a reaction the counter never saw can't take it below zero
+        cls.objects.filter(pk=counts.pk).update(**{field: Greatest(models.F(field) + delta, 0)})
+        # totals are embedded in cached catalog responses for the reacted-to model
+        caching.bump_on_commit(ContentType.objects.get_for_id(content_type_id).model)
+
+
+
+class SearchDocument(models.Model):
+    # One row per searchable object (events, competitions, programs, hosts and
+    # opportunities), kept up to date by the signal handlers in search.py.
+    # The full-text index on top of it is backend specific: a weighted
+    # tsvector + GIN index on PostgreSQL, an FTS5 table on SQLite.
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return self.title
+
 
+class TimeWindowQuerySet(models.QuerySet):
+    # Time-window lookups for models with a start/end pair. Everything is
+    # compared against the database clock (Now()) so the filters and the
+    # is_past/is_ongoing annotations are evaluated in SQL, on indexed columns.
+    start_field = None
+    end_field = None
+
+    def upcoming(self):
+        return self.filter(**{f'{self.start_field}__gt': Now()})
+
+    def ongoing(self):
+        return self.filter(**{f'{self.start_field}__lte': Now(), f'{self.end_field}__gte': Now()})
+
+    def past(self):
+        return self.filter(**{f'{self.end_field}__lt': Now()})
+
+    def overlapping(self, after=None, before=None):
+        # anything running at some point between `after` and `before`
+        queryset = self
+        if after is not None:
+            queryset = queryset.filter(**{f'{self.end_field}__gte': after})
+        if before is not None:
+            queryset = queryset.filter(**{f'{self.start_field}__lte': before})
+        return queryset
+
+    def with_status(self):
+        return self.annotate(
+            is_past=models.ExpressionWrapper(
+                models.Q(**{f'{self.end_field}__lt': Now()}),
+                output_field=models.BooleanField(),
+            ),
+            is_ongoing=models.ExpressionWrapper(
+                models.Q(**{f'{self.start_field}__lte': Now(), f'{self.end_field}__gte': Now()}),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+
+class EventQuerySet(TimeWindowQuerySet):
+    start_field = 'start_time'
+    end_field = 'end_time'
+
+
+class CompetitionQuerySet(TimeWindowQuerySet):
+    start_field = 'start_date'
+    end_field = 'end_date'
 
 
 class Event(models.Model):
@@ -70,6 +166,16 @@ class Event(models.Model):
     end_time = models.DateTimeField()
     category = models.ManyToManyField(Category)
     cover_image = models.ImageField(upload_to="media/events/cover_images")
+    reaction_counts = GenericRelation(ReactionCount)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_time', 'id'], name='event_start_time_id_idx'),
+            models.Index(fields=['end_time', 'start_time'], name='event_end_start_idx'),
+            models.Index(fields=['host', 'start_time'], name='event_host_start_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -89,6 +195,17 @@ class Competition(models.Model):
     end_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
     cover_image = models.ImageField(upload_to="media/competitions/cover_images")
+    reaction_counts = GenericRelation(ReactionCount)
+
+    objects = CompetitionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='competition_created_id_idx'),
+            models.Index(fields=['start_date', 'end_date'], name='competition_start_end_idx'),
+            models.Index(fields=['end_date', 'start_date'], name='competition_end_start_idx'),
+            models.Index(fields=['organizer', 'start_date'], name='competition_org_start_idx'),
+        ]
 
     '''def clean(self):
         super().clean()
@@ -111,8 +228,27 @@ class Competition(models.Model):
 
 '''
 
+def generate_submission_reference():
+    # 16 random bytes -> 22 url-safe characters; collisions are astronomically
+    # unlikely and the unique index on `reference` catches the rest
+    return secrets.token_urlsafe(16)
+
+
+class ChallengeSubmissionQuerySet(models.QuerySet):
+    def bulk_ingest(self, submissions, batch_size=500):
+        # bulk_create skips save(), so fill in references/titles here and
+        # write the whole import in one transaction
+        for submission in submissions:
+            submission.assign_reference()
+        with transaction.atomic():
+            return self.bulk_create(submissions, batch_size=batch_size)
+
+
 class ChallengeSubmission(models.Model):
+    REFERENCE_ATTEMPTS = 5
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    reference = models.CharField(max_length=32, unique=True, editable=False)
     title = models.CharField(max_length=255, default="-")
     description = models.TextField(max_length=5000, null=True, blank=True)
     competition = models.ForeignKey(Competition, on_delete=models.CASCADE)
@@ -126,12 +262,32 @@ class ChallengeSubmission(models.Model):
     is_verified = models.BooleanField(default=False)
     cover_image = models.ImageField(upload_to="media/challenge_submissions/cover_images")        
 
-    def save(self):
-        title_length = 50
-        characters = string.ascii_letters + string.digits
-        random_string = ''.join(random.choice(characters) for _ in range(title_length))
-        self.title = random_string
-        self.save()
+    objects = ChallengeSubmissionQuerySet.as_manager()
+
+    def assign_reference(self):
+        if not self.reference:
+            self.reference = generate_submission_reference()
+        if not self.title or self.title == "-":
+            self.title = self.reference
+
+    def save(self, *args, **kwargs):
+        if self.reference:
+            return super().save(*args, **kwargs)
+
+        generate_title = not self.title or self.title == "-"
+        for _ in range(self.REFERENCE_ATTEMPTS):
+            self.reference = generate_submission_reference()
+            if generate_title:
+                self.title = self.reference
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # only retry when it was the reference that collided
+                if not ChallengeSubmission.objects.filter(reference=self.reference).exists():
+                    self.reference = ""
+                    raise
+        raise IntegrityError("Could not generate a unique submission reference.")
 
     def __str__(self):
         return self.title
@@ -146,6 +302,7 @@ class Program(models.Model):
     duration_description = models.CharField(max_length=255)
     cover_image = models.ImageField(upload_to="media/competitions/cover_images", null=True, blank=True)
     category = models.ManyToManyField(Category)        
+    reaction_counts = GenericRelation(ReactionCount)
 
 
     def __str__(self):
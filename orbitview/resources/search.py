@@ -0,0 +1,203 @@
+import re
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+
+from .models import SearchDocument
+
+
+# model label -> (title fields, body fields). Title matches are weighted
+# above body matches by every backend.
+SEARCHABLE_MODELS = {
+    'resources.Event': (['title'], ['description', 'location']),
+    'resources.Competition': (['title'], ['description']),
+    'resources.Program': (['title'], ['description', 'duration_description']),
+    'resources.Host': (['name'], ['slogan', 'bio']),
+    'profiles.Opportunity': (['title', 'organization'], ['description', 'location']),
+}
+
+# models only searchable by signed-in users, label -> the queryset of rows
+# that may be shown. Rows outside it are kept out of the index, and since
+# they can also drop out without a save (a deadline passing), hits are
+# checked against it again when the search runs.
+RESTRICTED_MODELS = {
+    'profiles.Opportunity': lambda model: model.objects.live(),
+}
+
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _join(instance, fields):
+    return ' '.join(str(getattr(instance, field) or '') for field in fields).strip()
+
+
+def _visible_rows(model):
+    restrict = RESTRICTED_MODELS.get(model._meta.label)
+    return restrict(model) if restrict else model.objects.all()
+
+
+def index_instance(instance):
+    title_fields, body_fields = SEARCHABLE_MODELS[instance._meta.label]
+    if instance._meta.label in RESTRICTED_MODELS and not _visible_rows(type(instance)).filter(pk=instance.pk).exists():
+        remove_instance(instance)
+        return
+    SearchDocument.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        defaults={
+            'title': _join(instance, title_fields)[:255],
+            'body': _join(instance, body_fields),
+        },
+    )
+
+
+def remove_instance(instance):
+    remove_ids(type(instance), [instance.pk])
+
+
+def remove_ids(model, ids):
+    SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id__in=ids,
+    ).delete()
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_instance(instance)
+
+
+def _on_delete(sender, instance, **kwargs):
+    remove_instance(instance)
+
+
+def connect_signals():
+    for label in SEARCHABLE_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'search-index-{label}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'search-remove-{label}')
+
+
+def rebuild_index(batch_size=1000):
+    SearchDocument.objects.all().delete()
+    total = 0
+    for label, (title_fields, body_fields) in SEARCHABLE_MODELS.items():
+        model = apps.get_model(label)
+        content_type = ContentType.objects.get_for_model(model)
+        batch = []
+        for instance in _visible_rows(model).only('pk', *title_fields, *body_fields).iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(
+                content_type=content_type,
+                object_id=instance.pk,
+                title=_join(instance, title_fields)[:255],
+                body=_join(instance, body_fields),
+            ))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def _content_type_ids(labels):
+    models = [apps.get_model(label) for label in labels]
+    return [ct.pk for ct in ContentType.objects.get_for_models(*models).values()]
+
+
+def _drop_hidden(documents):
+    # one query per restricted model that has hits
+    hidden = set()
+    for label in RESTRICTED_MODELS:
+        model = apps.get_model(label)
+        content_type = ContentType.objects.get_for_model(model)
+        ids = {document.object_id for document in documents if document.content_type_id == content_type.pk}
+        if ids:
+            visible = set(_visible_rows(model).filter(pk__in=ids).values_list('pk', flat=True))
+            hidden.update((content_type.pk, pk) for pk in ids - visible)
+    return [document for document in documents if (document.content_type_id, document.object_id) not in hidden]
+
+
+def _search_postgresql(query, content_type_ids, limit):
+    type_filter = 'AND content_type_id = ANY(%s)' if content_type_ids else ''
+    params = [query] + ([content_type_ids] if content_type_ids else []) + [limit]
+    return SearchDocument.objects.raw(
+        f"""
+        SELECT d.*, ts_rank(d.search_vector, q, 1) AS rank
+        FROM resources_searchdocument d, websearch_to_tsquery('english', %s) q
+        WHERE d.search_vector @@ q {type_filter}
+        ORDER BY rank DESC
+        LIMIT %s
+        """,
+        params,
+    )
+
+
+def _search_sqlite(query, content_type_ids, limit):
+    # quote every token so user input can't inject FTS5 syntax, and allow
+    # the last one to match as a prefix for search-as-you-type
+    tokens = TOKEN_RE.findall(query)
+    if not tokens:
+        return []
+    match = ' '.join(f'"{token}"' for token in tokens) + '*'
+    type_filter = ''
+    if content_type_ids:
+        type_filter = f"AND d.content_type_id IN ({', '.join(['%s'] * len(content_type_ids))})"
+    return SearchDocument.objects.raw(
+        f"""
+        SELECT d.*, -bm25(resources_searchdocument_fts, %s, %s) AS rank
+        FROM resources_searchdocument_fts
+        JOIN resources_searchdocument d ON d.id = resources_searchdocument_fts.rowid
+        WHERE resources_searchdocument_fts MATCH %s {type_filter}
+        ORDER BY rank DESC
+        LIMIT %s
+        """,
+        [TITLE_WEIGHT, BODY_WEIGHT, match, *content_type_ids, limit],
+    )
+
+
+def _search_fallback(query, content_type_ids, limit):
+    documents = SearchDocument.objects.all()
+    for token in TOKEN_RE.findall(query):
+        documents = documents.filter(Q(title__icontains=token) | Q(body__icontains=token))
+    if content_type_ids:
+        documents = documents.filter(content_type_id__in=content_type_ids)
+    documents = list(documents[:limit])
+    for document in documents:
+        document.rank = 0.0
+    return documents
+
+
+def search(query, types=None, limit=20, authenticated=False):
+    """
+    Ranked full-text search over SEARCHABLE_MODELS. `types` optionally
+    restricts results to model names, e.g. ['event', 'host'];
+    RESTRICTED_MODELS are left out unless `authenticated`.
+    """
+    labels = [
+        label for label in SEARCHABLE_MODELS
+        if (not types or label.split('.')[1].lower() in types)
+        and (authenticated or label not in RESTRICTED_MODELS)
+    ]
+    if not labels:
+        return []
+    # searching every model needs no type filter
+    content_type_ids = _content_type_ids(labels) if len(labels) < len(SEARCHABLE_MODELS) else []
+    if connection.vendor == 'postgresql':
+        documents = list(_search_postgresql(query, content_type_ids, limit))
+    elif connection.vendor == 'sqlite':
+        documents = list(_search_sqlite(query, content_type_ids, limit))
+    else:
+        documents = _search_fallback(query, content_type_ids, limit)
+    documents = _drop_hidden(documents)
+    # attach content types from ContentType's cache rather than a query per row
+    for document in documents:
+        document.content_type = ContentType.objects.get_for_id(document.content_type_id)
+    return documents
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import *
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from orbitview.images import ImageVariantsField
+from orbitview.prefetch import PrefetchPlanMixin
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,14 +24,63 @@ class SkillTagSerializer(serializers.ModelSerializer):
 
 
 class HostSerializer(serializers.ModelSerializer):
+    cover_image_variants = ImageVariantsField(source='cover_image')
+
     class Meta:
         model = Host
-        fields = ['id', 'name', 'slogan', 'bio', 'cover_image']
+        fields = ['id', 'name', 'slogan', 'bio', 'cover_image', 'cover_image_variants']
+
+
+class ReactionCountsMixin(serializers.Serializer):
+    # reads the prefetched `reaction_counts` generic relation; serializers
+    # using this list it in their prefetch_related plan
+    reactions = serializers.SerializerMethodField()
+
+    def get_reactions(self, obj):
+        counts = next(iter(obj.reaction_counts.all()), None)
+        return {
+            'like': counts.like_count if counts else 0,
+            'dislike': counts.dislike_count if counts else 0,
+        }
+
+
+class TimeWindowStatusMixin(serializers.Serializer):
+    # past/ongoing from the is_past/is_ongoing annotations added in SQL by
+    # TimeWindowQuerySet.with_status(); objects that didn't come from such a
+    # queryset (nested, just created or updated) are compared in Python
+    past = serializers.SerializerMethodField()
+    ongoing = serializers.SerializerMethodField()
+
+    def get_past(self, obj):
+        if hasattr(obj, 'is_past'):
+            return obj.is_past
+        _, end = self.time_window(obj)
+        return end < timezone.now()
+
+    def get_ongoing(self, obj):
+        if hasattr(obj, 'is_ongoing'):
+            return obj.is_ongoing
+        start, end = self.time_window(obj)
+        return start <= timezone.now() <= end
+
+    def time_window(self, obj):
+        queryset = self.Meta.model.objects.none()
+        return getattr(obj, queryset.start_field), getattr(obj, queryset.end_field)
+
+    def update(self, instance, validated_data):
+        # the annotations describe the dates as they were loaded
+        instance.__dict__.pop('is_past', None)
+        instance.__dict__.pop('is_ongoing', None)
+        return super().update(instance, validated_data)
 
 
-class ProgramSerializer(serializers.ModelSerializer):
+class ProgramSerializer(PrefetchPlanMixin, ReactionCountsMixin, serializers.ModelSerializer):
     host = HostSerializer(read_only=True)
     category = CategorySerializer(many=True, read_only=True)
+    cover_image_variants = ImageVariantsField(source='cover_image')
+
+    select_related = ('host',)
+    prefetch_related = ('category', 'reaction_counts')
     
     class Meta:
         model = Program
@@ -40,11 +92,13 @@ class ProgramSerializer(serializers.ModelSerializer):
             'url',
             'duration_description',
             'cover_image',
+            'cover_image_variants',
             'category',
+            'reactions',
         ]
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(PrefetchPlanMixin, ReactionCountsMixin, TimeWindowStatusMixin, serializers.ModelSerializer):
     host = HostSerializer(read_only=True)
     host_id = serializers.PrimaryKeyRelatedField(
         queryset=Host.objects.all(), source='host', write_only=True
@@ -54,17 +108,22 @@ class EventSerializer(serializers.ModelSerializer):
         many=True, queryset=Category.objects.all(), source='category', write_only=True
     )
 
+    cover_image_variants = ImageVariantsField(source='cover_image')
+
+    select_related = ('host',)
+    prefetch_related = ('category', 'reaction_counts')
+
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'description', 'host', 'host_id',
-            'url', 'location', 'start_time', 'end_time',
-            'category', 'category_ids', 'cover_image',
+            'url', 'location', 'start_time', 'end_time', 'past', 'ongoing',
+            'category', 'category_ids', 'cover_image', 'cover_image_variants', 'reactions',
         ]
 
 
 
-class CompetitionSerializer(serializers.ModelSerializer):
+class CompetitionSerializer(PrefetchPlanMixin, ReactionCountsMixin, TimeWindowStatusMixin, serializers.ModelSerializer):
     tags = SkillTagSerializer(many=True, read_only=True)
     tag_ids = serializers.PrimaryKeyRelatedField(
         many=True, queryset=SkillTag.objects.all(), source='tags', write_only=True
@@ -73,41 +132,81 @@ class CompetitionSerializer(serializers.ModelSerializer):
     category_ids = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Category.objects.all(), source='category', write_only=True
     )
-    past = serializers.ReadOnlyField()
+    cover_image_variants = ImageVariantsField(source='cover_image')
+
+    prefetch_related = ('tags', 'category', 'reaction_counts')
 
     class Meta:
         model = Competition
         fields = [
             'id', 'title', 'description', 'organizer', 'url',
             'tags', 'tag_ids', 'difficulty_level', 'category',
-            'category_ids', 'start_date', 'end_date', 'created_at', 'past', 'cover_image',
+            'category_ids', 'start_date', 'end_date', 'created_at', 'past', 'ongoing', 'cover_image',
+            'cover_image_variants', 'reactions',
         ]
 
 
-class ChallengeSubmissionSerializer(serializers.ModelSerializer):
+class ChallengeSubmissionSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
     competition = CompetitionSerializer(read_only=True)
     competition_id = serializers.PrimaryKeyRelatedField(
         queryset=Competition.objects.all(), source='competition', write_only=True
     )
     user = serializers.StringRelatedField(read_only=True)  # You could also serialize as full user if needed
     edited = serializers.ReadOnlyField()
+    cover_image_variants = ImageVariantsField(source='cover_image')
+
+    select_related = ('user', 'competition')
+    prefetch_related = tuple(
+        f'competition__{relation}' for relation in CompetitionSerializer.prefetch_related
+    )
 
     class Meta:
         model = ChallengeSubmission
         fields = [
-            'id', 'title', 'description', 'user',
+            'id', 'reference', 'title', 'description', 'user',
             'competition', 'competition_id',
             'submitted_at', 'updated_at', 'link',
-            'edited', 'is_verified'
+            'edited', 'is_verified', 'cover_image_variants',
+        ]
+
+
+class ChallengeSubmissionImportListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # check every referenced user with one query instead of one per row
+        user_ids = {item['user_id'] for item in attrs}
+        found = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        missing = user_ids - found
+        if missing:
+            raise serializers.ValidationError(f"Unknown user ids: {sorted(missing)}")
+        return attrs
+
+    def create(self, validated_data):
+        competition = self.context['competition']
+        submissions = [
+            ChallengeSubmission(competition=competition, **item)
+            for item in validated_data
         ]
+        return ChallengeSubmission.objects.bulk_ingest(submissions)
+
+
+class ChallengeSubmissionImportSerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField()
+
+    class Meta:
+        model = ChallengeSubmission
+        list_serializer_class = ChallengeSubmissionImportListSerializer
+        fields = ['id', 'reference', 'user_id', 'title', 'description', 'link', 'is_verified']
+        read_only_fields = ['id', 'reference']
 
 
-class ReactionSerializer(serializers.ModelSerializer):
+class ReactionSerializer(PrefetchPlanMixin, serializers.ModelSerializer):
     content_type = serializers.SlugRelatedField(
         queryset=ContentType.objects.all(),
         slug_field='model'
     )
 
+    select_related = ('content_type',)
+
     class Meta:
         model = Reaction
         fields = ['id', 'user', 'reaction', 'content_type', 'object_id', 'timestamp']
@@ -116,3 +215,40 @@ class ReactionSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class ReactionStatusItemSerializer(serializers.Serializer):
+    content_type = serializers.CharField()
+    object_id = serializers.IntegerField()
+
+
+class ReactionStatusRequestSerializer(serializers.Serializer):
+    MAX_ITEMS = 500
+
+    items = serializers.ListField(
+        child=ReactionStatusItemSerializer(),
+        allow_empty=False,
+        max_length=MAX_ITEMS,
+    )
+
+    def validate_items(self, items):
+        # resolve all content types with one query instead of one per item
+        names = {item['content_type'] for item in items}
+        content_types = {ct.model: ct for ct in ContentType.objects.filter(model__in=names)}
+        targets = []
+        for item in items:
+            content_type = content_types.get(item['content_type'])
+            if content_type is None:
+                raise serializers.ValidationError(f"Unknown content type: {item['content_type']}")
+            targets.append((content_type, item['object_id']))
+        return targets
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='content_type.model')
+    id = serializers.IntegerField(source='object_id')
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = SearchDocument
+        fields = ['type', 'id', 'title', 'body', 'rank']
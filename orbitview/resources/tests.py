@@ -1,3 +1,555 @@
-from django.test import TestCase
+import datetime
+import io
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from jobs import queue
+from orbitview import caching, images
+from orbitview.testing import QueryCountMixin
+
+from profiles.models import Opportunity
+from .models import Category, SkillTag, Host, Event, Competition, Program, ChallengeSubmission, Reaction, ReactionCount, SearchDocument
+from .views import ChallengeSubmissionImportView, EventListCreateView
+
+User = get_user_model()
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass12345',
+    )
+
+
+def create_event(host, title='Launch', days=1):
+    start = timezone.now() + datetime.timedelta(days=days)
+    return Event.objects.create(
+        title=title, description='-', host=host, url='https://orbitview.net',
+        start_time=start, end_time=start + datetime.timedelta(hours=2),
+        cover_image='media/events/cover_images/event.jpg',
+    )
+
+
+class ReactionCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('orbit')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        self.event = create_event(self.host)
+        self.content_type = ContentType.objects.get_for_model(Event)
+
+    def counts(self):
+        counts = ReactionCount.objects.get(content_type=self.content_type, object_id=self.event.pk)
+        return counts.like_count, counts.dislike_count
+
+    def test_counts_follow_create_update_delete(self):
+        response = self.client.post('/api/resources/reaction/', {
+            'reaction': 'like', 'content_type': 'event', 'object_id': self.event.pk,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counts(), (1, 0))
+
+        url = f"/api/resources/reaction/{response.data['id']}/"
+        self.client.patch(url, {'reaction': 'dislike'})
+        self.assertEqual(self.counts(), (0, 1))
+
+        self.client.delete(url)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_delete_uncounted_reaction(self):
+        reaction = Reaction.objects.create(
+            user=self.user, reaction='like', content_type=self.content_type, object_id=self.event.pk,
+        )
+        response = self.client.delete(f'/api/resources/reaction/{reaction.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_event_list_exposes_counts(self):
+        ReactionCount.adjust(self.content_type.pk, self.event.pk, 'like', 3)
+        response = self.client.get('/api/resources/events/')
+        self.assertEqual(response.data['results'][0]['reactions'], {'like': 3, 'dislike': 0})
+
+    def test_rebuild_command(self):
+        other = create_user('other')
+        Reaction.objects.create(user=self.user, reaction='like', content_type=self.content_type, object_id=self.event.pk)
+        Reaction.objects.create(user=other, reaction='dislike', content_type=self.content_type, object_id=self.event.pk)
+        call_command('rebuild_reaction_counts', stdout=StringIO())
+        self.assertEqual(self.counts(), (1, 1))
+
+
+class ReactionStatusTests(TestCase):
+    def setUp(self):
+        self.user = create_user('orbit')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        self.events = [create_event(host, title=f'Event {i}') for i in range(5)]
+        content_type = ContentType.objects.get_for_model(Event)
+        Reaction.objects.create(user=self.user, reaction='like', content_type=content_type, object_id=self.events[0].pk)
+        ReactionCount.adjust(content_type.pk, self.events[0].pk, 'like', 1)
+
+    def test_batch_status(self):
+        items = [{'content_type': 'event', 'object_id': event.pk} for event in self.events]
+        with self.assertNumQueries(3):
+            response = self.client.post('/api/resources/reaction/status/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0]['reaction'], 'like')
+        self.assertEqual(results[0]['like'], 1)
+        self.assertIsNone(results[1]['reaction'])
+        self.assertEqual(results[1]['like'], 0)
+
+    def test_unknown_content_type(self):
+        items = [{'content_type': 'nope', 'object_id': 1}]
+        response = self.client.post('/api/resources/reaction/status/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_items(self):
+        for item in [{'content_type': ['event'], 'object_id': 1}, {'content_type': {}, 'object_id': 1},
+                     {'content_type': 'event', 'object_id': 'one'}, {'content_type': 'event'}, 'event']:
+            response = self.client.post('/api/resources/reaction/status/', {'items': [item]}, format='json')
+            self.assertEqual(response.status_code, 400, item)
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        self.events = [create_event(host, title=f'Event {i}', days=i) for i in range(1, 26)]
+
+    def test_cursor_mode_walks_every_row_in_start_time_order(self):
+        titles = []
+        url = '/api/resources/events/?pagination=cursor'
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            titles += [event['title'] for event in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, [event.title for event in self.events])
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get('/api/resources/events/')
+        self.assertEqual(response.data['count'], 25)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.host = Host.objects.create(name='Robotics Society', bio='Student robotics club', cover_image='media/hosts/cover_images/h.jpg')
+        self.other = create_event(self.host, title='Career fair')
+        self.other.description = 'Meet teams building drones'
+        self.other.save()
+        self.event = create_event(self.host, title='Autonomous drone workshop')
+
+    def search(self, query, **params):
+        response = self.client.get('/api/resources/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_title_matches_rank_above_description_matches(self):
+        results = self.search('drone')
+        self.assertEqual([r['id'] for r in results], [self.event.pk, self.other.pk])
+
+    def test_type_filter_and_prefix(self):
+        results = self.search('robot', type='host')
+        self.assertEqual([(r['type'], r['id']) for r in results], [('host', self.host.pk)])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.event.title = 'Hackathon'
+        self.event.save()
+        self.assertEqual([r['id'] for r in self.search('hackathon')], [self.event.pk])
+        self.event.delete()
+        self.assertEqual(self.search('hackathon'), [])
+
+    def test_opportunities_are_live_and_members_only(self):
+        poster = create_user('poster')
+        fields = dict(organization='OrbitView', description='-', opportunity_type='JOB', location='Remote', posted_by=poster)
+        live = Opportunity.objects.create(title='Drone pilot', **fields)
+        expired = Opportunity.objects.create(title='Drone mechanic', **fields)
+        Opportunity.objects.create(title='Drone designer', is_active=False, **fields)
+        # the deadline passes without a save
+        Opportunity.objects.filter(pk=expired.pk).update(deadline=timezone.localdate() - datetime.timedelta(days=1))
+
+        self.assertEqual(self.search('drone', type='opportunity'), [])
+        self.client.force_authenticate(poster)
+        self.assertEqual([r['id'] for r in self.search('drone', type='opportunity')], [live.pk])
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 3)
+        self.assertEqual(len(self.search('drone')), 2)
+
+
+class ChallengeSubmissionTests(TestCase):
+    def setUp(self):
+        self.user = create_user('orbit')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        now = timezone.now()
+        self.competition = Competition.objects.create(
+            title='Hack', description='-', organizer=self.host, url='https://orbitview.net',
+            difficulty_level='beginner', start_date=now, end_date=now + datetime.timedelta(days=2),
+            cover_image='media/competitions/cover_images/c.jpg',
+        )
+
+    def test_create_generates_reference_and_title(self):
+        response = self.client.post('/api/resources/submissions/', {'competition_id': self.competition.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['reference']), 22)
+        self.assertEqual(response.data['title'], response.data['reference'])
+        self.assertEqual((response.data['competition']['past'], response.data['competition']['ongoing']), (False, True))
+
+    def test_given_title_is_kept(self):
+        response = self.client.post('/api/resources/submissions/', {'competition_id': self.competition.pk, 'title': 'Rover'})
+        self.assertEqual(response.data['title'], 'Rover')
+
+    def test_import_requires_organizer(self):
+        url = f'/api/resources/competitions/{self.competition.pk}/submissions/import/'
+        response = self.client.post(url, [{'user_id': self.user.pk}], format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_is_batched(self):
+        self.host.administrators.add(self.user)
+        entrants = User.objects.bulk_create(
+            User(username=f'entrant{i}', email=f'entrant{i}@example.com') for i in range(50)
+        )
+        url = f'/api/resources/competitions/{self.competition.pk}/submissions/import/'
+        payload = [{'user_id': entrant.pk, 'is_verified': True} for entrant in entrants]
+        with self.assertNumQueries(6):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ChallengeSubmission.objects.filter(competition=self.competition).count(), 50)
+        self.assertEqual(len({item['reference'] for item in response.data}), 50)
+
+    def test_import_rejects_unknown_users(self):
+        self.host.administrators.add(self.user)
+        url = f'/api/resources/competitions/{self.competition.pk}/submissions/import/'
+        response = self.client.post(url, [{'user_id': 999999}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_size_is_capped(self):
+        self.host.administrators.add(self.user)
+        url = f'/api/resources/competitions/{self.competition.pk}/submissions/import/'
+        with mock.patch.object(ChallengeSubmissionImportView, 'import_max_size', 2):
+            response = self.client.post(url, [{'user_id': self.user.pk}] * 3, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChallengeSubmission.objects.exists())
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        self.event = create_event(self.host)
+
+    def test_second_read_skips_the_database(self):
+        self.client.get('/api/resources/events/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/resources/events/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_writes_to_dependencies_invalidate(self):
+        self.client.get('/api/resources/events/')
+        self.host.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.host.save()
+        response = self.client.get('/api/resources/events/')
+        self.assertEqual(response.data['results'][0]['host']['name'], 'Renamed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_event(self.host, title='Second')
+        self.assertEqual(self.client.get('/api/resources/events/').data['count'], 2)
+
+    def test_generations_are_bumped_once_committed(self):
+        before = caching.get_generations({'event'})
+        with self.captureOnCommitCallbacks(execute=True):
+            create_event(self.host, title='Second')
+            self.assertEqual(caching.get_generations({'event'}), before)
+        self.assertNotEqual(caching.get_generations({'event'}), before)
+
+    def test_reactions_invalidate(self):
+        self.client.get('/api/resources/events/')
+        with self.captureOnCommitCallbacks(execute=True):
+            ReactionCount.adjust(ContentType.objects.get_for_model(Event).pk, self.event.pk, 'like', 1)
+        response = self.client.get('/api/resources/events/')
+        self.assertEqual(response.data['results'][0]['reactions']['like'], 1)
+
+    def test_conditional_get(self):
+        etag = self.client.get('/api/resources/events/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/resources/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_event(self.host, title='Second')
+        response = self.client.get('/api/resources/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_is_never_ahead_of_a_write(self):
+        now = int(time.time()) + 10
+        with mock.patch('orbitview.caching.time.time', return_value=now + 0.3):
+            caching.bump('event')
+        with mock.patch('orbitview.caching.time.time', return_value=now + 0.5):
+            self.assertFalse(self.client.get('/api/resources/events/').has_header('Last-Modified'))
+        with mock.patch('orbitview.caching.time.time', return_value=now + 1.2):
+            last_modified = self.client.get('/api/resources/events/')['Last-Modified']
+            self.assertEqual(parse_http_date(last_modified), now + 1)
+            self.assertEqual(
+                self.client.get('/api/resources/events/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304,
+            )
+        with mock.patch('orbitview.caching.time.time', return_value=now + 1.5):
+            caching.bump('event')
+        with mock.patch('orbitview.caching.time.time', return_value=now + 2.5):
+            response = self.client.get('/api/resources/events/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_time_windowed_last_modified(self):
+        caching.get_generations(EventListCreateView.cache_resources)
+        now = time.time() + 2
+        with mock.patch('orbitview.caching.time.time', return_value=now):
+            last_modified = self.client.get('/api/resources/events/')['Last-Modified']
+            response = self.client.get('/api/resources/events/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # the next minute, with no writes in between
+        with mock.patch('orbitview.caching.time.time', return_value=now + 60):
+            response = self.client.get('/api/resources/events/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+
+class QueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('orbit')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        categories = [Category.objects.create(title=f'Category {i}') for i in range(3)]
+        tags = [SkillTag.objects.create(name=f'Tag {i}') for i in range(3)]
+        event_type = ContentType.objects.get_for_model(Event)
+        for i in range(3):
+            host = Host.objects.create(name=f'Host {i}', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+            event = create_event(host, title=f'Event {i}')
+            event.category.set(categories)
+            program = Program.objects.create(
+                title=f'Program {i}', description='-', host=host, url='https://orbitview.net',
+                duration_description='6 weeks',
+            )
+            program.category.set(categories)
+            now = timezone.now()
+            competition = Competition.objects.create(
+                title=f'Competition {i}', description='-', organizer=host, url='https://orbitview.net',
+                difficulty_level='beginner', start_date=now, end_date=now + datetime.timedelta(days=2),
+                cover_image='media/competitions/cover_images/c.jpg',
+            )
+            competition.tags.set(tags)
+            competition.category.set(categories)
+            self.submission = ChallengeSubmission.objects.create(user=self.user, competition=competition)
+            self.reaction = Reaction.objects.create(user=self.user, reaction='like', content_type=event_type, object_id=event.pk)
+        self.event, self.program, self.competition, self.host = event, program, competition, host
+
+    def test_list_endpoints(self):
+        self.assertQueries('/api/resources/categories/', 1)
+        self.assertQueries('/api/resources/tags/', 2)
+        self.assertQueries('/api/resources/hosts/', 2)
+        # count + rows + one query per prefetched relation
+        self.assertQueries('/api/resources/events/', 4)
+        self.assertQueries('/api/resources/programs/', 4)
+        self.assertQueries('/api/resources/competitions/', 5)
+        self.assertQueries('/api/resources/submissions/', 5)
+        self.assertQueries('/api/resources/reaction/', 2)
+
+    def test_detail_endpoints(self):
+        self.assertQueries(f'/api/resources/hosts/{self.host.pk}/', 1)
+        self.assertQueries(f'/api/resources/events/{self.event.pk}/', 3)
+        self.assertQueries(f'/api/resources/programs/{self.program.pk}/', 3)
+        self.assertQueries(f'/api/resources/competitions/{self.competition.pk}/', 4)
+        self.assertQueries(f'/api/resources/submissions/{self.submission.pk}/', 4)
+        self.assertQueries(f'/api/resources/reaction/{self.reaction.pk}/', 1)
+
+
+class TimeWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        other = Host.objects.create(name='Other', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        self.past = create_event(self.host, title='Past', days=-3)
+        self.ongoing = create_event(self.host, title='Ongoing', days=0)
+        self.ongoing.start_time -= datetime.timedelta(hours=1)
+        self.ongoing.save()
+        self.upcoming = create_event(self.host, title='Upcoming', days=3)
+        create_event(other, title='Elsewhere', days=5)
+
+    def titles(self, **params):
+        response = self.client.get('/api/resources/events/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(event['title'], event['past'], event['ongoing']) for event in response.data['results']]
+
+    def test_when(self):
+        self.assertEqual(self.titles(when='past'), [('Past', True, False)])
+        self.assertEqual(self.titles(when='ongoing'), [('Ongoing', False, True)])
+        self.assertEqual([t for t, _, _ in self.titles(when='upcoming')], ['Upcoming', 'Elsewhere'])
+
+    def test_host_and_range(self):
+        self.assertEqual([t for t, _, _ in self.titles(host=self.host.pk, when='upcoming')], ['Upcoming'])
+        after = (timezone.now() + datetime.timedelta(days=2)).isoformat()
+        before = (timezone.now() + datetime.timedelta(days=4)).isoformat()
+        self.assertEqual([t for t, _, _ in self.titles(after=after, before=before)], ['Upcoming'])
+
+    def test_competition_status_is_annotated(self):
+        now = timezone.now()
+        Competition.objects.create(
+            title='Done', description='-', organizer=self.host, url='https://orbitview.net',
+            difficulty_level='beginner', start_date=now - datetime.timedelta(days=5),
+            end_date=now - datetime.timedelta(days=1), cover_image='media/competitions/cover_images/c.jpg',
+        )
+        response = self.client.get('/api/resources/competitions/', {'when': 'past'})
+        self.assertEqual(response.data['results'][0]['past'], True)
+
+    def test_status_follows_an_update(self):
+        self.client.force_authenticate(create_user('orbit'))
+        start = timezone.now() - datetime.timedelta(days=2)
+        response = self.client.patch(f'/api/resources/events/{self.upcoming.pk}/', {
+            'start_time': start.isoformat(), 'end_time': (start + datetime.timedelta(hours=2)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['past'], response.data['ongoing']), (True, False))
+
+
+class AsyncListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        host = Host.objects.create(name='OrbitView', bio='-', cover_image='media/hosts/cover_images/h.jpg')
+        for i in range(12):
+            create_event(host, title=f'Event {i}', days=i - 3)
+
+    def test_matches_sync_view(self):
+        for params in [{}, {'page': 2}, {'when': 'upcoming', 'page_size': 5}]:
+            sync = self.client.get('/api/resources/events/', params).json()
+            async_ = self.client.get('/api/resources/async/events/', params).json()
+            self.assertEqual(async_['count'], sync['count'])
+            self.assertEqual(async_['results'], sync['results'])
+
+    def test_invalid_page(self):
+        for url in ['/api/resources/async/events/', '/api/resources/async/competitions/', '/api/resources/async/programs/']:
+            self.assertEqual(self.client.get(url, {'page': 9}).status_code, 404)
+
+    def test_invalid_filters_match_the_sync_views(self):
+        for url, params in [
+            ('events/', {'when': 'bogus'}),
+            ('events/', {'host': 'abc'}),
+            ('competitions/', {'after': 'notadate'}),
+            ('competitions/', {'difficulty_level': 'impossible'}),
+        ]:
+            sync = self.client.get(f'/api/resources/{url}', params)
+            async_ = self.client.get(f'/api/resources/async/{url}', params)
+            self.assertEqual(async_.status_code, 400, (url, params))
+            self.assertEqual(async_.json(), sync.json())
+
+    def test_cursor_pagination_is_rejected(self):
+        for params in [{'pagination': 'cursor'}, {'cursor': 'abc'}]:
+            response = self.client.get('/api/resources/async/events/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('pagination', response.json())
+
+
+def jpeg_upload(name='cover.jpg', size=(1200, 800), color=(200, 30, 30)):
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'  # Make
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def create_host(self, upload, process=True):
+        host = Host.objects.create(name='OrbitView', bio='-', cover_image=upload)
+        if process:
+            queue.run_pending()
+        host.refresh_from_db()
+        return host
+
+    def test_upload_is_moved_to_content_addressed_variants(self):
+        raw = jpeg_upload()
+        host = self.create_host(raw)
+        name = host.cover_image.name
+        self.assertTrue(images.is_processed(name))
+        self.assertFalse(host.cover_image.storage.exists('media/hosts/cover_images/cover.jpg'))
+
+        storage = host.cover_image.storage
+        sizes = {}
+        for variant in images.VARIANTS:
+            with Image.open(storage.open(images.variant_name(name, variant))) as image:
+                self.assertEqual(image.format, 'WEBP')
+                sizes[variant] = image.size
+        self.assertEqual(sizes, {'thumb': (160, 160), 'card': (640, 360), 'full': (1200, 800)})
+        with Image.open(storage.open(name)) as original:
+            self.assertEqual(original.format, 'JPEG')
+            self.assertEqual(dict(original.getexif()), {})
+
+    def test_identical_uploads_share_storage(self):
+        first = self.create_host(jpeg_upload('a.jpg'))
+        second = self.create_host(jpeg_upload('b.jpg'))
+        other = self.create_host(jpeg_upload('c.jpg', color=(0, 0, 255)))
+        self.assertEqual(first.cover_image.name, second.cover_image.name)
+        self.assertNotEqual(first.cover_image.name, other.cover_image.name)
+
+    def test_serializers_return_a_variant_map(self):
+        client = APIClient()
+        self.create_host(jpeg_upload(), process=False)
+        host = client.get('/api/resources/hosts/').data['results'][0]
+        raw_url = host['cover_image']
+        self.assertEqual(host['cover_image_variants'], {'thumb': raw_url, 'card': raw_url, 'full': raw_url})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_images', stdout=StringIO())
+        # processing invalidates the cached listing
+        variants = client.get('/api/resources/hosts/').data['results'][0]['cover_image_variants']
+        self.assertEqual(set(variants), {'thumb', 'card', 'full'})
+        self.assertTrue(variants['thumb'].startswith('http://testserver/media/media/images/'))
+        self.assertTrue(variants['thumb'].endswith('/thumb.webp'))
+
+    def test_unreadable_uploads_are_left_alone(self):
+        upload = SimpleUploadedFile('cover.jpg', b'not an image', content_type='image/jpeg')
+        with self.assertLogs('orbitview.images', 'WARNING'):
+            host = self.create_host(upload)
+        self.assertEqual(host.cover_image.name, 'media/hosts/cover_images/cover.jpg')
+
+    def test_backfill_command(self):
+        host = self.create_host(jpeg_upload(), process=False)
+        out = StringIO()
+        call_command('process_images', stdout=out)
+        host.refresh_from_db()
+        self.assertTrue(images.is_processed(host.cover_image.name))
+        self.assertIn('Processed 1 images', out.getvalue())
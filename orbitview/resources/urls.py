@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path("categories/", views.CategoryListCreateView.as_view(), name="category-list"),
@@ -13,6 +13,7 @@ urlpatterns = [
     
     path("competitions/", views.CompetitionListCreateView.as_view(), name="competition-list"),
     path("competitions/<int:pk>/", views.CompetitionDetailView.as_view(), name="competition-detail"),
+    path("competitions/<int:pk>/submissions/import/", views.ChallengeSubmissionImportView.as_view(), name="submission-import"),
     
     path("submissions/", views.ChallengeSubmissionListCreateView.as_view(), name="submission-list"),
     path("submissions/<int:pk>/", views.ChallengeSubmissionDetailView.as_view(), name="submission-detail"),
@@ -22,4 +23,11 @@ urlpatterns = [
 
     path('reaction/', views.ReactionListCreateView.as_view(), name='reaction-list-create'),
     path('reaction/<int:pk>/', views.ReactionDetailView.as_view(), name='reaction-detail'),
+    path('reaction/status/', views.ReactionStatusView.as_view(), name='reaction-status'),
+
+    path("search/", views.SearchView.as_view(), name="search"),
+
+    path("async/events/", async_views.AsyncEventListView.as_view(), name="async-event-list"),
+    path("async/competitions/", async_views.AsyncCompetitionListView.as_view(), name="async-competition-list"),
+    path("async/programs/", async_views.AsyncProgramListView.as_view(), name="async-program-list"),
 ]
@@ -1,29 +1,45 @@
 from rest_framework import generics, permissions
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Q
 from .models import *
 from .serializers import *
 from rest_framework import filters
 from django_filters.rest_framework import DjangoFilterBackend
+from orbitview.caching import CachedResponseMixin
+from orbitview.prefetch import OptimizedQuerysetMixin
+from . import search
+from .filters import EventFilter, CompetitionFilter
 
 
 # Category Views
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('category',)
     filter_backends = [filters.SearchFilter]
     search_fields = ['title__istartswith']
     pagination_class = None # no pagination here
 
 # SkillTag Views
-class SkillTagListCreateView(generics.ListCreateAPIView):
+class SkillTagListCreateView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     queryset = SkillTag.objects.all()
     serializer_class = SkillTagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('skilltag',)
+    cursor_ordering = 'id'
 
-class ProgramListCreateView(generics.ListCreateAPIView):
+class ProgramListCreateView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Program.objects.all()
     serializer_class = ProgramSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('program', 'host', 'category')
+    cursor_ordering = '-id'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
 
     search_fields = [
@@ -31,10 +47,12 @@ class ProgramListCreateView(generics.ListCreateAPIView):
     ]
 
 # Host Views
-class HostListCreateView(generics.ListCreateAPIView):
+class HostListCreateView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Host.objects.all()
     serializer_class = HostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('host',)
+    cursor_ordering = 'id'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
 
 
@@ -42,52 +60,69 @@ class HostListCreateView(generics.ListCreateAPIView):
         'name__istartswith',
     ]
 
-class HostDetailView(generics.RetrieveUpdateDestroyAPIView):
+class HostDetailView(CachedResponseMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Host.objects.all()
     serializer_class = HostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_resources = ('host',)
 
 # Event Views
-class EventListCreateView(generics.ListCreateAPIView):
-    queryset = Event.objects.all()
+class EventListCreateView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
+    queryset = Event.objects.with_status().order_by('start_time', 'id')
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('event', 'host', 'category')
+    cache_time_windowed = True
+    cursor_ordering = ('start_time', 'id')
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
 
-    filter_fields = ['start_time', 'end_time', 'host']
+    filterset_class = EventFilter
 
     search_fields = [
         'title__istartswith',
     ]
 
 
-class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.all()
+class EventDetailView(CachedResponseMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Event.objects.with_status()
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('event', 'host', 'category')
+    cache_time_windowed = True
 
-class ProgramDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProgramDetailView(CachedResponseMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Program.objects.all()
     serializer_class = ProgramSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('program', 'host', 'category')
 
 
 # Competition Views
-class CompetitionListCreateView(generics.ListCreateAPIView):
-    queryset = Competition.objects.all()
+class CompetitionListCreateView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListCreateAPIView):
+    queryset = Competition.objects.with_status().order_by('-created_at', '-id')
     serializer_class = CompetitionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('competition', 'skilltag', 'category')
+    cache_time_windowed = True
+    cursor_ordering = ('-created_at', '-id')
 
-class CompetitionDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Competition.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CompetitionFilter
+
+class CompetitionDetailView(CachedResponseMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Competition.objects.with_status()
     serializer_class = CompetitionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_resources = ('competition', 'skilltag', 'category')
+    cache_time_windowed = True
 
 # ChallengeSubmission Views
-class ChallengeSubmissionListCreateView(generics.ListCreateAPIView):
+class ChallengeSubmissionListCreateView(OptimizedQuerysetMixin, generics.ListCreateAPIView):
     serializer_class = ChallengeSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'submission'
+    cursor_ordering = ('-submitted_at', '-id')
 
     def get_queryset(self):
         return ChallengeSubmission.objects.filter(user=self.request.user)
@@ -95,7 +130,26 @@ class ChallengeSubmissionListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class ChallengeSubmissionDetailView(generics.RetrieveUpdateDestroyAPIView):
+# Lets a competition organizer import a batch of submissions (e.g. from an
+# external judging system) in one transaction: POST a list of submissions.
+class ChallengeSubmissionImportView(generics.GenericAPIView):
+    serializer_class = ChallengeSubmissionImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    import_max_size = 5000
+
+    def post(self, request, pk):
+        competition = get_object_or_404(Competition.objects.select_related('organizer'), pk=pk)
+        if not competition.organizer.administrators.filter(pk=request.user.pk).exists():
+            raise PermissionDenied("Only the competition organizer can import submissions.")
+
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=self.import_max_size, context={'competition': competition},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class ChallengeSubmissionDetailView(OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ChallengeSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -103,21 +157,107 @@ class ChallengeSubmissionDetailView(generics.RetrieveUpdateDestroyAPIView):
         return ChallengeSubmission.objects.filter(user=self.request.user)
 
 
-class ReactionListCreateView(generics.ListCreateAPIView):
+class ReactionListCreateView(OptimizedQuerysetMixin, generics.ListCreateAPIView):
     queryset = Reaction.objects.all()
     serializer_class = ReactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'reaction'
+    cursor_ordering = ('-timestamp', '-id')
 
     def get_queryset(self):
         return Reaction.objects.filter(user=self.request.user)
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        reaction = serializer.save(user=self.request.user)
+        ReactionCount.adjust(reaction.content_type_id, reaction.object_id, reaction.reaction, 1)
 
-class ReactionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ReactionDetailView(OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Reaction.objects.all()
     serializer_class = ReactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'reaction'
 
     def get_queryset(self):
-        return Reaction.objects.filter(user=self.request.user)
\ No newline at end of file
+        return Reaction.objects.filter(user=self.request.user)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old = serializer.instance
+        old_key = (old.content_type_id, old.object_id, old.reaction)
+        reaction = serializer.save()
+        new_key = (reaction.content_type_id, reaction.object_id, reaction.reaction)
+        if old_key != new_key:
+            ReactionCount.adjust(*old_key, -1)
+            ReactionCount.adjust(*new_key, 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        ReactionCount.adjust(instance.content_type_id, instance.object_id, instance.reaction, -1)
+        instance.delete()
+
+
+# Batch lookup for feed rendering: given a list of
+# {"content_type": "event", "object_id": 1} items, return the caller's
+# reaction and the like/dislike totals for each of them.
+class ReactionStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = ReactionStatusRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        targets = serializer.validated_data['items']
+
+        ids_by_type = {}
+        for content_type, object_id in targets:
+            ids_by_type.setdefault(content_type.pk, set()).add(object_id)
+        match = Q()
+        for content_type_id, object_ids in ids_by_type.items():
+            match |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+
+        # both lookups hit the (content_type, object_id) unique indexes
+        own = {
+            (row['content_type_id'], row['object_id']): row['reaction']
+            for row in Reaction.objects.filter(match, user=request.user)
+            .values('content_type_id', 'object_id', 'reaction')
+        }
+        totals = {
+            (row['content_type_id'], row['object_id']): row
+            for row in ReactionCount.objects.filter(match)
+            .values('content_type_id', 'object_id', 'like_count', 'dislike_count')
+        }
+
+        results = []
+        for content_type, object_id in targets:
+            key = (content_type.pk, object_id)
+            counts = totals.get(key, {})
+            results.append({
+                'content_type': content_type.model,
+                'object_id': object_id,
+                'reaction': own.get(key),
+                'like': counts.get('like_count', 0),
+                'dislike': counts.get('dislike_count', 0),
+            })
+        return Response({'results': results})
+
+
+# Ranked full-text search across events, competitions, programs, hosts and
+# (for signed-in users, live ones only) opportunities: ?q=robotics&type=event,host&limit=20
+class SearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'results': []})
+        types = [t for t in request.query_params.get('type', '').lower().split(',') if t]
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        documents = search.search(
+            query, types=types, limit=max(limit, 1), authenticated=request.user.is_authenticated,
+        )
+        return Response({'results': SearchResultSerializer(documents, many=True).data})
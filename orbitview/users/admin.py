@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import CustomUser
+from .models import CustomUser, Connection
 
 
 admin.site.register(CustomUser)
+admin.site.register(Connection)
 
 # Register your models here.
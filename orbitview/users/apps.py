@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from orbitview import images
+        from . import graph, tokens
+        from .models import CustomUser
+        graph.connect_signals()
+        tokens.connect_signals()
+        images.register(CustomUser, 'profile_image')
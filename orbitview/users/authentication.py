@@ -0,0 +1,36 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from . import tokens
+from .models import StatelessUser
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query. The user is built
+    from the token's signed claims (id, username, is_staff) and checked
+    against the cached token version; the row is only loaded if the view
+    touches another field.
+    """
+
+    def get_user(self, validated_token):
+        if tokens.VERSION_CLAIM not in validated_token:
+            # issued before the claims were added
+            return super().get_user(validated_token)
+
+        # the claim is a string; compare and assign it as the real pk type
+        user_id = StatelessUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        version = validated_token[tokens.VERSION_CLAIM]
+        tokens.check_version(user_id, version)
+
+        # check_version only passes for active users
+        claims = {
+            'id': user_id,
+            'username': validated_token[tokens.USERNAME_CLAIM],
+            'is_staff': validated_token[tokens.STAFF_CLAIM],
+            'is_active': True,
+            'token_version': version,
+        }
+        # from_db wants the loaded values in field order
+        names = [field.attname for field in StatelessUser._meta.concrete_fields if field.attname in claims]
+        return StatelessUser.from_db(StatelessUser.objects.db, names, [claims[name] for name in names])
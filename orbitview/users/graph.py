@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .models import Connection
+
+
+CONNECTION_IDS_KEY = 'users:connection-ids:{user_id}'
+CONNECTION_IDS_TIMEOUT = 60 * 60
+
+
+def connection_ids(user_id):
+    """
+    Ids of the users mutually connected to `user_id`, cached until an edge
+    touching them changes. Callers use it as a plain `user_id IN (...)`.
+    """
+    key = CONNECTION_IDS_KEY.format(user_id=user_id)
+    ids = cache.get(key)
+    if ids is None:
+        # both directions come off an adjacency index
+        followers = Connection.objects.filter(followed_id=user_id).values('follower_id')
+        ids = frozenset(
+            Connection.objects.filter(follower_id=user_id, followed_id__in=followers)
+            .values_list('followed_id', flat=True)
+        )
+        cache.set(key, ids, CONNECTION_IDS_TIMEOUT)
+    return ids
+
+
+def are_connected(user_id, other_id):
+    return other_id in connection_ids(user_id)
+
+
+def invalidate(*user_ids):
+    cache.delete_many([CONNECTION_IDS_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def _edge_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # a read between the write and its commit would cache the old edges
+        # again, so drop the entries once the edge is visible to everyone
+        follower_id, followed_id = instance.follower_id, instance.followed_id
+        transaction.on_commit(lambda: invalidate(follower_id, followed_id))
+
+
+def connect_signals():
+    post_save.connect(_edge_changed, sender=Connection, dispatch_uid='graph-edge-saved')
+    post_delete.connect(_edge_changed, sender=Connection, dispatch_uid='graph-edge-deleted')
@@ -10,9 +10,76 @@ class CustomUser(AbstractUser):
     bio = models.TextField(max_length=250, blank=True, null=True)
     website = models.URLField(blank=True, null=True)
     profile_image = models.ImageField(upload_to="profile_images/", blank=True, null=True)
+    # Carried in every JWT (see tokens.py); bumping it revokes them all.
+    token_version = models.PositiveIntegerField(default=0)
+
+    # fields trusted from token claims: changing any of them revokes tokens
+    CLAIM_FIELDS = ('username', 'is_staff', 'is_active')
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} : {self.email} : {self.username}"
     
     def get_full_name(self):
-        return f"{self.first_name} {self.last_name}"
\ No newline at end of file
+        return f"{self.first_name} {self.last_name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance._claims()
+        return instance
+
+    def _claims(self):
+        return {name: self.__dict__[name] for name in self.CLAIM_FIELDS if name in self.__dict__}
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self.revoke_tokens()
+
+    def revoke_tokens(self):
+        self.token_version += 1
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', {})
+        changed = any(self.__dict__.get(name) != value for name, value in loaded.items())
+        if changed and 'token_version' not in self.get_deferred_fields():
+            self.revoke_tokens()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self._claims()
+
+
+class StatelessUser(CustomUser):
+    # request.user for token-authenticated requests: built from the token's
+    # claims without a query. The first access to any other field loads all
+    # of them in one query.
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+class Connection(models.Model):
+    # Directed follow edge. Two opposite edges make a mutual connection, which
+    # is what CONNECTIONS-visibility content is shared with (see graph.py).
+    follower = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='following_edges')
+    followed = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='follower_edges')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # also the forward adjacency index: who does X follow
+            models.UniqueConstraint(fields=['follower', 'followed'], name='unique_connection_edge'),
+            models.CheckConstraint(condition=~models.Q(follower=models.F('followed')), name='no_self_connection'),
+        ]
+        indexes = [
+            # reverse adjacency: who follows X
+            models.Index(fields=['followed', 'follower'], name='connection_followed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} -> {self.followed_id}"
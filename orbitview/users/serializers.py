@@ -1,4 +1,6 @@
+from rest_framework import serializers
 from djoser.serializers import UserCreateSerializer, UserSerializer
+from orbitview.images import ImageVariantsField
 from .models import CustomUser
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -21,6 +23,8 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 
 
 class CustomUserSerializer(UserSerializer):
+    profile_image_variants = ImageVariantsField(source='profile_image')
+
     class Meta:
         model = CustomUser
         fields = (
@@ -32,5 +36,14 @@ class CustomUserSerializer(UserSerializer):
             'last_name', 
             'bio', 
             'website', 
-            'profile_image'
+            'profile_image',
+            'profile_image_variants',
         )
+
+
+class ConnectionUserSerializer(serializers.ModelSerializer):
+    profile_image_variants = ImageVariantsField(source='profile_image')
+
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'first_name', 'last_name', 'profile_image', 'profile_image_variants')
@@ -1,3 +1,134 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from . import graph, tokens
+from .models import CustomUser, Connection
+
+
+def create_user(username):
+    return CustomUser.objects.create_user(username=username, email=f'{username}@example.com', password='pass12345')
+
+
+class ConnectionGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ada, self.bob, self.cy = create_user('ada'), create_user('bob'), create_user('cy')
+        self.client = APIClient()
+
+    def follow(self, user, target):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/users/follow/{target.username}/')
+
+    def test_mutual_follows_are_connections(self):
+        self.assertEqual(self.follow(self.ada, self.bob).data, {'following': True, 'connected': False})
+        self.assertEqual(self.follow(self.ada, self.bob).status_code, 200)
+        self.follow(self.ada, self.cy)
+        self.assertEqual(self.follow(self.bob, self.ada).data['connected'], True)
+
+        self.assertEqual(graph.connection_ids(self.ada.pk), {self.bob.pk})
+        self.client.force_authenticate(self.ada)
+        response = self.client.get('/api/users/connections/')
+        self.assertEqual([user['username'] for user in response.data['results']], ['bob'])
+
+    def test_cached_ids_follow_edge_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Connection.objects.create(follower=self.ada, followed=self.bob)
+            Connection.objects.create(follower=self.bob, followed=self.ada)
+        self.assertEqual(graph.connection_ids(self.bob.pk), {self.ada.pk})
+        with self.assertNumQueries(0):
+            graph.connection_ids(self.bob.pk)
+
+        self.client.force_authenticate(self.ada)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/users/follow/{self.bob.username}/').status_code, 204)
+        self.assertEqual(graph.connection_ids(self.bob.pk), frozenset())
+
+    def test_ids_are_invalidated_once_committed(self):
+        self.assertEqual(graph.connection_ids(self.bob.pk), frozenset())
+        with self.captureOnCommitCallbacks(execute=True):
+            Connection.objects.create(follower=self.ada, followed=self.bob)
+            Connection.objects.create(follower=self.bob, followed=self.ada)
+            # a reader inside the transaction re-caches the old value...
+            cache.set(graph.CONNECTION_IDS_KEY.format(user_id=self.bob.pk), frozenset())
+        # ...which the commit drops
+        self.assertEqual(graph.connection_ids(self.bob.pk), {self.ada.pk})
+
+    def test_cannot_follow_self(self):
+        self.assertEqual(self.follow(self.ada, self.ada).status_code, 400)
+
+
+class StatelessJWTTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tokens.versions.clear()
+        self.user = create_user('ada')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/auth/jwt/create/', {'username': 'ada', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {response.data['access']}")
+        return response.data
+
+    def test_requests_skip_the_user_query(self):
+        self.login()
+        self.client.get('/api/users/connections/')  # warms the version map
+        with CaptureQueriesContext(connection) as jwt_queries:
+            self.assertEqual(self.client.get('/api/users/connections/').status_code, 200)
+
+        forced = APIClient()
+        forced.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as forced_queries:
+            forced.get('/api/users/connections/')
+        self.assertEqual(len(jwt_queries), len(forced_queries))
+        # request.user.pk has the real pk type
+        self.assertEqual(self.client.post('/api/users/follow/ada/').status_code, 400)
+
+    def test_other_fields_load_in_one_query(self):
+        self.login()
+        self.client.get('/api/users/connections/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/me/')
+        self.assertEqual((response.data['email'], response.data['first_name']), ('ada@example.com', ''))
+
+        response = self.client.patch('/api/users/me/', {'bio': 'Rocketry'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.bio, self.user.email), ('Rocketry', 'ada@example.com'))
+
+    def test_password_and_claim_changes_revoke_tokens(self):
+        self.login()
+        self.user.set_password('another-pass')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+        self.client.credentials()
+        response = self.client.post('/auth/jwt/create/', {'username': 'ada', 'password': 'another-pass'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {response.data['access']}")
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        user = CustomUser.objects.get(pk=self.user.pk)
+        user.is_staff = True
+        user.save(update_fields=['is_staff'])
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_revoke_endpoint_invalidates_refresh_tokens(self):
+        pair = self.login()
+        self.assertEqual(self.client.post('/api/users/me/revoke-tokens/').status_code, 204)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+        self.assertEqual(self.client.post('/auth/jwt/refresh/', {'refresh': pair['refresh']}).status_code, 401)
+
+    def test_refresh_keeps_the_claims(self):
+        pair = self.login()
+        response = self.client.post('/auth/jwt/refresh/', {'refresh': pair['refresh']})
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {response.data['access']}")
+        self.assertEqual(self.client.get('/api/users/me/').data['username'], 'ada')
+
+    def test_tokens_without_claims_still_work(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {access}')
+        self.assertEqual(self.client.get('/api/users/me/').data['username'], 'ada')
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+
+
+# claims read by StatelessJWTAuthentication instead of loading the user;
+# refresh tokens carry them too, and access tokens copy them on refresh
+USERNAME_CLAIM = 'username'
+STAFF_CLAIM = 'is_staff'
+VERSION_CLAIM = 'ver'
+
+VERSION_TTL = 30  # seconds a process trusts a version it has read
+VERSION_MAX_ENTRIES = 100000
+
+
+class TokenVersions:
+    """
+    In-process map of user id -> current token_version (None for inactive or
+    deleted users). Entries are trusted for `ttl` seconds: a revocation made
+    in this process applies at once, in other processes within `ttl`.
+    """
+
+    def __init__(self, ttl=VERSION_TTL, max_entries=VERSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        row = (
+            get_user_model().objects.filter(pk=user_id)
+            .values_list('token_version', 'is_active').first()
+        )
+        version = row[0] if row and row[1] else None
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (version, now + self.ttl)
+        return version
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+versions = TokenVersions()
+
+
+def check_version(user_id, version):
+    if versions.get(user_id) != version:
+        raise AuthenticationFailed("Token has been revoked.", code='token_revoked')
+
+
+def revoke(user_id):
+    """Invalidate every token issued to `user_id` so far."""
+    get_user_model().objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    versions.forget(user_id)
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[USERNAME_CLAIM] = user.username
+        token[STAFF_CLAIM] = user.is_staff
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if VERSION_CLAIM in refresh.payload:
+            # refreshing is rare: read the version fresh so a revoked
+            # refresh token can't mint access tokens during the TTL
+            user_id = get_user_model()._meta.pk.to_python(refresh.payload[api_settings.USER_ID_CLAIM])
+            versions.forget(user_id)
+            check_version(user_id, refresh.payload[VERSION_CLAIM])
+        return super().validate(attrs)
+
+
+def _user_changed(sender, instance, raw=False, **kwargs):
+    versions.forget(instance.pk)
+
+
+def connect_signals():
+    User = get_user_model()
+    post_save.connect(_user_changed, sender=User, dispatch_uid='tokens-user-saved')
+    post_delete.connect(_user_changed, sender=User, dispatch_uid='tokens-user-deleted')
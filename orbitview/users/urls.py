@@ -1,6 +1,9 @@
 from django.urls import path
-from .views import UserProfileView
+from .views import UserProfileView, RevokeTokensView, FollowView, ConnectionListView
 
 urlpatterns = [
     path("me/", UserProfileView.as_view(), name="user-profile"),
+    path("me/revoke-tokens/", RevokeTokensView.as_view(), name="revoke-tokens"),
+    path("connections/", ConnectionListView.as_view(), name="connection-list"),
+    path("follow/<str:username>/", FollowView.as_view(), name="follow"),
 ]
\ No newline at end of file
@@ -3,8 +3,10 @@ from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import CustomUser
-from .serializers import CustomUserSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView
+from . import graph, tokens
+from .models import CustomUser, Connection
+from .serializers import CustomUserSerializer, ConnectionUserSerializer
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = CustomUserSerializer
@@ -14,6 +16,51 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
     
 
+class LoginView(TokenObtainPairView):
+    # djoser's jwt/create with a per-client limit on password guesses
+    throttle_scope = 'login'
+
+
+class RevokeTokensView(APIView):
+    # log out everywhere: every access and refresh token issued so far
+    # stops working
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        tokens.revoke(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FollowView(APIView):
+    # POST follows <username>, DELETE unfollows. Following someone who
+    # follows you back makes you connections.
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, username):
+        target = get_object_or_404(CustomUser, username=username)
+        if target.pk == request.user.pk:
+            return Response({"detail": "You cannot follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
+        _, created = Connection.objects.get_or_create(follower=request.user, followed=target)
+        return Response(
+            {"following": True, "connected": graph.are_connected(request.user.pk, target.pk)},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def delete(self, request, username):
+        target = get_object_or_404(CustomUser, username=username)
+        Connection.objects.filter(follower=request.user, followed=target).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ConnectionListView(generics.ListAPIView):
+    serializer_class = ConnectionUserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = 'id'
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(pk__in=graph.connection_ids(self.request.user.pk)).order_by('id')
+
+
 class CustomLoginAPIView(APIView):
 
     permission_classes = []